@@ -16,6 +16,10 @@ from typing import List, Dict, Optional, Any
 from datetime import datetime
 import logging
 
+# Raiz do repositório no path: permite executar este arquivo diretamente
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from shared.utils.kpi_engine import KPIEngine
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -594,6 +598,7 @@ Este issue tracked o status da padronização deste repositório conforme as dir
         repos = self.list_repos()
         if not repos:
             logger.error("Nenhum repositório encontrado")
+            self._record_kpis(False)
             return
         
         # Processar cada repositório
@@ -606,8 +611,16 @@ Este issue tracked o status da padronização deste repositório conforme as dir
         
         # Gerar relatório final
         self.generate_report()
+        self._record_kpis(not self.stats["errors"])
         
         logger.info("🎉 Automação concluída!")
+    
+    def _record_kpis(self, success: bool) -> None:
+        """Registra a execução no motor de KPIs."""
+        try:
+            KPIEngine().record_run("automation", success)
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar KPIs: {e}")
 
 
 def main():
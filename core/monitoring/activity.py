@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Coletor de Atividade Organizacional via GraphQL
+Agrupa vários repositórios por consulta para obter commits, PRs e issues
+recentes com poucas chamadas e contagens exatas.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Set, Tuple
+import statistics
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Tamanho de página das conexões (limite da API GraphQL)
+PAGE_SIZE = 100
+
+
+class OrganizationActivityCollector:
+    """Coleta atividade recente (commits, PRs, issues) de vários repositórios.
+
+    Cada consulta GraphQL cobre até ``batch_size`` repositórios usando aliases:
+    ``history(since:)`` devolve o total exato de commits, ``pullRequests``
+    ordenado por ``CREATED_AT`` é paginado apenas até o primeiro PR anterior
+    ao período e as issues são contadas via ``search``.
+    """
+
+    def __init__(
+        self,
+        org_name: str,
+        headers: Dict[str, str],
+        days: int = 7,
+        batch_size: int = 25,
+        timeout: int = 30,
+    ):
+        self.org_name = org_name
+        self.headers = headers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.since = datetime.now(timezone.utc) - timedelta(days=days)
+        self.calls = 0
+
+    # ------------------------------------------------------------------
+    # Montagem das consultas
+    # ------------------------------------------------------------------
+
+    def _history_field(self, idx: int, paginated: bool) -> str:
+        after = f", after: $after{idx}" if paginated else ""
+        return (
+            "defaultBranchRef { target { ... on Commit { "
+            f"history(since: $since, first: {PAGE_SIZE}{after}) {{ "
+            "totalCount pageInfo { hasNextPage endCursor } "
+            "nodes { author { email user { login } } } "
+            "} } } }"
+        )
+
+    def _prs_field(self, idx: int, paginated: bool) -> str:
+        after = f", after: $after{idx}" if paginated else ""
+        return (
+            f"pullRequests(first: {PAGE_SIZE}{after}, "
+            "orderBy: {field: CREATED_AT, direction: DESC}) { "
+            "pageInfo { hasNextPage endCursor } nodes { createdAt mergedAt } }"
+        )
+
+    def _build_initial_query(self, names: List[str]) -> Tuple[str, Dict[str, Any]]:
+        """Consulta inicial: histórico, PRs e contagem de issues por repo."""
+        declarations = ["$owner: String!", "$since: GitTimestamp!"]
+        fields = []
+        variables: Dict[str, Any] = {
+            "owner": self.org_name,
+            "since": self.since.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        created = self.since.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        for idx, name in enumerate(names):
+            declarations.append(f"$name{idx}: String!")
+            declarations.append(f"$issues{idx}: String!")
+            variables[f"name{idx}"] = name
+            variables[f"issues{idx}"] = (
+                f"repo:{self.org_name}/{name} is:issue created:>={created}"
+            )
+            fields.append(
+                f"r{idx}: repository(owner: $owner, name: $name{idx}) {{ "
+                f"{self._history_field(idx, False)} "
+                f"{self._prs_field(idx, False)} }}"
+            )
+            fields.append(
+                f"i{idx}: search(query: $issues{idx}, type: ISSUE) {{ issueCount }}"
+            )
+
+        query = f"query({', '.join(declarations)}) {{ {' '.join(fields)} }}"
+        return query, variables
+
+    def _build_followup_query(self, pending: List[Dict[str, str]]) -> Tuple[str, Dict[str, Any]]:
+        """Consulta de continuação apenas para as conexões com mais páginas."""
+        declarations = ["$owner: String!"]
+        fields = []
+        variables: Dict[str, Any] = {"owner": self.org_name}
+
+        # GraphQL rejeita variáveis declaradas e não usadas
+        if any(item["kind"] == "history" for item in pending):
+            declarations.append("$since: GitTimestamp!")
+            variables["since"] = self.since.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        for idx, item in enumerate(pending):
+            declarations.append(f"$name{idx}: String!")
+            declarations.append(f"$after{idx}: String!")
+            variables[f"name{idx}"] = item["repo"]
+            variables[f"after{idx}"] = item["cursor"]
+            if item["kind"] == "history":
+                field = self._history_field(idx, True)
+            else:
+                field = self._prs_field(idx, True)
+            fields.append(
+                f"r{idx}: repository(owner: $owner, name: $name{idx}) {{ {field} }}"
+            )
+
+        query = f"query({', '.join(declarations)}) {{ {' '.join(fields)} }}"
+        return query, variables
+
+    def _execute(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa uma consulta GraphQL, tolerando erros parciais."""
+        self.calls += 1
+        resp = requests.post(
+            GRAPHQL_URL,
+            headers=self.headers,
+            json={"query": query, "variables": variables},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        payload = resp.json()
+
+        for error in payload.get("errors", []) or []:
+            logger.warning(f"GraphQL: {error.get('message')}")
+
+        return payload.get("data") or {}
+
+    # ------------------------------------------------------------------
+    # Acumulação dos resultados
+    # ------------------------------------------------------------------
+
+    def _empty_activity(self) -> Dict[str, Any]:
+        return {
+            "commits_last_week": 0,
+            "prs_last_week": 0,
+            "issues_last_week": 0,
+            "contributors": set(),
+            "pr_times": [],
+        }
+
+    def _parse_time(self, value: str) -> datetime:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+    def _consume_history(self, repo: str, node: Optional[Dict], acc: Dict,
+                         pending: List[Dict[str, str]]) -> None:
+        target = ((node or {}).get("defaultBranchRef") or {}).get("target") or {}
+        history = target.get("history")
+        if not history:
+            return
+
+        # totalCount é exato já na primeira página
+        acc["commits_last_week"] = history.get("totalCount", 0)
+        for commit in history.get("nodes", []):
+            author = commit.get("author") or {}
+            login = (author.get("user") or {}).get("login") or author.get("email")
+            if login:
+                acc["contributors"].add(login)
+
+        page_info = history.get("pageInfo", {})
+        if page_info.get("hasNextPage"):
+            pending.append({"repo": repo, "kind": "history", "cursor": page_info["endCursor"]})
+
+    def _consume_prs(self, repo: str, node: Optional[Dict], acc: Dict,
+                     pending: List[Dict[str, str]]) -> None:
+        prs = (node or {}).get("pullRequests")
+        if not prs:
+            return
+
+        reached_cutoff = False
+        for pr in prs.get("nodes", []):
+            created = self._parse_time(pr["createdAt"])
+            if created < self.since:
+                # Ordenados por criação: nada mais novo nas próximas páginas
+                reached_cutoff = True
+                break
+            acc["prs_last_week"] += 1
+            if pr.get("mergedAt"):
+                merged = self._parse_time(pr["mergedAt"])
+                acc["pr_times"].append((merged - created).total_seconds() / 3600)
+
+        page_info = prs.get("pageInfo", {})
+        if not reached_cutoff and page_info.get("hasNextPage"):
+            pending.append({"repo": repo, "kind": "prs", "cursor": page_info["endCursor"]})
+
+    def _collect_batch(self, names: List[str], activity: Dict[str, Dict]) -> None:
+        query, variables = self._build_initial_query(names)
+        data = self._execute(query, variables)
+
+        pending: List[Dict[str, str]] = []
+        for idx, name in enumerate(names):
+            acc = activity[name]
+            node = data.get(f"r{idx}")
+            self._consume_history(name, node, acc, pending)
+            self._consume_prs(name, node, acc, pending)
+            acc["issues_last_week"] = (data.get(f"i{idx}") or {}).get("issueCount", 0)
+
+        # Paginar somente o necessário, também em lotes
+        while pending:
+            current = pending[:self.batch_size]
+            pending = pending[self.batch_size:]
+            query, variables = self._build_followup_query(current)
+            data = self._execute(query, variables)
+
+            for idx, item in enumerate(current):
+                node = data.get(f"r{idx}")
+                acc = activity[item["repo"]]
+                if item["kind"] == "history":
+                    self._consume_history(item["repo"], node, acc, pending)
+                else:
+                    self._consume_prs(item["repo"], node, acc, pending)
+
+    def collect(self, repo_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Coleta atividade de todos os repositórios informados.
+
+        Returns:
+            Dicionário ``repo -> métricas`` com ``commits_last_week``,
+            ``prs_last_week``, ``issues_last_week``, ``contributors`` (conjunto
+            de logins) e, quando houver PRs mergeados, ``avg_pr_time_hours``.
+        """
+        activity = {name: self._empty_activity() for name in repo_names}
+
+        for start in range(0, len(repo_names), self.batch_size):
+            names = repo_names[start:start + self.batch_size]
+            try:
+                self._collect_batch(names, activity)
+            except Exception as e:
+                logger.warning(f"Erro ao coletar atividade do lote {names[0]}..{names[-1]}: {e}")
+
+        for acc in activity.values():
+            pr_times = acc.pop("pr_times")
+            if pr_times:
+                acc["avg_pr_time_hours"] = round(statistics.mean(pr_times), 1)
+
+        logger.info(
+            f"📈 Atividade de {len(repo_names)} repositórios coletada em {self.calls} consultas GraphQL"
+        )
+        return activity
+
+    @staticmethod
+    def unique_contributors(activity: Dict[str, Dict[str, Any]]) -> Set[str]:
+        """Contribuidores únicos em toda a organização."""
+        contributors: Set[str] = set()
+        for acc in activity.values():
+            contributors |= acc.get("contributors", set())
+        return contributors
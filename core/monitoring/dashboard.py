@@ -5,6 +5,8 @@ Consolida métricas, relatórios e alertas de toda a organização arturdr-org
 """
 
 import os
+import sys
+import io
 import json
 import requests
 import yaml
@@ -15,6 +17,14 @@ import logging
 from collections import defaultdict
 import statistics
 
+# Raiz do repositório no path: permite executar este arquivo diretamente
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from core.monitoring.activity import OrganizationActivityCollector
+from core.monitoring.workflow_analytics import WorkflowAnalyticsCollector
+from core.monitoring.renderer import DashboardRenderer
+from core.monitoring.security import OrganizationSecurityCollector
+from shared.utils.kpi_engine import KPIEngine
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,11 +43,21 @@ HEADERS = {
     "X-GitHub-Api-Version": "2022-11-28",
 }
 
+GRAPHQL_HEADERS = {
+    "Authorization": f"bearer {TOKEN}",
+    "Accept": "application/vnd.github+json",
+    "X-GitHub-Api-Version": "2022-11-28",
+}
+
 class OrganizationDashboard:
     """Dashboard consolidado da organização."""
     
     def __init__(self):
         self.org_name = ORG_NAME
+        self.workflow_analytics = WorkflowAnalyticsCollector(self.org_name, HEADERS)
+        self.security = OrganizationSecurityCollector(self.org_name, HEADERS)
+        self.kpi_engine = KPIEngine()
+        self.contributors: Dict[str, set] = {}
         self.metrics = {
             "timestamp": datetime.now().isoformat(),
             "organization": {
@@ -67,7 +87,9 @@ class OrganizationDashboard:
             "quality": {
                 "avg_code_coverage": 0,
                 "workflow_success_rate": 0,
-                "failed_workflows": []
+                "failed_workflows": [],
+                "slowest_workflows": [],
+                "flaky_workflows": []
             },
             "repositories": {}
         }
@@ -89,17 +111,107 @@ class OrganizationDashboard:
                     "members": org_data.get("public_members", 0)
                 })
             
-            # Obter repositórios
+            # Obter e analisar repositórios
             repos = self._get_repositories()
-            self.metrics["organization"]["total_repos"] = len(repos)
+            self.refresh_repositories(repos)
             
-            # Analisar repositórios
-            for repo in repos:
-                self._analyze_repository(repo)
+            # Alertas de segurança via endpoints de organização
+            self.collect_security_metrics()
                 
         except Exception as e:
             logger.error(f"Erro ao coletar métricas da organização: {e}")
     
+    def collect_security_metrics(self) -> None:
+        """Sincroniza alertas de segurança de toda a organização."""
+        self.security.sync()
+        self.security.save_state()
+        self._aggregate_metrics()
+    
+    def refresh_repositories(self, repos: List[Dict]) -> None:
+        """(Re)analisa os repositórios informados e recalcula os agregados."""
+        for repo in repos:
+            self._analyze_repository(repo)
+        
+        # Atividade recente de todos os repositórios em lote
+        self._collect_activity([repo["name"] for repo in repos])
+        
+        self.workflow_analytics.save_state()
+        self._aggregate_metrics()
+        self.metrics["timestamp"] = datetime.now().isoformat()
+    
+    def prune_repositories(self, repo_names: List[str]) -> None:
+        """Remove métricas de repositórios que não existem mais."""
+        current = set(repo_names)
+        for repo_name in list(self.metrics["repositories"]):
+            if repo_name not in current:
+                del self.metrics["repositories"][repo_name]
+                self.contributors.pop(repo_name, None)
+        self._aggregate_metrics()
+    
+    def _aggregate_metrics(self) -> None:
+        """Recalcula os agregados da organização a partir dos repositórios."""
+        repos = self.metrics["repositories"]
+        organization = self.metrics["organization"]
+        development = self.metrics["development"]
+        
+        organization["total_repos"] = len(repos)
+        organization["languages"] = {}
+        organization["topics"] = {}
+        organization["visibility"] = {"public": 0, "private": 0}
+        development["commits_last_week"] = 0
+        development["prs_last_week"] = 0
+        development["issues_last_week"] = 0
+        failed_workflows = []
+        
+        for repo_name, repo_metrics in repos.items():
+            # Métricas básicas
+            language = repo_metrics.get("language")
+            if language:
+                organization["languages"][language] = organization["languages"].get(language, 0) + 1
+            
+            # Visibilidade
+            if repo_metrics.get("private"):
+                organization["visibility"]["private"] += 1
+            else:
+                organization["visibility"]["public"] += 1
+            
+            # Topics
+            for topic in repo_metrics.get("topics", []):
+                organization["topics"][topic] = organization["topics"].get(topic, 0) + 1
+            
+            development["commits_last_week"] += repo_metrics.get("commits_last_week", 0)
+            development["prs_last_week"] += repo_metrics.get("prs_last_week", 0)
+            development["issues_last_week"] += repo_metrics.get("issues_last_week", 0)
+            failed_workflows.extend(repo_metrics.get("workflows", {}).get("recent_failures", []))
+        
+        # Contribuidores únicos em toda a organização
+        unique_contributors = set()
+        for contributors in self.contributors.values():
+            unique_contributors |= contributors
+        development["active_contributors"] = len(unique_contributors)
+        
+        self.metrics["quality"]["failed_workflows"] = sorted(
+            failed_workflows, key=lambda w: w["date"] or "", reverse=True
+        )
+        
+        # Alertas de segurança por repositório e totais
+        security_by_repo = {
+            name: alerts for name, alerts in self.security.by_repository().items()
+            if name in repos
+        }
+        for repo_name, repo_metrics in repos.items():
+            repo_metrics["security"] = security_by_repo.get(repo_name, {})
+        self.metrics["security"] = self.security.totals(security_by_repo)
+        
+        # Workflows mais lentos e instáveis da organização
+        self.metrics["quality"]["slowest_workflows"] = [
+            w for w in self.workflow_analytics.slowest_workflows(limit=len(repos) + 10)
+            if w["repo"] in repos
+        ][:10]
+        self.metrics["quality"]["flaky_workflows"] = [
+            w for w in self.workflow_analytics.flaky_workflows() if w["repo"] in repos
+        ]
+    
     def _get_repositories(self) -> List[Dict]:
         """Obter todos os repositórios da organização."""
         repos = []
@@ -126,23 +238,7 @@ class OrganizationDashboard:
         """Analisa um repositório individual."""
         repo_name = repo["name"]
         
-        # Métricas básicas
         language = repo.get("language")
-        if language:
-            self.metrics["organization"]["languages"][language] = \
-                self.metrics["organization"]["languages"].get(language, 0) + 1
-        
-        # Visibilidade
-        if repo.get("private"):
-            self.metrics["organization"]["visibility"]["private"] += 1
-        else:
-            self.metrics["organization"]["visibility"]["public"] += 1
-        
-        # Topics
-        topics = repo.get("topics", [])
-        for topic in topics:
-            self.metrics["organization"]["topics"][topic] = \
-                self.metrics["organization"]["topics"].get(topic, 0) + 1
         
         # Análise detalhada do repositório
         repo_metrics = {
@@ -153,6 +249,8 @@ class OrganizationDashboard:
             "forks": repo.get("forks_count", 0),
             "issues": repo.get("open_issues_count", 0),
             "last_push": repo.get("pushed_at", ""),
+            "private": repo.get("private", False),
+            "topics": repo.get("topics", []),
             "workflows": {},
             "security": {},
             "compliance": {}
@@ -161,12 +259,16 @@ class OrganizationDashboard:
         # Analisar workflows
         self._analyze_repository_workflows(repo_name, repo_metrics)
         
-        # Analisar atividade recente
-        self._analyze_repository_activity(repo_name, repo_metrics)
-        
         # Verificar compliance
         self._check_repository_compliance(repo_name, repo_metrics)
         
+        # Preservar atividade anterior até a próxima coleta em lote
+        previous = self.metrics["repositories"].get(repo_name, {})
+        for key in ("commits_last_week", "prs_last_week", "issues_last_week",
+                    "active_contributors", "avg_pr_time_hours"):
+            if key in previous:
+                repo_metrics[key] = previous[key]
+        
         self.metrics["repositories"][repo_name] = repo_metrics
     
     def _analyze_repository_workflows(self, repo_name: str, repo_metrics: Dict) -> None:
@@ -181,120 +283,60 @@ class OrganizationDashboard:
                 repo_metrics["workflows"]["total"] = len(workflows)
                 repo_metrics["workflows"]["active"] = len([w for w in workflows if w.get("state") == "active"])
                 
-                # Analisar execuções recentes
-                runs_url = f"https://api.github.com/repos/{self.org_name}/{repo_name}/actions/runs"
-                runs_resp = requests.get(
-                    runs_url, 
-                    headers=HEADERS, 
-                    params={"per_page": 50},
-                    timeout=30
-                )
+                # Ingerir apenas execuções novas desde o último run visto
+                self.workflow_analytics.ingest_repository(repo_name)
+                summary = self.workflow_analytics.repo_summary(repo_name)
+                
+                if summary["success_rate"] is not None:
+                    repo_metrics["workflows"]["success_rate"] = summary["success_rate"]
                 
-                if runs_resp.ok:
-                    runs = runs_resp.json().get("workflow_runs", [])
-                    if runs:
-                        success_count = len([r for r in runs if r.get("conclusion") == "success"])
-                        repo_metrics["workflows"]["success_rate"] = round(
-                            (success_count / len(runs)) * 100, 1
-                        )
-                        
-                        # Workflows falhando
-                        failed_runs = [r for r in runs if r.get("conclusion") == "failure"]
-                        if failed_runs:
-                            self.metrics["quality"]["failed_workflows"].extend([
-                                {
-                                    "repo": repo_name,
-                                    "workflow": run.get("name"),
-                                    "date": run.get("created_at"),
-                                    "url": run.get("html_url")
-                                }
-                                for run in failed_runs[:3]  # Últimas 3 falhas
-                            ])
+                repo_metrics["workflows"]["runs"] = {
+                    w["workflow"]: {
+                        "duration_p50": w["duration_p50"],
+                        "duration_p95": w["duration_p95"],
+                        "queue_p95": w["queue_p95"],
+                        "failure_rate": w["failure_rate"],
+                        "flaky": w["flaky"]
+                    }
+                    for w in summary["workflows"]
+                }
+                
+                # Workflows falhando
+                repo_metrics["workflows"]["recent_failures"] = []
+                for workflow in summary["workflows"]:
+                    repo_metrics["workflows"]["recent_failures"].extend([
+                        {
+                            "repo": repo_name,
+                            "workflow": workflow["workflow"],
+                            "date": failure["date"],
+                            "url": failure["url"]
+                        }
+                        for failure in workflow["recent_failures"]  # Últimas 3 falhas
+                    ])
                     
         except Exception as e:
             logger.warning(f"Erro ao analisar workflows de {repo_name}: {e}")
     
-    def _analyze_repository_activity(self, repo_name: str, repo_metrics: Dict) -> None:
-        """Analisa atividade recente do repositório."""
-        try:
-            # Data de uma semana atrás
-            week_ago = (datetime.now() - timedelta(days=7)).isoformat()
-            
-            # Commits da última semana
-            commits_url = f"https://api.github.com/repos/{self.org_name}/{repo_name}/commits"
-            commits_resp = requests.get(
-                commits_url,
-                headers=HEADERS,
-                params={"since": week_ago, "per_page": 100},
-                timeout=30
-            )
-            
-            if commits_resp.ok:
-                commits = commits_resp.json()
-                repo_metrics["commits_last_week"] = len(commits)
-                self.metrics["development"]["commits_last_week"] += len(commits)
-                
-                # Contribuidores únicos
-                contributors = set(
-                    commit.get("author", {}).get("login", "unknown")
-                    for commit in commits
-                    if commit.get("author")
-                )
-                repo_metrics["active_contributors"] = len(contributors)
-            
-            # PRs da última semana
-            prs_url = f"https://api.github.com/repos/{self.org_name}/{repo_name}/pulls"
-            prs_resp = requests.get(
-                prs_url,
-                headers=HEADERS,
-                params={"state": "all", "since": week_ago},
-                timeout=30
-            )
-            
-            if prs_resp.ok:
-                prs = prs_resp.json()
-                recent_prs = [
-                    pr for pr in prs
-                    if datetime.fromisoformat(pr["created_at"].replace("Z", "+00:00")) > 
-                       datetime.fromisoformat(week_ago.replace("Z", "+00:00"))
-                ]
-                repo_metrics["prs_last_week"] = len(recent_prs)
-                self.metrics["development"]["prs_last_week"] += len(recent_prs)
-                
-                # Tempo médio de PR
-                merged_prs = [pr for pr in recent_prs if pr.get("merged_at")]
-                if merged_prs:
-                    pr_times = []
-                    for pr in merged_prs:
-                        created = datetime.fromisoformat(pr["created_at"].replace("Z", "+00:00"))
-                        merged = datetime.fromisoformat(pr["merged_at"].replace("Z", "+00:00"))
-                        pr_times.append((merged - created).total_seconds() / 3600)  # em horas
-                    
-                    repo_metrics["avg_pr_time_hours"] = round(statistics.mean(pr_times), 1)
+    def _collect_activity(self, repo_names: List[str]) -> None:
+        """Coleta atividade recente de todos os repositórios via GraphQL."""
+        collector = OrganizationActivityCollector(self.org_name, GRAPHQL_HEADERS)
+        activity = collector.collect(repo_names)
+        
+        for repo_name, repo_activity in activity.items():
+            repo_metrics = self.metrics["repositories"].get(repo_name)
+            if repo_metrics is None:
+                continue
             
-            # Issues da última semana
-            issues_url = f"https://api.github.com/repos/{self.org_name}/{repo_name}/issues"
-            issues_resp = requests.get(
-                issues_url,
-                headers=HEADERS,
-                params={"since": week_ago, "per_page": 100},
-                timeout=30
-            )
+            repo_metrics["commits_last_week"] = repo_activity["commits_last_week"]
+            repo_metrics["prs_last_week"] = repo_activity["prs_last_week"]
+            repo_metrics["issues_last_week"] = repo_activity["issues_last_week"]
+            repo_metrics["active_contributors"] = len(repo_activity["contributors"])
+            if "avg_pr_time_hours" in repo_activity:
+                repo_metrics["avg_pr_time_hours"] = repo_activity["avg_pr_time_hours"]
+            else:
+                repo_metrics.pop("avg_pr_time_hours", None)
             
-            if issues_resp.ok:
-                issues = issues_resp.json()
-                # Filtrar apenas issues (não PRs)
-                recent_issues = [
-                    issue for issue in issues
-                    if not issue.get("pull_request") and
-                    datetime.fromisoformat(issue["created_at"].replace("Z", "+00:00")) > 
-                    datetime.fromisoformat(week_ago.replace("Z", "+00:00"))
-                ]
-                repo_metrics["issues_last_week"] = len(recent_issues)
-                self.metrics["development"]["issues_last_week"] += len(recent_issues)
-                
-        except Exception as e:
-            logger.warning(f"Erro ao analisar atividade de {repo_name}: {e}")
+            self.contributors[repo_name] = repo_activity["contributors"]
     
     def _check_repository_compliance(self, repo_name: str, repo_metrics: Dict) -> None:
         """Verifica compliance do repositório."""
@@ -391,16 +433,6 @@ class OrganizationDashboard:
                 statistics.mean(workflow_rates), 1
             )
         
-        # Contribuidores ativos únicos
-        all_contributors = set()
-        for repo in repos:
-            contributors = repo.get("active_contributors", 0)
-            if contributors > 0:
-                # Simplificação: assumindo que cada repo tem contribuidores únicos
-                all_contributors.add(f"repo_{repo['name']}_contributors")
-        
-        self.metrics["development"]["active_contributors"] = len(repos)  # Aproximação
-        
         # Tempo médio de PR
         pr_times = [
             repo.get("avg_pr_time_hours", 0)
@@ -410,252 +442,19 @@ class OrganizationDashboard:
         if pr_times:
             self.metrics["development"]["avg_pr_time"] = round(statistics.mean(pr_times), 1)
     
+    def update_kpis(self) -> None:
+        """Alimenta o motor de KPIs e anexa o snapshot atual às métricas."""
+        try:
+            self.kpi_engine.record_dashboard(self.metrics)
+            self.metrics["kpis"] = self.kpi_engine.snapshot()
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar KPIs: {e}")
+    
     def generate_dashboard_html(self) -> str:
         """Gera dashboard em HTML."""
-        html_template = """
-        <!DOCTYPE html>
-        <html lang="pt-BR">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>📊 Dashboard - {org_name}</title>
-            <style>
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    margin: 0;
-                    padding: 20px;
-                    background: #f6f8fa;
-                }}
-                .dashboard {{
-                    max-width: 1200px;
-                    margin: 0 auto;
-                }}
-                .header {{
-                    text-align: center;
-                    margin-bottom: 30px;
-                }}
-                .metrics-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-                    gap: 20px;
-                    margin-bottom: 30px;
-                }}
-                .metric-card {{
-                    background: white;
-                    border-radius: 8px;
-                    padding: 20px;
-                    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-                }}
-                .metric-card h3 {{
-                    margin: 0 0 15px 0;
-                    color: #1f2328;
-                }}
-                .big-number {{
-                    font-size: 2.5em;
-                    font-weight: bold;
-                    color: #0969da;
-                    margin: 10px 0;
-                }}
-                .status-good {{ color: #1a7f37; }}
-                .status-warning {{ color: #bf8700; }}
-                .status-critical {{ color: #cf222e; }}
-                .repo-list {{
-                    max-height: 300px;
-                    overflow-y: auto;
-                }}
-                .repo-item {{
-                    display: flex;
-                    justify-content: space-between;
-                    align-items: center;
-                    padding: 8px 0;
-                    border-bottom: 1px solid #eee;
-                }}
-                .chart {{
-                    margin: 20px 0;
-                }}
-                .progress-bar {{
-                    width: 100%;
-                    height: 20px;
-                    background: #eee;
-                    border-radius: 10px;
-                    overflow: hidden;
-                    margin: 10px 0;
-                }}
-                .progress-fill {{
-                    height: 100%;
-                    background: linear-gradient(90deg, #1a7f37, #26a641);
-                }}
-                .timestamp {{
-                    text-align: center;
-                    color: #656d76;
-                    font-size: 0.9em;
-                    margin-top: 30px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="dashboard">
-                <div class="header">
-                    <h1>📊 Dashboard Organizacional</h1>
-                    <h2>{org_name}</h2>
-                </div>
-                
-                <div class="metrics-grid">
-                    <div class="metric-card">
-                        <h3>🏢 Visão Geral</h3>
-                        <div class="big-number">{total_repos}</div>
-                        <p>Repositórios Ativos</p>
-                        <p>📊 Públicos: {public_repos} | Privados: {private_repos}</p>
-                    </div>
-                    
-                    <div class="metric-card">
-                        <h3>🔄 Automação</h3>
-                        <div class="big-number {compliance_status}">{compliance_rate}%</div>
-                        <p>Taxa de Conformidade</p>
-                        <div class="progress-bar">
-                            <div class="progress-fill" style="width: {compliance_rate}%"></div>
-                        </div>
-                    </div>
-                    
-                    <div class="metric-card">
-                        <h3>👨‍💻 Desenvolvimento</h3>
-                        <div class="big-number">{commits_week}</div>
-                        <p>Commits (última semana)</p>
-                        <p>📋 PRs: {prs_week} | 🐛 Issues: {issues_week}</p>
-                    </div>
-                    
-                    <div class="metric-card">
-                        <h3>✅ Qualidade</h3>
-                        <div class="big-number {workflow_status}">{workflow_success}%</div>
-                        <p>Taxa de Sucesso Workflows</p>
-                        <p>⏱️ Tempo médio PR: {avg_pr_time}h</p>
-                    </div>
-                </div>
-                
-                <div class="metrics-grid">
-                    <div class="metric-card">
-                        <h3>🔧 Linguagens Principais</h3>
-                        <div class="chart">
-                            {languages_chart}
-                        </div>
-                    </div>
-                    
-                    <div class="metric-card">
-                        <h3>📊 Repositórios por Compliance</h3>
-                        <div class="repo-list">
-                            {compliance_list}
-                        </div>
-                    </div>
-                </div>
-                
-                {failed_workflows_section}
-                
-                <div class="timestamp">
-                    <p>📅 Última atualização: {timestamp}</p>
-                    <p>🤖 Gerado automaticamente pelo sistema de automação arturdr-org</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Determinar status de compliance
-        compliance_rate = self.metrics["automation"]["compliance_rate"]
-        if compliance_rate >= 80:
-            compliance_status = "status-good"
-        elif compliance_rate >= 60:
-            compliance_status = "status-warning"
-        else:
-            compliance_status = "status-critical"
-        
-        # Determinar status de workflows
-        workflow_success = self.metrics["quality"]["workflow_success_rate"]
-        if workflow_success >= 80:
-            workflow_status = "status-good"
-        elif workflow_success >= 60:
-            workflow_status = "status-warning"
-        else:
-            workflow_status = "status-critical"
-        
-        # Gerar gráfico de linguagens
-        languages = self.metrics["organization"]["languages"]
-        languages_chart = ""
-        for lang, count in sorted(languages.items(), key=lambda x: x[1], reverse=True)[:5]:
-            percentage = (count / self.metrics["organization"]["total_repos"]) * 100
-            languages_chart += f"""
-                <div style="margin: 5px 0;">
-                    <span style="display: inline-block; width: 100px;">{lang}</span>
-                    <div style="display: inline-block; width: 150px; background: #eee; border-radius: 3px;">
-                        <div style="width: {percentage}%; height: 20px; background: #0969da; border-radius: 3px;"></div>
-                    </div>
-                    <span style="margin-left: 10px;">{count}</span>
-                </div>
-            """
-        
-        # Gerar lista de compliance
-        compliance_list = ""
-        repos_by_compliance = sorted(
-            self.metrics["repositories"].items(),
-            key=lambda x: x[1].get("compliance", {}).get("score", 0),
-            reverse=True
-        )
-        
-        for repo_name, repo_data in repos_by_compliance[:10]:
-            score = repo_data.get("compliance", {}).get("score", 0)
-            if score >= 80:
-                status_class = "status-good"
-            elif score >= 60:
-                status_class = "status-warning"
-            else:
-                status_class = "status-critical"
-                
-            compliance_list += f"""
-                <div class="repo-item">
-                    <span>{repo_name}</span>
-                    <span class="{status_class}">{score}%</span>
-                </div>
-            """
-        
-        # Seção de workflows falhando
-        failed_workflows_section = ""
-        if self.metrics["quality"]["failed_workflows"]:
-            failed_workflows_section = """
-                <div class="metric-card">
-                    <h3>⚠️ Workflows com Falhas Recentes</h3>
-                    <div class="repo-list">
-            """
-            
-            for workflow in self.metrics["quality"]["failed_workflows"][:10]:
-                failed_workflows_section += f"""
-                    <div class="repo-item">
-                        <div>
-                            <strong>{workflow['repo']}</strong><br>
-                            <small>{workflow['workflow']}</small>
-                        </div>
-                        <small>{workflow['date'][:10]}</small>
-                    </div>
-                """
-            
-            failed_workflows_section += "</div></div>"
-        
-        return html_template.format(
-            org_name=self.org_name,
-            total_repos=self.metrics["organization"]["total_repos"],
-            public_repos=self.metrics["organization"]["visibility"]["public"],
-            private_repos=self.metrics["organization"]["visibility"]["private"],
-            compliance_rate=compliance_rate,
-            compliance_status=compliance_status,
-            commits_week=self.metrics["development"]["commits_last_week"],
-            prs_week=self.metrics["development"]["prs_last_week"],
-            issues_week=self.metrics["development"]["issues_last_week"],
-            workflow_success=workflow_success,
-            workflow_status=workflow_status,
-            avg_pr_time=self.metrics["development"]["avg_pr_time"],
-            languages_chart=languages_chart,
-            compliance_list=compliance_list,
-            failed_workflows_section=failed_workflows_section,
-            timestamp=datetime.fromisoformat(self.metrics["timestamp"]).strftime("%d/%m/%Y %H:%M:%S")
-        )
+        buffer = io.StringIO()
+        DashboardRenderer(self.metrics).render(buffer)
+        return buffer.getvalue()
     
     def save_dashboard(self) -> str:
         """Salva dashboard e métricas."""
@@ -668,9 +467,7 @@ class OrganizationDashboard:
         
         # Salvar dashboard HTML
         html_file = f"dashboard_{timestamp}.html"
-        html_content = self.generate_dashboard_html()
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        DashboardRenderer(self.metrics).render_to_file(html_file)
         
         logger.info(f"📊 Dashboard salvo: {html_file}")
         logger.info(f"📊 Métricas salvas: {json_file}")
@@ -683,6 +480,7 @@ class OrganizationDashboard:
         
         self.collect_organization_metrics()
         self.calculate_summary_metrics()
+        self.update_kpis()
         
         # Salvar dashboard
         dashboard_file = self.save_dashboard()
@@ -695,6 +493,8 @@ class OrganizationDashboard:
         print(f"📁 Repositórios: {self.metrics['organization']['total_repos']}")
         print(f"🔄 Compliance: {self.metrics['automation']['compliance_rate']}%")
         print(f"✅ Workflows: {self.metrics['quality']['workflow_success_rate']}%")
+        print(f"🐢 Workflows lentos (p95): {len(self.metrics['quality']['slowest_workflows'])}")
+        print(f"🎲 Workflows instáveis: {len(self.metrics['quality']['flaky_workflows'])}")
         print(f"💻 Commits (7d): {self.metrics['development']['commits_last_week']}")
         print(f"📋 PRs (7d): {self.metrics['development']['prs_last_week']}")
         print(f"🐛 Issues (7d): {self.metrics['development']['issues_last_week']}")
@@ -704,7 +504,23 @@ class OrganizationDashboard:
 
 def main():
     """Função principal."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Dashboard organizacional")
+    parser.add_argument("mode", nargs="?", choices=["run", "serve"], default="run",
+                        help="run: gera o dashboard uma vez; serve: servidor com atualização em background")
+    parser.add_argument("--host", default=os.getenv("DASHBOARD_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("DASHBOARD_PORT", "8080")))
+    parser.add_argument("--refresh-interval", type=int, default=300,
+                        help="Segundos entre ciclos de atualização (modo serve)")
+    args = parser.parse_args()
+    
     try:
+        if args.mode == "serve":
+            from core.monitoring.server import serve
+            serve(args.host, args.port, args.refresh_interval)
+            return
+        
         dashboard = OrganizationDashboard()
         dashboard.run()
     except Exception as e:
@@ -5,6 +5,7 @@ Verifica o status da automação e gera relatórios de saúde.
 """
 
 import os
+import sys
 import json
 import requests
 import yaml
@@ -13,6 +14,11 @@ from pathlib import Path
 from typing import Dict, List, Any
 import logging
 
+# Raiz do repositório no path: permite executar este arquivo diretamente
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from core.monitoring.workflow_analytics import WorkflowAnalyticsCollector
+from shared.utils.kpi_engine import KPIEngine
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -212,51 +218,38 @@ class OrganizationHealthMonitor:
         }
         
         try:
-            # Verificar execuções recentes do workflow
-            runs_url = f"https://api.github.com/repos/{self.org_name}/org-automation/actions/runs"
-            runs_resp = requests.get(
-                runs_url, 
-                headers=HEADERS,
-                params={"per_page": 10},
-                timeout=30
-            )
+            # Ingerir execuções novas e avaliar toda a janela de análise
+            analytics = WorkflowAnalyticsCollector(self.org_name, HEADERS)
+            analytics.ingest_repository("org-automation")
+            analytics.save_state()
+            summary = analytics.repo_summary("org-automation")
             
-            if runs_resp.ok:
-                runs_data = runs_resp.json()
-                workflow_runs = runs_data.get("workflow_runs", [])
+            if summary["success_rate"] is not None:
+                workflow_health["last_run"] = summary["last_run"]
+                workflow_health["success_rate"] = summary["success_rate"]
+                
+                # Encontrar falhas recentes
+                failures = sorted(
+                    (failure for w in summary["workflows"] for failure in w["recent_failures"]),
+                    key=lambda failure: failure["date"] or "",
+                    reverse=True
+                )
+                workflow_health["recent_failures"] = failures[:3]
+                workflow_health["slowest"] = [
+                    {"workflow": w["workflow"], "duration_p95": w["duration_p95"]}
+                    for w in sorted(summary["workflows"], key=lambda w: w["duration_p95"] or 0, reverse=True)[:3]
+                ]
+                workflow_health["flaky"] = [w["workflow"] for w in summary["workflows"] if w["flaky"]]
                 
-                if workflow_runs:
-                    latest_run = workflow_runs[0]
-                    workflow_health["last_run"] = {
-                        "date": latest_run["created_at"],
-                        "status": latest_run["conclusion"],
-                        "url": latest_run["html_url"]
-                    }
-                    
-                    # Calcular taxa de sucesso
-                    success_count = sum(1 for run in workflow_runs if run["conclusion"] == "success")
-                    workflow_health["success_rate"] = round((success_count / len(workflow_runs)) * 100, 1)
-                    
-                    # Encontrar falhas recentes
-                    failures = [run for run in workflow_runs if run["conclusion"] in ["failure", "cancelled"]]
-                    workflow_health["recent_failures"] = [
-                        {
-                            "date": run["created_at"],
-                            "status": run["conclusion"],
-                            "url": run["html_url"]
-                        }
-                        for run in failures[:3]
-                    ]
-                    
-                    # Determinar status geral
-                    if workflow_health["success_rate"] >= 80:
-                        workflow_health["status"] = "healthy"
-                    elif workflow_health["success_rate"] >= 60:
-                        workflow_health["status"] = "warning"
-                    else:
-                        workflow_health["status"] = "critical"
+                # Determinar status geral
+                if workflow_health["success_rate"] >= 80:
+                    workflow_health["status"] = "healthy"
+                elif workflow_health["success_rate"] >= 60:
+                    workflow_health["status"] = "warning"
                 else:
-                    workflow_health["status"] = "no_data"
+                    workflow_health["status"] = "critical"
+            else:
+                workflow_health["status"] = "no_data"
             
         except Exception as e:
             logger.error(f"Erro ao verificar saúde dos workflows: {e}")
@@ -338,6 +331,12 @@ class OrganizationHealthMonitor:
         else:
             self.health_status["overall_health"] = "critical"
         
+        # KPIs atualizados incrementalmente a partir deste resultado
+        try:
+            KPIEngine().record_health(self.health_status)
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar KPIs: {e}")
+        
         logger.info(f"✅ Health check concluído - Status geral: {self.health_status['overall_health']}")
     
     def generate_report(self) -> str:
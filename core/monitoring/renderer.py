@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Renderizador HTML em Streaming do Dashboard
+Usa um template pré-compilado em segmentos e escreve o HTML em blocos,
+incluindo a tabela completa de repositórios alimentada por uma ilha de dados
+JSON compacta com ordenação e paginação no navegador.
+"""
+
+import re
+import json
+import html
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Iterable, Optional, TextIO, Tuple, Union
+
+# Marcadores do template: {{ nome }}; chaves simples de CSS/JS ficam intactas
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Títulos das colunas da tabela de repositórios (ordem de _repo_rows)
+REPO_COLUMNS = [
+    "Repositório",
+    "Linguagem",
+    "Compliance %",
+    "Workflows %",
+    "Commits 7d",
+    "PRs 7d",
+    "Issues 7d",
+    "Stars",
+    "Último push",
+]
+
+# KPI -> (rótulo, unidade) exibidos no card de KPIs
+KPI_ROWS = [
+    ("system_health_score", "🏥 Health score", "%"),
+    ("success_rate_percent", "✅ Sucesso das execuções", "%"),
+    ("error_rate_percent", "❌ Taxa de erro", "%"),
+    ("workflow_success_rate", "🔄 Sucesso dos workflows", "%"),
+    ("disk_usage_percent", "💾 Uso de disco", "%"),
+    ("memory_usage_percent", "🧠 Uso de memória", "%"),
+    ("last_success_age_hours", "⏰ Última execução bem-sucedida", "h atrás"),
+]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>📊 Dashboard - {{ org_name }}</title>
+    <style>
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 0; padding: 20px; background: #f6f8fa; }
+        .dashboard { max-width: 1200px; margin: 0 auto; }
+        .header { text-align: center; margin-bottom: 30px; }
+        .metrics-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; margin-bottom: 30px; }
+        .metric-card { background: white; border-radius: 8px; padding: 20px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); margin-bottom: 20px; }
+        .metric-card h3 { margin: 0 0 15px 0; color: #1f2328; }
+        .big-number { font-size: 2.5em; font-weight: bold; color: #0969da; margin: 10px 0; }
+        .status-good { color: #1a7f37; }
+        .status-warning { color: #bf8700; }
+        .status-critical { color: #cf222e; }
+        .repo-list { max-height: 300px; overflow-y: auto; }
+        .repo-item { display: flex; justify-content: space-between; align-items: center; padding: 8px 0; border-bottom: 1px solid #eee; }
+        .chart { margin: 20px 0; }
+        .progress-bar { width: 100%; height: 20px; background: #eee; border-radius: 10px; overflow: hidden; margin: 10px 0; }
+        .progress-fill { height: 100%; background: linear-gradient(90deg, #1a7f37, #26a641); }
+        .repo-table { width: 100%; border-collapse: collapse; font-size: 0.9em; }
+        .repo-table th { text-align: left; cursor: pointer; user-select: none; border-bottom: 2px solid #d0d7de; padding: 6px; }
+        .repo-table td { border-bottom: 1px solid #eee; padding: 6px; }
+        .table-controls { display: flex; gap: 10px; align-items: center; margin-bottom: 10px; }
+        .timestamp { text-align: center; color: #656d76; font-size: 0.9em; margin-top: 30px; }
+    </style>
+</head>
+<body>
+    <div class="dashboard">
+        <div class="header">
+            <h1>📊 Dashboard Organizacional</h1>
+            <h2>{{ org_name }}</h2>
+        </div>
+
+        <div class="metrics-grid">
+            <div class="metric-card">
+                <h3>🏢 Visão Geral</h3>
+                <div class="big-number">{{ total_repos }}</div>
+                <p>Repositórios Ativos</p>
+                <p>📊 Públicos: {{ public_repos }} | Privados: {{ private_repos }}</p>
+            </div>
+
+            <div class="metric-card">
+                <h3>🔄 Automação</h3>
+                <div class="big-number {{ compliance_status }}">{{ compliance_rate }}%</div>
+                <p>Taxa de Conformidade</p>
+                <div class="progress-bar">
+                    <div class="progress-fill" style="width: {{ compliance_rate }}%"></div>
+                </div>
+            </div>
+
+            <div class="metric-card">
+                <h3>👨‍💻 Desenvolvimento</h3>
+                <div class="big-number">{{ commits_week }}</div>
+                <p>Commits (última semana)</p>
+                <p>📋 PRs: {{ prs_week }} | 🐛 Issues: {{ issues_week }}</p>
+            </div>
+
+            <div class="metric-card">
+                <h3>✅ Qualidade</h3>
+                <div class="big-number {{ workflow_status }}">{{ workflow_success }}%</div>
+                <p>Taxa de Sucesso Workflows</p>
+                <p>⏱️ Tempo médio PR: {{ avg_pr_time }}h</p>
+            </div>
+
+            <div class="metric-card">
+                <h3>🛡️ Segurança</h3>
+                <div class="big-number {{ security_status }}">{{ critical_high }}</div>
+                <p>Vulnerabilidades críticas/altas abertas</p>
+                <p>🔑 Secrets: {{ secret_alerts }} | 📦 Dependabot: {{ dependency_alerts }}</p>
+            </div>
+        </div>
+
+        <div class="metrics-grid">
+            <div class="metric-card">
+                <h3>🔧 Linguagens Principais</h3>
+                <div class="chart">{{ languages_chart }}</div>
+            </div>
+
+            <div class="metric-card">
+                <h3>📊 Repositórios por Compliance</h3>
+                <div class="repo-list">{{ compliance_list }}</div>
+            </div>
+        </div>
+
+        {{ kpis_section }}
+        {{ failed_workflows_section }}
+        {{ slow_workflows_section }}
+
+        <div class="metric-card">
+            <h3>📁 Todos os Repositórios</h3>
+            <div class="table-controls">
+                <input id="repo-filter" type="search" placeholder="Filtrar repositórios...">
+                <button id="repo-prev">◀</button>
+                <span id="repo-page"></span>
+                <button id="repo-next">▶</button>
+            </div>
+            <table class="repo-table">
+                <thead><tr id="repo-head"></tr></thead>
+                <tbody id="repo-body"></tbody>
+            </table>
+        </div>
+
+        <div class="timestamp">
+            <p>📅 Última atualização: {{ timestamp }}</p>
+            <p>🤖 Gerado automaticamente pelo sistema de automação arturdr-org</p>
+        </div>
+    </div>
+
+    <script type="application/json" id="repo-data">{{ repo_data }}</script>
+    <script>
+    (function () {
+        var data = JSON.parse(document.getElementById("repo-data").textContent);
+        var columns = data.columns, rows = data.rows, pageSize = data.page_size;
+        var view = rows, page = 0, sortCol = 2, sortDir = -1;
+        var head = document.getElementById("repo-head");
+        var body = document.getElementById("repo-body");
+        var label = document.getElementById("repo-page");
+
+        function compare(a, b) {
+            var x = a[sortCol], y = b[sortCol];
+            if (x === y) return 0;
+            if (x === null) return 1;
+            if (y === null) return -1;
+            return (x < y ? -1 : 1) * sortDir;
+        }
+
+        function draw() {
+            var pages = Math.max(1, Math.ceil(view.length / pageSize));
+            page = Math.min(Math.max(page, 0), pages - 1);
+            var frag = document.createDocumentFragment();
+            view.slice(page * pageSize, (page + 1) * pageSize).forEach(function (row) {
+                var tr = document.createElement("tr");
+                row.forEach(function (value) {
+                    var td = document.createElement("td");
+                    td.textContent = value === null ? "-" : value;
+                    tr.appendChild(td);
+                });
+                frag.appendChild(tr);
+            });
+            body.replaceChildren(frag);
+            label.textContent = (page + 1) + " / " + pages + " (" + view.length + ")";
+        }
+
+        columns.forEach(function (col, idx) {
+            var th = document.createElement("th");
+            th.textContent = col;
+            th.onclick = function () {
+                sortDir = sortCol === idx ? -sortDir : 1;
+                sortCol = idx;
+                view.sort(compare);
+                draw();
+            };
+            head.appendChild(th);
+        });
+
+        document.getElementById("repo-filter").oninput = function (e) {
+            var term = e.target.value.toLowerCase();
+            view = rows.filter(function (row) { return String(row[0]).toLowerCase().indexOf(term) !== -1; });
+            view.sort(compare);
+            page = 0;
+            draw();
+        };
+        document.getElementById("repo-prev").onclick = function () { page--; draw(); };
+        document.getElementById("repo-next").onclick = function () { page++; draw(); };
+
+        view = rows.slice().sort(compare);
+        draw();
+    })();
+    </script>
+</body>
+</html>
+"""
+
+
+def compile_template(template: str) -> List[Tuple[str, Optional[str]]]:
+    """Pré-compila o template em pares (texto literal, nome do campo)."""
+    segments: List[Tuple[str, Optional[str]]] = []
+    position = 0
+    for match in _PLACEHOLDER.finditer(template):
+        segments.append((template[position:match.start()], match.group(1)))
+        position = match.end()
+    segments.append((template[position:], None))
+    return segments
+
+
+# Compilado uma única vez na importação do módulo
+COMPILED_PAGE = compile_template(PAGE_TEMPLATE)
+
+
+def _status_class(value: float) -> str:
+    if value >= 80:
+        return "status-good"
+    elif value >= 60:
+        return "status-warning"
+    return "status-critical"
+
+
+def _json_island(value: Any) -> str:
+    """Serializa JSON compacto seguro para embutir em <script>."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c")
+
+
+class DashboardRenderer:
+    """Renderiza as métricas do dashboard em blocos de texto."""
+
+    def __init__(self, metrics: Dict[str, Any], page_size: int = 50):
+        self.metrics = metrics
+        self.page_size = page_size
+
+    # ------------------------------------------------------------------
+    # Seções
+    # ------------------------------------------------------------------
+
+    def _languages_chart(self) -> Iterator[str]:
+        languages = self.metrics["organization"]["languages"]
+        total = self.metrics["organization"]["total_repos"] or 1
+        for lang, count in sorted(languages.items(), key=lambda x: x[1], reverse=True)[:5]:
+            percentage = (count / total) * 100
+            yield (
+                '<div style="margin: 5px 0;">'
+                f'<span style="display: inline-block; width: 100px;">{html.escape(lang)}</span>'
+                '<div style="display: inline-block; width: 150px; background: #eee; border-radius: 3px;">'
+                f'<div style="width: {percentage:.1f}%; height: 20px; background: #0969da; border-radius: 3px;"></div>'
+                f'</div><span style="margin-left: 10px;">{count}</span></div>\n'
+            )
+
+    def _compliance_list(self) -> Iterator[str]:
+        repos_by_compliance = sorted(
+            self.metrics["repositories"].items(),
+            key=lambda x: x[1].get("compliance", {}).get("score", 0),
+            reverse=True
+        )
+        for repo_name, repo_data in repos_by_compliance[:10]:
+            score = repo_data.get("compliance", {}).get("score", 0)
+            yield (
+                f'<div class="repo-item"><span>{html.escape(repo_name)}</span>'
+                f'<span class="{_status_class(score)}">{score}%</span></div>\n'
+            )
+
+    def _kpis_section(self) -> Iterator[str]:
+        kpis = self.metrics.get("kpis")
+        if not kpis:
+            return
+        alerts = kpis.get("alerts", [])
+        yield '<div class="metric-card"><h3>🎯 KPIs Operacionais</h3><div class="repo-list">\n'
+        for name, label, unit in KPI_ROWS:
+            value = kpis.get(name)
+            flagged = any(alert.startswith(f"{name}:") for alert in alerts)
+            if value is None:
+                status, shown = "", "—"
+            else:
+                status, shown = ("status-critical" if flagged else "status-good"), f"{value}{unit}"
+            yield (
+                f'<div class="repo-item"><span>{label}</span>'
+                f'<span class="{status}">{shown}</span></div>\n'
+            )
+        yield '</div></div>\n'
+
+    def _failed_workflows_section(self) -> Iterator[str]:
+        failed = self.metrics["quality"]["failed_workflows"]
+        if not failed:
+            return
+        yield '<div class="metric-card"><h3>⚠️ Workflows com Falhas Recentes</h3><div class="repo-list">\n'
+        for workflow in failed[:10]:
+            yield (
+                '<div class="repo-item"><div>'
+                f'<strong>{html.escape(str(workflow["repo"]))}</strong><br>'
+                f'<small>{html.escape(str(workflow["workflow"]))}</small></div>'
+                f'<small>{html.escape(str(workflow["date"] or "")[:10])}</small></div>\n'
+            )
+        yield '</div></div>\n'
+
+    def _slow_workflows_section(self) -> Iterator[str]:
+        slowest = self.metrics["quality"].get("slowest_workflows", [])
+        flaky = {(w["repo"], w["workflow"]) for w in self.metrics["quality"].get("flaky_workflows", [])}
+        if not slowest:
+            return
+        yield '<div class="metric-card"><h3>🐢 Workflows Mais Lentos (p95)</h3><div class="repo-list">\n'
+        for workflow in slowest[:10]:
+            badge = " 🎲" if (workflow["repo"], workflow["workflow"]) in flaky else ""
+            yield (
+                '<div class="repo-item"><div>'
+                f'<strong>{html.escape(workflow["repo"])}</strong><br>'
+                f'<small>{html.escape(workflow["workflow"])}{badge}</small></div>'
+                f'<small>p50 {workflow["duration_p50"]}s | p95 {workflow["duration_p95"]}s</small></div>\n'
+            )
+        yield '</div></div>\n'
+
+    def _repo_rows(self) -> Iterator[List[Any]]:
+        for repo_name, repo in self.metrics["repositories"].items():
+            yield [
+                repo_name,
+                repo.get("language"),
+                repo.get("compliance", {}).get("score"),
+                repo.get("workflows", {}).get("success_rate"),
+                repo.get("commits_last_week", 0),
+                repo.get("prs_last_week", 0),
+                repo.get("issues_last_week", 0),
+                repo.get("stars", 0),
+                (repo.get("last_push") or "")[:10] or None,
+            ]
+
+    def _repo_data(self) -> Iterator[str]:
+        """Ilha de dados JSON escrita linha a linha."""
+        yield '{"columns":' + _json_island(REPO_COLUMNS)
+        yield ',"page_size":' + str(self.page_size) + ',"rows":['
+        for idx, row in enumerate(self._repo_rows()):
+            yield ("," if idx else "") + _json_island(row)
+        yield "]}"
+
+    # ------------------------------------------------------------------
+    # Renderização
+    # ------------------------------------------------------------------
+
+    def _context(self) -> Dict[str, Union[str, Iterable[str]]]:
+        metrics = self.metrics
+        compliance_rate = metrics["automation"]["compliance_rate"]
+        workflow_success = metrics["quality"]["workflow_success_rate"]
+        security = metrics["security"]
+        critical_high = security["vulnerabilities"]["critical"] + security["vulnerabilities"]["high"]
+
+        return {
+            "org_name": html.escape(metrics["organization"]["name"]),
+            "total_repos": metrics["organization"]["total_repos"],
+            "public_repos": metrics["organization"]["visibility"]["public"],
+            "private_repos": metrics["organization"]["visibility"]["private"],
+            "compliance_rate": compliance_rate,
+            "compliance_status": _status_class(compliance_rate),
+            "commits_week": metrics["development"]["commits_last_week"],
+            "prs_week": metrics["development"]["prs_last_week"],
+            "issues_week": metrics["development"]["issues_last_week"],
+            "workflow_success": workflow_success,
+            "workflow_status": _status_class(workflow_success),
+            "avg_pr_time": metrics["development"]["avg_pr_time"],
+            "critical_high": critical_high,
+            "security_status": "status-critical" if critical_high else "status-good",
+            "secret_alerts": security["secret_scanning_alerts"],
+            "dependency_alerts": security["dependency_alerts"],
+            "languages_chart": self._languages_chart(),
+            "compliance_list": self._compliance_list(),
+            "kpis_section": self._kpis_section(),
+            "failed_workflows_section": self._failed_workflows_section(),
+            "slow_workflows_section": self._slow_workflows_section(),
+            "repo_data": self._repo_data(),
+            "timestamp": datetime.fromisoformat(metrics["timestamp"]).strftime("%d/%m/%Y %H:%M:%S"),
+        }
+
+    def iter_chunks(self) -> Iterator[str]:
+        """Gera o HTML em blocos a partir do template pré-compilado."""
+        context = self._context()
+        for literal, field in COMPILED_PAGE:
+            yield literal
+            if field is None:
+                continue
+            value = context[field]
+            if isinstance(value, (str, int, float)):
+                yield str(value)
+            else:
+                yield from value
+
+    def render(self, stream: TextIO) -> None:
+        """Escreve o HTML no stream sem montar o documento em memória."""
+        stream.writelines(self.iter_chunks())
+
+    def render_to_file(self, path: str) -> None:
+        """Escreve o HTML diretamente no arquivo de saída."""
+        with open(path, 'w', encoding='utf-8', buffering=64 * 1024) as f:
+            self.render(f)
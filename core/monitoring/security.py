@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Agregação de Alertas de Segurança da Organização
+Usa os endpoints de nível de organização (Dependabot, code scanning e secret
+scanning) com paginação por cursor e sincronização incremental, agrupando os
+alertas em memória por repositório e severidade.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ["critical", "high", "medium", "low"]
+
+# Severidade genérica do code scanning quando não há security_severity_level
+CODE_SCANNING_SEVERITY = {"error": "high", "warning": "medium", "note": "low"}
+
+# Tipo de alerta -> (endpoint, estados considerados abertos)
+ALERT_SOURCES = {
+    "dependabot": ("dependabot/alerts", {"open"}),
+    "code_scanning": ("code-scanning/alerts", {"open"}),
+    "secret_scanning": ("secret-scanning/alerts", {"open"}),
+}
+
+DEFAULT_STATE_FILE = os.getenv("SECURITY_ALERTS_STATE", "security_alerts_state.json")
+
+
+class AlertsUnavailableError(Exception):
+    """Endpoint de alertas desabilitado ou sem permissão (403/404)."""
+
+
+def _alert_severity(kind: str, alert: Dict[str, Any]) -> Optional[str]:
+    """Normaliza a severidade do alerta para critical/high/medium/low."""
+    if kind == "dependabot":
+        advisory = alert.get("security_advisory") or {}
+        vulnerability = alert.get("security_vulnerability") or {}
+        severity = advisory.get("severity") or vulnerability.get("severity")
+    elif kind == "code_scanning":
+        rule = alert.get("rule") or {}
+        severity = rule.get("security_severity_level") or CODE_SCANNING_SEVERITY.get(rule.get("severity"))
+    else:
+        return None
+
+    severity = (severity or "").lower()
+    if severity == "moderate":
+        severity = "medium"
+    return severity if severity in SEVERITIES else "low"
+
+
+class OrganizationSecurityCollector:
+    """Coletor incremental de alertas de segurança de toda a organização."""
+
+    def __init__(
+        self,
+        org_name: str,
+        headers: Dict[str, str],
+        state_path: Optional[str] = None,
+        timeout: int = 30,
+    ):
+        self.org_name = org_name
+        self.headers = headers
+        self.state_path = Path(state_path or DEFAULT_STATE_FILE)
+        self.timeout = timeout
+        self.calls = 0
+        self.state = self._load_state()
+
+    # ------------------------------------------------------------------
+    # Persistência do estado
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"Erro ao carregar estado de alertas de segurança: {e}")
+        return {kind: {"synced_at": None, "alerts": {}} for kind in ALERT_SOURCES}
+
+    def save_state(self) -> None:
+        """Grava o estado de forma atômica."""
+        tmp_path = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    # ------------------------------------------------------------------
+    # Sincronização
+    # ------------------------------------------------------------------
+
+    def _iter_pages(self, url: str, params: Optional[Dict[str, Any]]):
+        """Percorre as páginas seguindo o cursor do header Link."""
+        while url:
+            self.calls += 1
+            resp = requests.get(url, headers=self.headers, params=params, timeout=self.timeout)
+            if resp.status_code in (403, 404):
+                # Recurso desabilitado ou sem permissão: a marca d'água não deve avançar
+                raise AlertsUnavailableError(f"{url}: {resp.status_code}")
+            resp.raise_for_status()
+            yield resp.json()
+
+            url = resp.links.get("next", {}).get("url")
+            params = None  # A URL do cursor já traz os parâmetros
+
+    def _sync_kind(self, kind: str) -> int:
+        endpoint, open_states = ALERT_SOURCES[kind]
+        kind_state = self.state.setdefault(kind, {"synced_at": None, "alerts": {}})
+        synced_at = kind_state["synced_at"]
+        started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        params: Dict[str, Any] = {"per_page": 100, "sort": "updated", "direction": "desc"}
+        if not synced_at:
+            # Primeira carga: apenas alertas abertos
+            params["state"] = "open"
+
+        url = f"https://api.github.com/orgs/{self.org_name}/{endpoint}"
+        changed = 0
+        for page in self._iter_pages(url, params):
+            reached_watermark = False
+            for alert in page:
+                updated_at = alert.get("updated_at") or alert.get("created_at") or ""
+                if synced_at and updated_at and updated_at < synced_at:
+                    # Ordenados por atualização: o restante já é conhecido
+                    reached_watermark = True
+                    break
+
+                repo = (alert.get("repository") or {}).get("name", "unknown")
+                key = f"{repo}#{alert.get('number')}"
+                kind_state["alerts"][key] = {
+                    "repo": repo,
+                    "severity": _alert_severity(kind, alert),
+                    "open": alert.get("state") in open_states
+                }
+                changed += 1
+
+            if reached_watermark:
+                break
+
+        # Alertas resolvidos não precisam ser mantidos
+        kind_state["alerts"] = {k: v for k, v in kind_state["alerts"].items() if v["open"]}
+        kind_state["synced_at"] = started_at
+        return changed
+
+    def sync(self) -> Dict[str, int]:
+        """Sincroniza todos os tipos de alerta desde a última execução.
+
+        Returns:
+            Quantidade de alertas novos/alterados por tipo.
+        """
+        changes = {}
+        for kind in ALERT_SOURCES:
+            try:
+                changes[kind] = self._sync_kind(kind)
+            except AlertsUnavailableError as e:
+                logger.warning(f"Alertas {kind} indisponíveis (dados não sincronizados): {e}")
+                changes[kind] = 0
+            except Exception as e:
+                logger.warning(f"Erro ao sincronizar alertas {kind}: {e}")
+                changes[kind] = 0
+
+        logger.info(f"🛡️ Alertas de segurança sincronizados em {self.calls} chamadas: {changes}")
+        return changes
+
+    # ------------------------------------------------------------------
+    # Agrupamento
+    # ------------------------------------------------------------------
+
+    def by_repository(self) -> Dict[str, Dict[str, Any]]:
+        """Alertas abertos agrupados por repositório e severidade."""
+        grouped: Dict[str, Dict[str, Any]] = {}
+        for kind in ALERT_SOURCES:
+            for alert in self.state.get(kind, {}).get("alerts", {}).values():
+                repo = grouped.setdefault(alert["repo"], {
+                    "dependabot": {severity: 0 for severity in SEVERITIES},
+                    "code_scanning": {severity: 0 for severity in SEVERITIES},
+                    "secret_scanning": 0
+                })
+                if kind == "secret_scanning":
+                    repo["secret_scanning"] += 1
+                else:
+                    repo[kind][alert["severity"]] += 1
+        return grouped
+
+    def totals(self, grouped: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Totais da organização no formato de ``metrics['security']``."""
+        grouped = grouped if grouped is not None else self.by_repository()
+        vulnerabilities = {severity: 0 for severity in SEVERITIES}
+        dependency_alerts = 0
+        secret_alerts = 0
+
+        for repo in grouped.values():
+            for severity in SEVERITIES:
+                vulnerabilities[severity] += repo["dependabot"][severity] + repo["code_scanning"][severity]
+            dependency_alerts += sum(repo["dependabot"].values())
+            secret_alerts += repo["secret_scanning"]
+
+        return {
+            "vulnerabilities": vulnerabilities,
+            "secret_scanning_alerts": secret_alerts,
+            "dependency_alerts": dependency_alerts
+        }
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Servidor do Dashboard com Atualização em Background
+Mantém o último snapshot de métricas em memória e o serve (HTML, JSON e
+formato Prometheus) sem nunca chamar a API do GitHub durante as requisições.
+Os repositórios são atualizados em background, priorizando os que receberam
+push desde a última coleta e os mais desatualizados.
+"""
+
+import io
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from core.monitoring.dashboard import OrganizationDashboard
+from core.monitoring.renderer import DashboardRenderer
+
+logger = logging.getLogger(__name__)
+
+# Limite de tamanho da linha de requisição + headers
+MAX_REQUEST_HEAD = 16 * 1024
+
+
+def _prometheus_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class DashboardSnapshot:
+    """Respostas pré-codificadas de uma versão das métricas."""
+
+    def __init__(self, html: bytes, metrics_json: bytes, prometheus: bytes, generated_at: float):
+        self.html = html
+        self.metrics_json = metrics_json
+        self.prometheus = prometheus
+        self.generated_at = generated_at
+
+
+class DashboardServer:
+    """Servidor HTTP asyncio que serve snapshots cacheados do dashboard."""
+
+    def __init__(
+        self,
+        dashboard: Optional[OrganizationDashboard] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        refresh_interval: int = 300,
+        batch_size: int = 50,
+        max_age: int = 6 * 3600,
+    ):
+        """
+        Args:
+            dashboard: Instância usada para coletar as métricas
+            host: Endereço de escuta
+            port: Porta de escuta
+            refresh_interval: Segundos entre ciclos de atualização
+            batch_size: Máximo de repositórios reanalisados por ciclo (o primeiro
+                ciclo coleta todos, para que os totais não reflitam um subconjunto)
+            max_age: Idade máxima (segundos) de um repositório sem push antes de reanalisar
+        """
+        self.dashboard = dashboard or OrganizationDashboard()
+        self.host = host
+        self.port = port
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.max_age = max_age
+
+        self.snapshot: Optional[DashboardSnapshot] = None
+        self.last_refreshed: Dict[str, float] = {}
+        self.last_pushed: Dict[str, str] = {}
+        self.stats = {
+            "refresh_cycles": 0,
+            "refresh_errors": 0,
+            "repos_refreshed": 0,
+            "last_refresh_duration": 0.0,
+            "http_requests": 0,
+        }
+        self._wakeup: Optional[asyncio.Event] = None
+
+    # ------------------------------------------------------------------
+    # Atualização em background
+    # ------------------------------------------------------------------
+
+    def select_repositories(self, repos: List[Dict], now: float,
+                            limit: Optional[int] = None) -> List[Dict]:
+        """Escolhe os repositórios a reanalisar neste ciclo.
+
+        Repositórios com push novo vêm primeiro; depois os mais antigos cuja
+        última análise passou de ``max_age``. ``limit`` padrão: ``batch_size``.
+        """
+        candidates: List[Tuple[int, float, Dict]] = []
+        for repo in repos:
+            name = repo["name"]
+            refreshed = self.last_refreshed.get(name)
+            pushed = repo.get("pushed_at") or ""
+
+            if refreshed is None or pushed != self.last_pushed.get(name):
+                candidates.append((0, refreshed or 0.0, repo))
+            elif now - refreshed >= self.max_age:
+                candidates.append((1, refreshed, repo))
+
+        candidates.sort(key=lambda c: (c[0], c[1]))
+        limit = self.batch_size if limit is None else limit
+        return [repo for _, _, repo in candidates[:limit]]
+
+    def _refresh_cycle(self) -> Optional[DashboardSnapshot]:
+        """Executa um ciclo de coleta (bloqueante, roda em thread)."""
+        start = time.time()
+        repos = self.dashboard._get_repositories()
+        if not repos:
+            return None
+
+        self.dashboard.prune_repositories([repo["name"] for repo in repos])
+        # Primeiro snapshot com a organização completa; depois, em lotes
+        selected = self.select_repositories(
+            repos, start, limit=len(repos) if self.snapshot is None else None
+        )
+        
+        # Sincronização incremental: poucas chamadas por ciclo
+        security_before = self.dashboard.metrics["security"]
+        self.dashboard.collect_security_metrics()
+        security_changed = self.dashboard.metrics["security"] != security_before
+
+        if selected:
+            logger.info(f"🔄 Atualizando {len(selected)} de {len(repos)} repositórios")
+            self.dashboard.refresh_repositories(selected)
+            self.dashboard.calculate_summary_metrics()
+            self.dashboard.update_kpis()
+            for repo in selected:
+                self.last_refreshed[repo["name"]] = start
+                self.last_pushed[repo["name"]] = repo.get("pushed_at") or ""
+            self.stats["repos_refreshed"] += len(selected)
+
+        self.stats["last_refresh_duration"] = round(time.time() - start, 3)
+        if selected or security_changed or self.snapshot is None:
+            return self.build_snapshot()
+        return None
+
+    def build_snapshot(self) -> DashboardSnapshot:
+        """Pré-renderiza todas as respostas a partir das métricas atuais."""
+        buffer = io.StringIO()
+        DashboardRenderer(self.dashboard.metrics).render(buffer)
+        metrics_json = json.dumps(self.dashboard.metrics, ensure_ascii=False, default=str)
+        return DashboardSnapshot(
+            html=buffer.getvalue().encode("utf-8"),
+            metrics_json=metrics_json.encode("utf-8"),
+            prometheus=self._render_prometheus().encode("utf-8"),
+            generated_at=time.time(),
+        )
+
+    def _prometheus_gauge(self, lines: List[str], name: str, help_text: str,
+                          samples: List[Tuple[str, Any]]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{{{labels}}} {value if value is not None else 'NaN'}")
+
+    def _render_prometheus(self) -> str:
+        """Métricas da organização, renderizadas junto com o snapshot."""
+        metrics = self.dashboard.metrics
+        base = f'org="{_prometheus_label(self.dashboard.org_name)}"'
+        lines: List[str] = []
+
+        def gauge(name: str, help_text: str, samples: List[Tuple[str, Any]]) -> None:
+            self._prometheus_gauge(lines, name, help_text, samples)
+
+        gauge("org_dashboard_repositories", "Repositórios ativos",
+              [(base, metrics["organization"]["total_repos"])])
+        gauge("org_dashboard_compliance_rate", "Taxa média de conformidade (%)",
+              [(base, metrics["automation"]["compliance_rate"])])
+        gauge("org_dashboard_workflow_success_rate", "Taxa média de sucesso dos workflows (%)",
+              [(base, metrics["quality"]["workflow_success_rate"])])
+        gauge("org_dashboard_commits_last_week", "Commits nos últimos 7 dias",
+              [(base, metrics["development"]["commits_last_week"])])
+        gauge("org_dashboard_prs_last_week", "PRs abertos nos últimos 7 dias",
+              [(base, metrics["development"]["prs_last_week"])])
+        gauge("org_dashboard_issues_last_week", "Issues abertas nos últimos 7 dias",
+              [(base, metrics["development"]["issues_last_week"])])
+        gauge("org_dashboard_active_contributors", "Contribuidores únicos nos últimos 7 dias",
+              [(base, metrics["development"]["active_contributors"])])
+        gauge("org_dashboard_security_vulnerabilities", "Alertas de vulnerabilidade abertos por severidade", [
+            (f'{base},severity="{severity}"', count)
+            for severity, count in metrics["security"]["vulnerabilities"].items()
+        ])
+        gauge("org_dashboard_secret_scanning_alerts", "Alertas de secret scanning abertos",
+              [(base, metrics["security"]["secret_scanning_alerts"])])
+        gauge("org_dashboard_dependency_alerts", "Alertas do Dependabot abertos",
+              [(base, metrics["security"]["dependency_alerts"])])
+        gauge("org_dashboard_repo_compliance_score", "Score de conformidade por repositório (%)", [
+            (f'{base},repo="{_prometheus_label(name)}"', repo.get("compliance", {}).get("score"))
+            for name, repo in metrics["repositories"].items()
+        ])
+        gauge("org_dashboard_workflow_duration_p95_seconds", "Duração p95 dos workflows mais lentos", [
+            (f'{base},repo="{_prometheus_label(w["repo"])}",workflow="{_prometheus_label(w["workflow"])}"',
+             w["duration_p95"])
+            for w in metrics["quality"].get("slowest_workflows", [])
+        ])
+        gauge("org_dashboard_snapshot_timestamp_seconds", "Momento da geração do snapshot",
+              [(base, round(time.time(), 3))])
+
+        return "\n".join(lines) + "\n"
+
+    def _render_server_counters(self) -> str:
+        """Contadores do próprio servidor, renderizados a cada requisição."""
+        base = f'org="{_prometheus_label(self.dashboard.org_name)}"'
+        lines: List[str] = []
+
+        def gauge(name: str, help_text: str, samples: List[Tuple[str, Any]]) -> None:
+            self._prometheus_gauge(lines, name, help_text, samples)
+
+        gauge("org_dashboard_refresh_duration_seconds", "Duração do último ciclo de atualização",
+              [(base, self.stats["last_refresh_duration"])])
+        gauge("org_dashboard_repos_refreshed_total", "Repositórios reanalisados desde o início",
+              [(base, self.stats["repos_refreshed"])])
+        gauge("org_dashboard_refresh_errors_total", "Ciclos de atualização com erro",
+              [(base, self.stats["refresh_errors"])])
+        gauge("org_dashboard_http_requests_total", "Requisições HTTP atendidas",
+              [(base, self.stats["http_requests"])])
+
+        return "\n".join(lines) + "\n"
+
+    async def refresh_loop(self) -> None:
+        """Atualiza o snapshot periodicamente sem bloquear o servidor."""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Limpar antes do ciclo: um POST /refresh durante o ciclo agenda o próximo
+            self._wakeup.clear()
+            try:
+                snapshot = await loop.run_in_executor(None, self._refresh_cycle)
+                if snapshot is not None:
+                    self.snapshot = snapshot
+                self.stats["refresh_cycles"] += 1
+            except Exception as e:
+                self.stats["refresh_errors"] += 1
+                logger.error(f"Erro no ciclo de atualização do dashboard: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _route(self, method: str, path: str) -> Tuple[str, str, bytes]:
+        path = path.split("?", 1)[0]
+
+        if path == "/refresh" and method == "POST":
+            if self._wakeup is not None:
+                self._wakeup.set()
+            return "202 Accepted", "application/json", b'{"status":"scheduled"}'
+
+        if method not in ("GET", "HEAD"):
+            return "405 Method Not Allowed", "text/plain; charset=utf-8", b"method not allowed\n"
+
+        if path == "/healthz":
+            return "200 OK", "text/plain; charset=utf-8", b"ok\n"
+
+        snapshot = self.snapshot
+        if snapshot is None:
+            return "503 Service Unavailable", "text/plain; charset=utf-8", b"snapshot not ready\n"
+
+        if path in ("/", "/index.html"):
+            return "200 OK", "text/html; charset=utf-8", snapshot.html
+        if path in ("/metrics.json", "/api/metrics"):
+            return "200 OK", "application/json", snapshot.metrics_json
+        if path == "/metrics":
+            counters = self._render_server_counters().encode("utf-8")
+            return "200 OK", "text/plain; version=0.0.4; charset=utf-8", snapshot.prometheus + counters
+
+        return "404 Not Found", "text/plain; charset=utf-8", b"not found\n"
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atende uma requisição HTTP/1.1 e fecha a conexão."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if len(head) > MAX_REQUEST_HEAD:
+                raise ValueError("request head too large")
+            method, path, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+            status, content_type, body = self._route(method, path)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            status, content_type, body, method = "400 Bad Request", "text/plain", b"bad request\n", "GET"
+
+        self.stats["http_requests"] += 1
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Cache-Control: no-cache\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+        )
+        if method != "HEAD":
+            writer.write(body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_forever(self) -> None:
+        """Inicia o servidor HTTP e o loop de atualização."""
+        self._wakeup = asyncio.Event()
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_REQUEST_HEAD
+        )
+        refresher = asyncio.ensure_future(self.refresh_loop())
+        logger.info(f"🌐 Dashboard disponível em http://{self.host}:{self.port}/")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, refresh_interval: int = 300) -> None:
+    """Executa o servidor do dashboard até ser interrompido."""
+    server = DashboardServer(host=host, port=port, refresh_interval=refresh_interval)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger.info(f"👋 Servidor do dashboard finalizado em {datetime.now().isoformat()}")
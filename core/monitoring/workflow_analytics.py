@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Analytics de Execuções de Workflows
+Ingere execuções do GitHub Actions de forma incremental (a partir de uma marca
+d'água de criação por repositório, com janela de sobreposição) e mantém
+histogramas de duração, fila e falhas por workflow, permitindo p50/p95 e
+detecção de workflows instáveis.
+"""
+
+import os
+import json
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Limites superiores (segundos) dos buckets dos histogramas; o último é aberto
+HISTOGRAM_BOUNDS = [10, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 14400]
+
+# Janela do histograma diário de falhas
+FAILURE_WINDOW_DAYS = 30
+
+# Quantidade de conclusões recentes usadas na detecção de instabilidade
+RECENT_OUTCOMES = 50
+
+# Parâmetros da detecção de workflows instáveis
+FLAKY_MIN_RUNS = 10
+FLAKY_THRESHOLD = 0.15
+
+FAILED_CONCLUSIONS = {"failure", "timed_out", "startup_failure"}
+
+# Sobreposição da marca d'água: reconsulta execuções recentes (novas tentativas,
+# relógios fora de ordem); duplicatas são descartadas por (id, run_attempt)
+CURSOR_OVERLAP = timedelta(hours=1)
+
+STATE_VERSION = 2
+
+DEFAULT_STATE_FILE = os.getenv("WORKFLOW_ANALYTICS_STATE", "workflow_analytics_state.json")
+
+
+def _new_histogram() -> Dict[str, Any]:
+    return {"counts": [0] * (len(HISTOGRAM_BOUNDS) + 1), "total": 0, "sum": 0.0, "max": 0.0}
+
+
+def _observe(histogram: Dict[str, Any], value: float) -> None:
+    """Registra um valor no histograma."""
+    value = max(value, 0.0)
+    idx = len(HISTOGRAM_BOUNDS)
+    for i, bound in enumerate(HISTOGRAM_BOUNDS):
+        if value <= bound:
+            idx = i
+            break
+    histogram["counts"][idx] += 1
+    histogram["total"] += 1
+    histogram["sum"] += value
+    histogram["max"] = max(histogram["max"], value)
+
+
+def histogram_percentile(histogram: Dict[str, Any], q: float) -> Optional[float]:
+    """Estima o percentil ``q`` (0-1) interpolando dentro do bucket."""
+    total = histogram["total"]
+    if not total:
+        return None
+
+    rank = q * total
+    cumulative = 0
+    for i, count in enumerate(histogram["counts"]):
+        if not count:
+            continue
+        if cumulative + count >= rank:
+            lower = HISTOGRAM_BOUNDS[i - 1] if i > 0 else 0.0
+            upper = HISTOGRAM_BOUNDS[i] if i < len(HISTOGRAM_BOUNDS) else histogram["max"]
+            upper = min(upper, histogram["max"])
+            fraction = (rank - cumulative) / count
+            return round(lower + (upper - lower) * fraction, 1)
+        cumulative += count
+
+    return round(histogram["max"], 1)
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _format_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _run_key(run: Dict) -> str:
+    return f"{run['id']}:{run.get('run_attempt', 1)}"
+
+
+class WorkflowAnalyticsCollector:
+    """Coletor incremental de métricas de workflows da organização."""
+
+    def __init__(
+        self,
+        org_name: str,
+        headers: Dict[str, str],
+        state_path: Optional[str] = None,
+        initial_days: int = 30,
+        max_pages: int = 10,
+        timeout: int = 30,
+    ):
+        self.org_name = org_name
+        self.headers = headers
+        self.state_path = Path(state_path or DEFAULT_STATE_FILE)
+        self.initial_days = initial_days
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.calls = 0
+        self.state = self._load_state()
+
+    # ------------------------------------------------------------------
+    # Persistência do estado
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get("bounds") == HISTOGRAM_BOUNDS and state.get("version") == STATE_VERSION:
+                    return state
+                logger.info("Formato do estado mudou; reiniciando analytics de workflows")
+            except Exception as e:
+                logger.warning(f"Erro ao carregar estado de workflows: {e}")
+        return {"version": STATE_VERSION, "bounds": HISTOGRAM_BOUNDS, "repos": {}}
+
+    def save_state(self) -> None:
+        """Grava o estado de forma atômica."""
+        tmp_path = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    # ------------------------------------------------------------------
+    # Ingestão
+    # ------------------------------------------------------------------
+
+    def _repo_state(self, repo_name: str) -> Dict[str, Any]:
+        return self.state["repos"].setdefault(repo_name, {
+            "cursor": None,
+            "seen": {},
+            "last_run": None,
+            "workflows": {}
+        })
+
+    def _fetch_runs(self, repo_name: str, since: datetime) -> Optional[List[Dict]]:
+        """Busca as execuções criadas desde ``since`` (qualquer status).
+
+        Returns:
+            As execuções, ou None se a leitura ficou incompleta (erro ou limite
+            de páginas) e a marca d'água não deve avançar.
+        """
+        url = f"https://api.github.com/repos/{self.org_name}/{repo_name}/actions/runs"
+        params: Dict[str, Any] = {"per_page": 100, "created": f">={_format_time(since)}"}
+
+        runs: List[Dict] = []
+        for page in range(1, self.max_pages + 1):
+            params["page"] = page
+            self.calls += 1
+            resp = requests.get(url, headers=self.headers, params=params, timeout=self.timeout)
+            if not resp.ok:
+                logger.warning(f"Leitura de execuções de {repo_name} interrompida: {resp.status_code}")
+                return None
+
+            batch = resp.json().get("workflow_runs", [])
+            runs.extend(batch)
+            if len(batch) < params["per_page"]:
+                return runs
+
+        logger.warning(f"Limite de {self.max_pages} páginas atingido em {repo_name}; marca d'água mantida")
+        return None
+
+    def _workflow_state(self, repo_state: Dict, run: Dict) -> Dict[str, Any]:
+        name = run.get("name") or str(run.get("workflow_id"))
+        return repo_state["workflows"].setdefault(name, {
+            "duration": _new_histogram(),
+            "queue_time": _new_histogram(),
+            "daily": {},
+            "recent_outcomes": [],
+            "runs": 0,
+            "failures": 0,
+            "recent_failures": []
+        })
+
+    def _ingest_run(self, repo_state: Dict, run: Dict) -> None:
+        conclusion = run.get("conclusion")
+        # Execuções canceladas ou puladas não indicam sucesso nem falha
+        if conclusion in (None, "skipped", "neutral", "cancelled"):
+            return
+
+        workflow = self._workflow_state(repo_state, run)
+        created = _parse_time(run.get("created_at"))
+        started = _parse_time(run.get("run_started_at")) or created
+        finished = _parse_time(run.get("updated_at"))
+
+        if started and finished:
+            _observe(workflow["duration"], (finished - started).total_seconds())
+        if created and started:
+            _observe(workflow["queue_time"], (started - created).total_seconds())
+
+        failed = conclusion in FAILED_CONCLUSIONS
+        workflow["runs"] += 1
+        if failed:
+            workflow["failures"] += 1
+            workflow["recent_failures"] = ([{
+                "date": run.get("created_at"),
+                "status": conclusion,
+                "url": run.get("html_url")
+            }] + workflow["recent_failures"])[:3]
+
+        if created:
+            day = created.strftime("%Y-%m-%d")
+            totals = workflow["daily"].setdefault(day, [0, 0])
+            totals[0] += 1
+            totals[1] += int(failed)
+
+        # 0 = falha, 1 = sucesso, 2 = sucesso somente após nova tentativa
+        if failed:
+            outcome = 0
+        elif run.get("run_attempt", 1) > 1:
+            outcome = 2
+        else:
+            outcome = 1
+        outcomes = deque(workflow["recent_outcomes"], maxlen=RECENT_OUTCOMES)
+        outcomes.append(outcome)
+        workflow["recent_outcomes"] = list(outcomes)
+
+    def _prune_daily(self, repo_state: Dict) -> None:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=FAILURE_WINDOW_DAYS)).strftime("%Y-%m-%d")
+        for workflow in repo_state["workflows"].values():
+            workflow["daily"] = {day: v for day, v in workflow["daily"].items() if day >= cutoff}
+
+    def ingest_repository(self, repo_name: str) -> int:
+        """Ingere as execuções concluídas ainda não vistas de um repositório.
+
+        A consulta parte da marca d'água menos ``CURSOR_OVERLAP``; cada tentativa
+        é contada uma única vez. A marca d'água só avança após uma leitura completa
+        e nunca passa de uma execução ainda em andamento, de modo que execuções
+        longas e novas tentativas são ingeridas quando concluírem.
+
+        Returns:
+            Quantidade de execuções novas processadas.
+        """
+        repo_state = self._repo_state(repo_name)
+        now = datetime.now(timezone.utc)
+        cursor = _parse_time(repo_state["cursor"]) or now - timedelta(days=self.initial_days)
+        since = cursor - CURSOR_OVERLAP
+        try:
+            runs = self._fetch_runs(repo_name, since)
+        except Exception as e:
+            logger.warning(f"Erro ao buscar execuções de {repo_name}: {e}")
+            return 0
+
+        complete = runs is not None
+        runs = runs or []
+        seen = repo_state["seen"]
+        fresh = [
+            run for run in runs
+            if run.get("status") == "completed" and _run_key(run) not in seen
+        ]
+
+        # Processar em ordem cronológica para as sequências de conclusões
+        for run in sorted(fresh, key=lambda r: (r.get("updated_at") or "", r["id"])):
+            self._ingest_run(repo_state, run)
+            seen[_run_key(run)] = run.get("created_at")
+
+        if fresh:
+            latest = max(fresh, key=lambda r: (r.get("updated_at") or "", r["id"]))
+            repo_state["last_run"] = {
+                "date": latest.get("created_at"),
+                "status": latest.get("conclusion"),
+                "url": latest.get("html_url")
+            }
+
+        if complete:
+            pending = [
+                _parse_time(run.get("created_at")) for run in runs
+                if run.get("status") != "completed" and run.get("created_at")
+            ]
+            created = [_parse_time(run.get("created_at")) for run in runs if run.get("created_at")]
+            if pending:
+                # Não ultrapassar execuções em andamento (limitado à janela inicial)
+                cursor = max(min(pending), now - timedelta(days=self.initial_days))
+            elif created:
+                cursor = max(created)
+            cursor = max(cursor, _parse_time(repo_state["cursor"]) or cursor)
+            repo_state["cursor"] = _format_time(cursor)
+
+            # Tentativas anteriores à próxima consulta não serão vistas de novo
+            horizon = _format_time(cursor - CURSOR_OVERLAP)
+            repo_state["seen"] = {k: v for k, v in seen.items() if (v or "") >= horizon}
+
+        self._prune_daily(repo_state)
+        return len(fresh)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _flakiness(self, workflow: Dict) -> float:
+        """Taxa de alternância sucesso/falha somada às aprovações após retry."""
+        outcomes = workflow["recent_outcomes"]
+        if len(outcomes) < 2:
+            return 0.0
+        flips = sum(1 for a, b in zip(outcomes, outcomes[1:]) if (a == 0) != (b == 0))
+        retries = outcomes.count(2)
+        return round((flips + retries) / len(outcomes), 3)
+
+    def workflow_summary(self, repo_name: str, workflow_name: str) -> Dict[str, Any]:
+        """Resumo de um workflow: percentis, taxa de falha e instabilidade."""
+        workflow = self.state["repos"][repo_name]["workflows"][workflow_name]
+        window_runs = sum(v[0] for v in workflow["daily"].values())
+        window_failures = sum(v[1] for v in workflow["daily"].values())
+        flakiness = self._flakiness(workflow)
+
+        return {
+            "repo": repo_name,
+            "workflow": workflow_name,
+            "runs": workflow["runs"],
+            "duration_p50": histogram_percentile(workflow["duration"], 0.50),
+            "duration_p95": histogram_percentile(workflow["duration"], 0.95),
+            "queue_p50": histogram_percentile(workflow["queue_time"], 0.50),
+            "queue_p95": histogram_percentile(workflow["queue_time"], 0.95),
+            "failure_rate": round((window_failures / window_runs) * 100, 1) if window_runs else 0.0,
+            "daily_failures": dict(sorted(workflow["daily"].items())),
+            "flakiness": flakiness,
+            "flaky": len(workflow["recent_outcomes"]) >= FLAKY_MIN_RUNS and flakiness >= FLAKY_THRESHOLD,
+            "recent_failures": workflow["recent_failures"]
+        }
+
+    def repo_summary(self, repo_name: str) -> Dict[str, Any]:
+        """Resumo de um repositório na janela de análise."""
+        repo_state = self.state["repos"].get(repo_name)
+        if not repo_state:
+            return {"workflows": [], "success_rate": None, "last_run": None}
+
+        workflows = [self.workflow_summary(repo_name, name) for name in repo_state["workflows"]]
+        runs = sum(sum(v[0] for v in w["daily"].values()) for w in repo_state["workflows"].values())
+        failures = sum(sum(v[1] for v in w["daily"].values()) for w in repo_state["workflows"].values())
+
+        return {
+            "workflows": workflows,
+            "success_rate": round(((runs - failures) / runs) * 100, 1) if runs else None,
+            "last_run": repo_state["last_run"]
+        }
+
+    def all_workflows(self) -> List[Dict[str, Any]]:
+        """Resumo de todos os workflows conhecidos."""
+        return [
+            self.workflow_summary(repo_name, workflow_name)
+            for repo_name, repo_state in self.state["repos"].items()
+            for workflow_name in repo_state["workflows"]
+        ]
+
+    def slowest_workflows(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Workflows com maior duração p95."""
+        workflows = [w for w in self.all_workflows() if w["duration_p95"] is not None]
+        return sorted(workflows, key=lambda w: w["duration_p95"], reverse=True)[:limit]
+
+    def flaky_workflows(self) -> List[Dict[str, Any]]:
+        """Workflows detectados como instáveis, mais instáveis primeiro."""
+        flaky = [w for w in self.all_workflows() if w["flaky"]]
+        return sorted(flaky, key=lambda w: w["flakiness"], reverse=True)
@@ -16,13 +16,43 @@ import sys
 import logging
 import argparse
 import asyncio
-import aiohttp
+import codecs
+import gzip
+import hashlib
+import heapq
+import http.client
+import importlib.util
+import itertools
+import socket
+import sqlite3
+import threading
 import time
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, asdict
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Any, Set, Tuple, Union
+from dataclasses import dataclass, asdict, replace
 from enum import Enum
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# aiohttp só é importado quando o hub é instanciado: os comandos cliente da CLI
+# falam com o daemon sem pagar o custo dessa importação
+aiohttp = None
+
+def _import_aiohttp():
+    global aiohttp
+    if aiohttp is None:
+        import aiohttp as aiohttp_module
+        aiohttp = aiohttp_module
+    return aiohttp
+
+DEFAULT_SOCKET_PATH = os.getenv('AI_HUB_SOCKET', '/tmp/ai-integration-hub.sock')
+
+# Raiz do repositório no path para os utilitários compartilhados
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.utils.kpi_engine import KPIEngine
 
 # ============================================
 # 🏗️ Configuração e Tipos de Dados
@@ -36,6 +66,7 @@ class AIProvider(Enum):
     GITHUB_COPILOT = "github_copilot"
     LOCAL_LLM = "local_llm"
     WARP_AGENT = "warp_agent"
+    AUTO = "auto"  # Roteamento automático pelo melhor provedor
 
 class RequestStatus(Enum):
     """Status das requisições de IA"""
@@ -58,6 +89,17 @@ class AIRequest:
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     execution_time: Optional[float] = None
+    cache_key: Optional[str] = None
+    flight_key: Optional[str] = None
+    # Roteamento automático: provedores reserva para hedge/failover
+    fallback_providers: Optional[List[AIProvider]] = None
+    served_by: Optional[AIProvider] = None
+    # Streaming: resultados parciais publicados nesta fila durante a execução
+    stream: bool = False
+    stream_queue: Optional[asyncio.Queue] = None
+    # Lote: chamada compartilhada com outras requisições da mesma operação
+    batch_task: Optional[asyncio.Future] = None
+    batchable: bool = True
     
     def __post_init__(self):
         if self.created_at is None:
@@ -78,6 +120,400 @@ class AIResponse:
         if self.completed_at is None:
             self.completed_at = datetime.now(timezone.utc)
 
+# ============================================
+# 🚦 Controle de Taxa por Provedor
+# ============================================
+
+class TokenBucket:
+    """Token bucket assíncrono para limitar requisições por minuto"""
+    
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(rate_per_minute, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def available(self) -> float:
+        """Tokens disponíveis no momento"""
+        self._refill()
+        return self.tokens
+    
+    def time_until_available(self) -> float:
+        """Segundos até existir um token disponível"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    def try_acquire(self) -> bool:
+        """Consome um token apenas se houver um disponível"""
+        if self.time_until_available() > 0:
+            return False
+        self.tokens -= 1
+        return True
+    
+    async def acquire(self):
+        """Aguarda e consome um token"""
+        while True:
+            wait = self.time_until_available()
+            if wait <= 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(wait)
+    
+    def penalize(self, seconds: float):
+        """Esvazia o bucket após um 429 do provedor"""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+# ============================================
+# 💾 Cache de Respostas
+# ============================================
+
+class ResponseCache:
+    """Cache de respostas em dois níveis: LRU em memória e SQLite persistente"""
+    
+    def __init__(self, db_path: str, memory_size: int = 256):
+        self.memory_size = memory_size
+        self.memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+        
+        self.db = sqlite3.connect(db_path)
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                result TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        # Entradas expiradas de execuções anteriores não servem mais
+        self.db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        self.db.commit()
+    
+    @staticmethod
+    def make_key(provider: str, model: Optional[str], operation: str,
+                 parameters: Dict[str, Any]) -> str:
+        """Chave estável para (provedor, modelo, operação, parâmetros canônicos)"""
+        canonical = json.dumps(
+            [provider, model, operation, parameters],
+            sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Busca uma resposta válida, promovendo acertos do disco para a memória"""
+        now = time.time()
+        
+        entry = self.memory.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > now:
+                self.memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return result
+            del self.memory[key]
+        
+        row = self.db.execute(
+            "SELECT result, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        
+        result = json.loads(row[0])
+        self._remember(key, row[1], result)
+        self.stats['disk_hits'] += 1
+        return result
+    
+    def set(self, key: str, provider: str, operation: str,
+            result: Dict[str, Any], ttl: float):
+        """Armazena uma resposta nos dois níveis"""
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, result)
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses (key, provider, operation, result, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, provider, operation, json.dumps(result, default=str), expires_at)
+        )
+        self.db.commit()
+        self.stats['stores'] += 1
+    
+    def _remember(self, key: str, expires_at: float, result: Dict[str, Any]):
+        self.memory[key] = (expires_at, result)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+            self.stats['evictions'] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de acerto do cache"""
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        lookups = hits + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': round(hits / lookups * 100, 1) if lookups else 0.0,
+            'memory_entries': len(self.memory)
+        }
+    
+    def close(self):
+        self.db.close()
+
+# ============================================
+# 📜 Saída de Execuções Locais
+# ============================================
+
+class OutputSpool:
+    """Saída de um subprocesso: cauda limitada em memória e cópia completa em gzip"""
+    
+    def __init__(self, path: Optional[Path], tail_bytes: int = 64 * 1024):
+        self.path = path
+        self.tail_bytes = tail_bytes
+        self.tail: deque = deque()
+        self.tail_size = 0
+        self.total_bytes = 0
+        self._file = gzip.open(path, 'wt', encoding='utf-8') if path else None
+    
+    def write(self, text: str):
+        self.total_bytes += len(text)
+        if self._file:
+            self._file.write(text)
+        
+        self.tail.append(text)
+        self.tail_size += len(text)
+        # Ring buffer: descartar os trechos mais antigos além do limite
+        while self.tail_size > self.tail_bytes and len(self.tail) > 1:
+            self.tail_size -= len(self.tail.popleft())
+    
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > self.tail_size
+    
+    def text(self) -> str:
+        """Cauda da saída, começando em uma linha completa quando truncada"""
+        text = ''.join(self.tail)
+        if self.truncated and '\n' in text:
+            text = text[text.index('\n') + 1:]
+        return text[-self.tail_bytes:]
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+# ============================================
+# 🗄️ Fila Persistente
+# ============================================
+
+class DurableQueue:
+    """Fila de requisições persistida em SQLite (WAL) com commits em lote
+    
+    O daemon acumula inserções e mudanças de status em memória e as grava em
+    uma única transação por ciclo de ``flush`` (antecipado quando ``batch_size``
+    escritas se acumulam). Outros processos (CLI) inserem diretamente com
+    ``accepted = 0`` e o daemon as reivindica periodicamente.
+    """
+    
+    INSERT_SQL = (
+        "INSERT OR IGNORE INTO requests "
+        "(id, provider, operation, parameters, priority, status, accepted, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, 'pending', ?, ?, ?)"
+    )
+    UPDATE_SQL = (
+        "UPDATE requests SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?"
+    )
+    
+    def __init__(self, db_path: str, batch_size: int = 500):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.pending_writes: List[Tuple[str, tuple]] = []
+        self.stats = {'flushes': 0, 'rows_written': 0, 'recovered': 0, 'external': 0}
+        
+        self.db = self.connect(db_path)
+    
+    @staticmethod
+    def connect(db_path: str) -> sqlite3.Connection:
+        """Abre o banco em modo WAL, criando o esquema se necessário"""
+        db = sqlite3.connect(db_path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        # Em WAL, NORMAL só sincroniza no checkpoint: sem fsync por commit
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS requests (
+                id TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                parameters TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                accepted INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_requests_status ON requests (status, accepted)")
+        db.commit()
+        return db
+    
+    @classmethod
+    def enqueue(cls, db_path: str, provider: str, operation: str,
+                parameters: Dict[str, Any], priority: int = 5) -> str:
+        """Insere uma requisição para o daemon em execução (uso por outros processos)"""
+        request_id = f"{provider}_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
+        db = cls.connect(db_path)
+        try:
+            with db:
+                db.execute(cls.INSERT_SQL, (
+                    request_id, provider, operation, json.dumps(parameters), priority, 0,
+                    datetime.now(timezone.utc).isoformat(), time.time()
+                ))
+        finally:
+            db.close()
+        return request_id
+    
+    @classmethod
+    def lookup(cls, db_path: str, request_id: str) -> Optional[Dict[str, Any]]:
+        """Consulta o estado gravado de uma requisição (sem daemon em execução)"""
+        db = cls.connect(db_path)
+        try:
+            row = db.execute(
+                "SELECT id, provider, operation, priority, status, result, error, created_at "
+                "FROM requests WHERE id = ?",
+                (request_id,)
+            ).fetchone()
+        finally:
+            db.close()
+        
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'provider': row[1],
+            'operation': row[2],
+            'priority': row[3],
+            'status': row[4],
+            'result': json.loads(row[5]) if row[5] else None,
+            'error': row[6],
+            'created_at': row[7]
+        }
+    
+    def _append(self, sql: str, params: tuple):
+        """Acumula uma escrita, gravando o lote ao atingir ``batch_size``"""
+        self.pending_writes.append((sql, params))
+        if len(self.pending_writes) >= self.batch_size:
+            self.flush()
+    
+    def add(self, request: AIRequest, provider: str):
+        """Registra uma requisição aceita pelo daemon (gravada no próximo flush)"""
+        self._append(self.INSERT_SQL, (
+            request.id, provider, request.operation, json.dumps(request.parameters, default=str),
+            request.priority, 1, request.created_at.isoformat(), time.time()
+        ))
+    
+    def update(self, request: AIRequest):
+        """Registra a mudança de status de uma requisição"""
+        self._append(self.UPDATE_SQL, (
+            request.status.value,
+            json.dumps(request.result, default=str) if request.result is not None else None,
+            request.error,
+            time.time(),
+            request.id
+        ))
+    
+    def flush(self) -> int:
+        """Grava todas as escritas pendentes em uma única transação"""
+        if not self.pending_writes:
+            return 0
+        
+        writes, self.pending_writes = self.pending_writes, []
+        with self.db:
+            # Agrupar sequências do mesmo comando preservando a ordem
+            for sql, group in itertools.groupby(writes, key=lambda write: write[0]):
+                self.db.executemany(sql, [params for _, params in group])
+        
+        self.stats['flushes'] += 1
+        self.stats['rows_written'] += len(writes)
+        return len(writes)
+    
+    def _rows(self, where: str) -> List[Dict[str, Any]]:
+        cursor = self.db.execute(
+            "SELECT id, provider, operation, parameters, priority FROM requests "
+            f"WHERE {where} ORDER BY priority, created_at"
+        )
+        return [
+            {
+                'id': row[0],
+                'provider': row[1],
+                'operation': row[2],
+                'parameters': json.loads(row[3]),
+                'priority': row[4]
+            }
+            for row in cursor.fetchall()
+        ]
+    
+    def recover(self) -> List[Dict[str, Any]]:
+        """Retorna requisições do daemon anterior que não chegaram ao fim
+        
+        Requisições interrompidas durante o processamento voltam a pendentes
+        (entrega ao menos uma vez).
+        """
+        with self.db:
+            self.db.execute(
+                "UPDATE requests SET status = 'pending' WHERE status = 'processing'"
+            )
+        rows = self._rows("status = 'pending' AND accepted = 1")
+        self.stats['recovered'] += len(rows)
+        return rows
+    
+    def claim_external(self) -> List[Dict[str, Any]]:
+        """Reivindica requisições inseridas por outros processos"""
+        rows = self._rows("status = 'pending' AND accepted = 0")
+        if rows:
+            with self.db:
+                self.db.executemany(
+                    "UPDATE requests SET accepted = 1 WHERE id = ?",
+                    [(row['id'],) for row in rows]
+                )
+            self.stats['external'] += len(rows)
+        return rows
+    
+    def prune(self, retention_hours: float) -> int:
+        """Remove requisições finalizadas há mais de ``retention_hours``"""
+        with self.db:
+            cursor = self.db.execute(
+                "DELETE FROM requests WHERE status NOT IN ('pending', 'processing') "
+                "AND updated_at < ?",
+                (time.time() - retention_hours * 3600,)
+            )
+        return cursor.rowcount
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'pending_writes': len(self.pending_writes), 'db_path': self.db_path}
+    
+    def close(self):
+        self.flush()
+        self.db.close()
+
 # ============================================
 # 🧠 Classe Principal do Hub de IA
 # ============================================
@@ -92,32 +528,134 @@ class AIIntegrationHub:
         Args:
             config_path: Caminho para arquivo de configuração customizado
         """
+        _import_aiohttp()
         self.config = self._load_config(config_path)
         self.logger = self._setup_logging()
-        self.request_queue: List[AIRequest] = []
+        self._sequence = itertools.count()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.pending_requests: Dict[str, AIRequest] = {}
         self.active_requests: Dict[str, AIRequest] = {}
+        self.completed_requests: "OrderedDict[str, AIRequest]" = OrderedDict()
+        # ID -> (instante de conclusão, tamanho aproximado) para a política de despejo
+        self._completed_meta: Dict[str, Tuple[float, int]] = {}
+        self._completed_bytes = 0
+        # Single-flight: chave da requisição -> líder em voo e seus seguidores
+        self._inflight: Dict[str, AIRequest] = {}
+        self._followers: Dict[str, List[AIRequest]] = {}
         self.providers: Dict[AIProvider, Dict[str, Any]] = {}
         self.session: Optional[aiohttp.ClientSession] = None
+        # Warp Agent em processo: bot do manual carregado uma única vez
+        self._warp_bot = None
+        self._warp_bot_lock = threading.Lock()
+        self._warp_executor: Optional[ThreadPoolExecutor] = None
+        # KPIs operacionais mantidos pelos produtores (leitura O(1))
+        self.kpi_engine = KPIEngine()
         
         # Estatísticas do hub
         self.stats = {
             'total_requests': 0,
             'successful_requests': 0,
             'failed_requests': 0,
+            'coalesced_requests': 0,
+            'routed_requests': 0,
+            'hedged_requests': 0,
+            'hedge_wins': 0,
+            'failovers': 0,
+            'streamed_requests': 0,
+            'batches': 0,
+            'batched_requests': 0,
+            'batch_fallbacks': 0,
             'providers_status': {},
             'start_time': datetime.now(timezone.utc)
         }
         
         self._initialize_providers()
         
+        cache_config = self.config.get('cache', {})
+        self.cache: Optional[ResponseCache] = None
+        if cache_config.get('enabled', False):
+            self.cache = ResponseCache(
+                cache_config.get('db_path', 'ai_hub_cache.db'),
+                cache_config.get('memory_size', 256)
+            )
+        
     def _load_config(self, config_path: Optional[str] = None) -> Dict[str, Any]:
         """Carrega configuração do hub"""
         default_config = {
             'hub': {
                 'max_concurrent_requests': 10,
+                'max_concurrent_per_provider': 3,
                 'request_timeout': 300,
                 'retry_attempts': 3,
-                'log_level': 'INFO'
+                'log_level': 'INFO',
+                # Retenção em memória das requisições finalizadas (quantidade, idade e tamanho)
+                'completed_history': 1000,
+                'completed_ttl': 3600,
+                'completed_max_bytes': 50 * 1024 * 1024
+            },
+            'warp_output': {
+                # Cauda mantida no resultado; saída completa vai para <output_dir>/<id>.log.gz
+                'tail_bytes': 64 * 1024,
+                'output_dir': os.getenv('AI_HUB_OUTPUT_DIR', 'ai_hub_outputs'),
+                'retention_hours': 72
+            },
+            'batching': {
+                'enabled': True,
+                'max_batch_size': 8,
+                # Espera máxima (s), contada desde a submissão da primeira requisição
+                'max_wait': 0.2,
+                # Apenas requisições pequenas são agrupadas em um único prompt
+                'max_parameters_size': 2000,
+                'operations': [
+                    'Verificar Status do Sistema',
+                    'Análise de Logs',
+                    'Health Check',
+                    'Deploy Status',
+                    'Security Check'
+                ]
+            },
+            'api': {
+                'enabled': True,
+                'socket_path': DEFAULT_SOCKET_PATH,
+                # Porta TCP opcional (sempre em 127.0.0.1) para clientes sem Unix socket
+                'port': None
+            },
+            'queue': {
+                'durable': True,
+                'db_path': os.getenv('AI_HUB_QUEUE_DB', 'ai_hub_queue.db'),
+                'batch_size': 500,
+                # Intervalo entre commits em lote e entre buscas por requisições da CLI
+                'flush_interval': 0.05,
+                'poll_interval': 0.5,
+                'retention_hours': 24
+            },
+            'routing': {
+                # Peso da amostra mais recente nas médias móveis (EWMA)
+                'ewma_alpha': 0.2,
+                'latency_window': 200,
+                # Hedge quando o primário passa do percentil de latência
+                'hedge_percentile': 95,
+                'min_hedge_delay': 2.0,
+                'default_hedge_delay': 15.0,
+                'min_samples': 10
+            },
+            'cache': {
+                'enabled': True,
+                'db_path': os.getenv('AI_HUB_CACHE_DB', 'ai_hub_cache.db'),
+                'memory_size': 256,
+                'default_ttl': 300,
+                # TTL em segundos por operação (0 desativa o cache da operação)
+                'ttl_per_operation': {
+                    'Verificar Status do Sistema': 60,
+                    'Monitorar Recursos': 30,
+                    'Análise de Logs': 300,
+                    'Health Check': 60,
+                    'Deploy Status': 120,
+                    'Security Check': 900
+                },
+                # Parâmetros que não alteram a resposta e ficam fora da chave
+                'ignored_parameters': ['no_cache', 'requested_by', 'timestamp']
             },
             'providers': {
                 'claude': {
@@ -148,7 +686,15 @@ class AIIntegrationHub:
                     'enabled': True,
                     'local': True,
                     'manual_path': 'docs/ai-operations-manual.md',
-                    'parser_script': 'scripts/ai-manual-parser.py'
+                    'parser_script': 'scripts/ai-manual-parser.py',
+                    # in_process: parser carregado uma vez; subprocess: um processo por requisição
+                    'execution': 'in_process',
+                    # Operações do hub -> comandos do manual
+                    'command_aliases': {
+                        'Health Check': 'Executar Health Check',
+                        'Monitorar Recursos': 'Monitoramento do Sistema',
+                        'Deploy Status': 'Verificar Workflows GitHub Actions'
+                    }
                 }
             },
             'operations': {
@@ -212,7 +758,25 @@ class AIIntegrationHub:
                 'status': 'initializing',
                 'requests_count': 0,
                 'last_request': None,
-                'rate_limit_reset': datetime.now(timezone.utc)
+                'rate_limit_reset': datetime.now(timezone.utc),
+                # Heap de (prioridade, sequência, requisição): FIFO dentro da mesma prioridade
+                'queue': [],
+                'bucket': TokenBucket(config['rate_limit']) if config.get('rate_limit') else None,
+                'max_concurrent': config.get(
+                    'max_concurrent', self.config['hub'].get('max_concurrent_per_provider', 3)
+                ),
+                'active': 0,
+                'dispatched_at': deque(),
+                'latency_ewma': None,
+                'error_ewma': 0.0,
+                'latencies': deque(
+                    maxlen=self.config.get('routing', {}).get('latency_window', 200)
+                ),
+                'ttft': deque(
+                    maxlen=self.config.get('routing', {}).get('latency_window', 200)
+                ),
+                'event': None,
+                'semaphore': None
             }
             
             # Verificar dependências do provedor
@@ -228,6 +792,14 @@ class AIIntegrationHub:
             else:
                 self.providers[provider]['status'] = 'ready'
         
+        queue_config = self.config.get('queue', {})
+        self.durable_queue: Optional[DurableQueue] = None
+        if queue_config.get('durable', False):
+            self.durable_queue = DurableQueue(
+                queue_config.get('db_path', 'ai_hub_queue.db'),
+                queue_config.get('batch_size', 500)
+            )
+        
         self.logger.info(
             f"✅ {len([p for p in self.providers.values() if p['status'] == 'ready'])} "
             f"provedores prontos de {len(self.providers)} configurados"
@@ -242,6 +814,12 @@ class AIIntegrationHub:
         """Context manager exit"""
         if self.session:
             await self.session.close()
+        if self.cache:
+            self.cache.close()
+        if self.durable_queue:
+            self.durable_queue.close()
+        if self._warp_executor:
+            self._warp_executor.shutdown(wait=False)
 
     # ============================================
     # 🎯 Gerenciamento de Requisições
@@ -252,7 +830,9 @@ class AIIntegrationHub:
         provider: Union[AIProvider, str], 
         operation: str,
         parameters: Dict[str, Any],
-        priority: int = 5
+        priority: int = 5,
+        stream: bool = False,
+        request_id: Optional[str] = None
     ) -> str:
         """
         Submete uma nova requisição para processamento
@@ -262,12 +842,23 @@ class AIIntegrationHub:
             operation: Operação a ser executada
             parameters: Parâmetros da operação
             priority: Prioridade (1=alta, 10=baixa)
+            stream: Publicar resultados parciais (ver ``iter_stream``)
+            request_id: ID já atribuído (requisições recuperadas da fila persistente)
             
         Returns:
             ID da requisição
         """
         if isinstance(provider, str):
             provider = AIProvider(provider)
+        provider_label = provider.value
+        
+        # Roteamento automático: primário com melhor score, demais como reserva
+        fallback_providers = None
+        if provider == AIProvider.AUTO:
+            ranked = self._rank_providers()
+            if not ranked:
+                raise ValueError("Nenhum provedor disponível para roteamento automático")
+            provider, fallback_providers = ranked[0], ranked[1:]
         
         # Validar provedor
         if provider not in self.providers:
@@ -282,48 +873,460 @@ class AIIntegrationHub:
         
         if operation not in allowed_ops and operation not in emergency_ops:
             raise ValueError(f"Operação não permitida: {operation}")
+        if provider == AIProvider.WARP_AGENT:
+            self._warp_command_name(operation, parameters)
         
-        # Criar requisição
-        request_id = f"{provider.value}_{int(time.time() * 1000)}"
+        # Criar requisição (sequência evita IDs repetidos no mesmo milissegundo)
+        sequence = next(self._sequence)
+        if request_id is None:
+            request_id = f"{provider_label}_{int(time.time() * 1000)}_{sequence}"
         request = AIRequest(
             id=request_id,
             provider=provider,
             operation=operation,
             parameters=parameters,
-            priority=priority
+            priority=priority,
+            fallback_providers=fallback_providers
         )
         
-        # Adicionar à fila ordenada por prioridade
-        self.request_queue.append(request)
-        self.request_queue.sort(key=lambda r: r.priority)
-        
         self.stats['total_requests'] += 1
+        if fallback_providers is not None:
+            self.stats['routed_requests'] += 1
+        
+        # Streams têm consumidor próprio: sem cache nem agrupamento
+        if stream:
+            request.stream = True
+            request.stream_queue = asyncio.Queue()
+            self.stats['streamed_requests'] += 1
+            self._enqueue(request, sequence)
+            return request_id
+        
+        if self.durable_queue is not None:
+            self.durable_queue.add(request, provider_label)
+        
+        # Operações rotineiras repetidas são respondidas direto do cache
+        request_key = self._request_key(request)
+        request.cache_key = self._cache_key(request, request_key)
+        if request.cache_key is not None:
+            cached = self.cache.get(request.cache_key)
+            if cached is not None:
+                request.result = cached
+                request.status = RequestStatus.COMPLETED
+                request.execution_time = 0.0
+                self.stats['successful_requests'] += 1
+                self._remember_completed(request)
+                self.logger.info(
+                    f"⚡ Cache hit: {request_id} ({provider.value}) - {operation}"
+                )
+                return request_id
+        
+        # Requisição idêntica já em voo: aguardar o mesmo resultado
+        leader = self._inflight.get(request_key)
+        if leader is not None:
+            self._followers[leader.id].append(request)
+            self.pending_requests[request_id] = request
+            self.stats['coalesced_requests'] += 1
+            self.logger.info(
+                f"🔗 Requisição agrupada: {request_id} aguarda {leader.id} - {operation}"
+            )
+            return request_id
+        
+        request.flight_key = request_key
+        self._inflight[request_key] = request
+        self._followers[request_id] = []
+        
+        self._enqueue(request, sequence)
+        return request_id
+
+    def _enqueue(self, request: AIRequest, sequence: int):
+        """Adiciona à fila do provedor (O(log n)) e acorda seu despachante"""
+        provider_state = self.providers[request.provider]
+        heapq.heappush(provider_state['queue'], (request.priority, sequence, request))
+        self.pending_requests[request.id] = request
+        if provider_state['event'] is not None:
+            provider_state['event'].set()
+        
         self.logger.info(
-            f"📝 Nova requisição: {request_id} ({provider.value}) - {operation}"
+            f"📝 Nova requisição: {request.id} ({request.provider.value}) - {request.operation}"
         )
+
+    async def iter_stream(self, request_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Itera os resultados parciais de uma requisição submetida com ``stream=True``
         
-        return request_id
+        Cada item traz ``delta`` com o novo trecho de texto; o último item tem
+        ``done=True`` com o status final e o erro, se houver.
+        """
+        request = self.get_request(request_id)
+        if request is None or request.stream_queue is None:
+            raise ValueError(f"Requisição sem streaming: {request_id}")
+        
+        while True:
+            chunk = await request.stream_queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        
+        yield {
+            'request_id': request.id,
+            'done': True,
+            'status': request.status.value,
+            'error': request.error
+        }
 
-    async def process_requests(self):
-        """Processa requisições na fila"""
+    async def stream_request(
+        self,
+        provider: Union[AIProvider, str],
+        operation: str,
+        parameters: Dict[str, Any],
+        priority: int = 5
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Submete uma requisição em modo streaming e itera seus resultados parciais"""
+        request_id = self.submit_request(provider, operation, parameters, priority, stream=True)
+        async for chunk in self.iter_stream(request_id):
+            yield chunk
+
+    async def process_requests(self, use_durable_queue: bool = True):
+        """Processa requisições na fila
+        
+        Args:
+            use_durable_queue: recuperar e reivindicar a fila persistente (daemon);
+                desligado em execuções avulsas da CLI, que não devem assumir o
+                backlog do daemon
+        """
         self.logger.info("🔄 Iniciando processamento de requisições...")
         
         max_concurrent = self.config['hub']['max_concurrent_requests']
+        self._slots = asyncio.Semaphore(max_concurrent)
+        
+        # Um despachante por provedor: um provedor saturado não bloqueia os demais
+        dispatchers = []
+        for provider, state in self.providers.items():
+            state['event'] = asyncio.Event()
+            state['semaphore'] = asyncio.Semaphore(state['max_concurrent'])
+            dispatchers.append(self._dispatch_provider(provider))
+        
+        self._prune_warp_outputs()
+        
+        if self.durable_queue is not None and use_durable_queue:
+            self._recover_durable_queue()
+            dispatchers.append(self._durable_queue_loop())
+        
+        await asyncio.gather(*dispatchers)
+
+    def _submit_stored(self, row: Dict[str, Any]):
+        """Re-submete uma requisição lida da fila persistente mantendo seu ID"""
+        try:
+            self.submit_request(
+                row['provider'], row['operation'], row['parameters'], row['priority'],
+                request_id=row['id']
+            )
+        except Exception as e:
+            # Provedor/operação inválidos: registrar falha para quem consultar o resultado
+            request = AIRequest(
+                id=row['id'],
+                provider=AIProvider.AUTO,
+                operation=row['operation'],
+                parameters=row['parameters'],
+                status=RequestStatus.FAILED,
+                error=str(e)
+            )
+            self.logger.error(f"❌ Requisição persistida rejeitada: {row['id']} - {e}")
+            self._remember_completed(request)
+
+    def _recover_durable_queue(self):
+        """Recupera requisições pendentes ou interrompidas em execuções anteriores"""
+        queue_config = self.config.get('queue', {})
+        pruned = self.durable_queue.prune(queue_config.get('retention_hours', 24))
+        
+        rows = self.durable_queue.recover()
+        for row in rows:
+            self._submit_stored(row)
+        
+        if rows or pruned:
+            self.logger.info(
+                f"♻️ Fila persistente: {len(rows)} requisições recuperadas, {pruned} antigas removidas"
+            )
+
+    async def _durable_queue_loop(self):
+        """Grava escritas em lote e aceita requisições enfileiradas pela CLI"""
+        queue_config = self.config.get('queue', {})
+        flush_interval = queue_config.get('flush_interval', 0.05)
+        poll_interval = queue_config.get('poll_interval', 0.5)
+        next_poll = 0.0
         
         while True:
-            # Processar requisições pendentes
-            while (
-                self.request_queue and 
-                len(self.active_requests) < max_concurrent
-            ):
-                request = self.request_queue.pop(0)
-                self.active_requests[request.id] = request
+            try:
+                if time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + poll_interval
+                    for row in self.durable_queue.claim_external():
+                        self._submit_stored(row)
                 
-                # Processar requisição de forma assíncrona
-                asyncio.create_task(self._process_single_request(request))
+                self.durable_queue.flush()
+            except sqlite3.Error as e:
+                self.logger.error(f"❌ Erro na fila persistente: {e}")
             
-            # Aguardar um pouco antes da próxima verificação
-            await asyncio.sleep(1)
+            await asyncio.sleep(flush_interval)
+
+    def enqueue_for_daemon(
+        self,
+        provider: str,
+        operation: str,
+        parameters: Dict[str, Any],
+        priority: int = 5
+    ) -> str:
+        """Enfileira na fila persistente para ser processada pelo daemon em execução"""
+        if self.durable_queue is None:
+            raise ValueError("Fila persistente desabilitada na configuração")
+        
+        AIProvider(provider)
+        allowed_ops = self.config['operations']['allowed_commands']
+        emergency_ops = self.config['operations']['emergency_only']
+        if operation not in allowed_ops and operation not in emergency_ops:
+            raise ValueError(f"Operação não permitida: {operation}")
+        if provider == AIProvider.WARP_AGENT.value and AIProvider.WARP_AGENT in self.providers:
+            self._warp_command_name(operation, parameters)
+        
+        return DurableQueue.enqueue(
+            self.durable_queue.db_path, provider, operation, parameters, priority
+        )
+    
+    async def _dispatch_provider(self, provider: AIProvider):
+        """Despacha as requisições de um provedor respeitando seus limites"""
+        state = self.providers[provider]
+        queue = state['queue']
+        
+        while True:
+            # Dormir até que uma submissão acorde o despachante
+            if not queue:
+                state['event'].clear()
+                await state['event'].wait()
+                continue
+            
+            # Reservar vaga do provedor, token de taxa e vaga global antes de
+            # retirar da fila, para que requisições mais prioritárias
+            # submetidas nesse meio tempo passem na frente
+            await state['semaphore'].acquire()
+            if state['bucket'] is not None:
+                wait = state['bucket'].time_until_available()
+                if wait > 0:
+                    state['rate_limit_reset'] = datetime.now(timezone.utc) + timedelta(seconds=wait)
+                await state['bucket'].acquire()
+            await self._slots.acquire()
+            
+            _, _, request = heapq.heappop(queue)
+            batch = [request]
+            if self._is_batchable(request):
+                await self._fill_batch(state, batch)
+            
+            for item in batch:
+                self.pending_requests.pop(item.id, None)
+                self.active_requests[item.id] = item
+                item.status = RequestStatus.PROCESSING
+                self._persist_status(item)
+            state['active'] += 1
+            self._record_dispatch(state)
+            
+            # Processar requisição de forma assíncrona
+            if len(batch) == 1:
+                task = asyncio.create_task(self._process_single_request(request))
+            else:
+                # Uma chamada ao provedor para o lote; cada requisição finaliza
+                # pelo fluxo normal recebendo seu item da resposta
+                task = asyncio.ensure_future(self._execute_batch(provider, batch))
+                for item in batch:
+                    item.batch_task = task
+                    item_task = asyncio.create_task(self._process_single_request(item))
+                    self._tasks.add(item_task)
+                    item_task.add_done_callback(self._tasks.discard)
+            
+            self._tasks.add(task)
+            task.add_done_callback(
+                lambda done, state=state: self._on_request_done(done, state)
+            )
+    
+    # ============================================
+    # 📦 Agrupamento de Requisições em Lote
+    # ============================================
+
+    def _is_batchable(self, request: AIRequest) -> bool:
+        """Requisição pequena de API que pode dividir um prompt com outras"""
+        batching = self.config.get('batching', {})
+        if not batching.get('enabled', False) or not request.batchable:
+            return False
+        if request.stream or request.fallback_providers is not None:
+            return False
+        if self.providers[request.provider]['config'].get('local', False):
+            return False
+        if request.operation not in batching.get('operations', []):
+            return False
+        size = len(json.dumps(request.parameters, default=str))
+        return size <= batching.get('max_parameters_size', 2000)
+
+    async def _fill_batch(self, state: Dict[str, Any], batch: List[AIRequest]):
+        """Completa o lote com requisições compatíveis, esperando no máximo max_wait"""
+        batching = self.config.get('batching', {})
+        max_size = batching.get('max_batch_size', 8)
+        head = batch[0]
+        
+        # A janela conta desde a submissão: quem já esperou na fila não espera mais
+        waited = (datetime.now(timezone.utc) - head.created_at).total_seconds()
+        deadline = time.monotonic() + max(batching.get('max_wait', 0.2) - waited, 0)
+        
+        while True:
+            self._take_compatible(state['queue'], head, batch, max_size)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= max_size or remaining <= 0:
+                return
+            
+            state['event'].clear()
+            try:
+                await asyncio.wait_for(state['event'].wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def _take_compatible(self, queue: List[Tuple[int, int, AIRequest]], head: AIRequest,
+                         batch: List[AIRequest], max_size: int):
+        """Retira da fila, por prioridade, as requisições da mesma operação"""
+        room = max_size - len(batch)
+        if room <= 0:
+            return
+        
+        matches = sorted(
+            entry for entry in queue
+            if entry[2].operation == head.operation and self._is_batchable(entry[2])
+        )[:room]
+        if not matches:
+            return
+        
+        taken = {id(entry[2]) for entry in matches}
+        queue[:] = [entry for entry in queue if id(entry[2]) not in taken]
+        heapq.heapify(queue)
+        batch.extend(entry[2] for entry in matches)
+
+    async def _execute_batch(self, provider: AIProvider, batch: List[AIRequest]) -> Dict[str, Any]:
+        """Envia o lote em um único prompt e indexa os itens da resposta por ID"""
+        state = self.providers[provider]
+        start_time = time.monotonic()
+        self.stats['batches'] += 1
+        self.stats['batched_requests'] += len(batch)
+        self.logger.info(
+            f"📦 Lote de {len(batch)} requisições ({provider.value}) - {batch[0].operation}"
+        )
+        
+        try:
+            response = await self._process_api_provider(
+                batch[0], prompt=self._build_batch_prompt(batch)
+            )
+            items = self._parse_batch_response(provider, response)
+        except Exception:
+            self._record_attempt(state, None)
+            raise
+        
+        self._record_attempt(state, time.monotonic() - start_time)
+        batch_ids = {request.id for request in batch}
+        return {
+            item['id']: self._batch_item_response(provider, response, item)
+            for item in items
+            if isinstance(item, dict) and item.get('id') in batch_ids
+        }
+
+    def _build_batch_prompt(self, batch: List[AIRequest]) -> str:
+        """Constrói prompt único com um item por requisição do lote"""
+        operation = batch[0].operation
+        items = [{'id': request.id, 'parameters': request.parameters} for request in batch]
+        
+        return f"""
+Você é um assistente de IA especializado em operações de infraestrutura.
+Execute a operação "{operation}" para CADA item abaixo, de forma independente.
+
+Itens:
+{json.dumps(items, indent=2, ensure_ascii=False, default=str)}
+
+Contexto:
+- Este é um sistema de automação de organizações
+- Você deve seguir as melhores práticas de segurança
+- Forneça respostas estruturadas e acionáveis
+
+Responda SOMENTE com JSON no formato:
+{{"results": [{{"id": "<id do item>", "status": "success" ou "error", "data": {{}}, "message": "...", "next_actions": []}}]}}
+com exatamente um resultado por item, usando o mesmo "id".
+"""
+
+    def _parse_batch_response(self, provider: AIProvider, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Extrai a lista de resultados do JSON devolvido pelo modelo"""
+        if provider == AIProvider.CLAUDE:
+            text = ''.join(block.get('text', '') for block in response.get('content', []))
+        elif provider == AIProvider.GPT:
+            text = response['choices'][0]['message']['content']
+        elif provider == AIProvider.GEMINI:
+            text = ''.join(
+                part.get('text', '') for part in response['candidates'][0]['content']['parts']
+            )
+        else:
+            raise ValueError(f"Lote não suportado para: {provider}")
+        
+        # Modelos costumam envolver o JSON em blocos de código
+        start, end = text.find('{'), text.rfind('}')
+        if start < 0 or end < start:
+            raise ValueError("Resposta em lote sem JSON")
+        return json.loads(text[start:end + 1]).get('results', [])
+
+    def _batch_item_response(self, provider: AIProvider, response: Dict[str, Any],
+                             item: Dict[str, Any]) -> Dict[str, Any]:
+        """Resposta no formato do provedor contendo apenas o item da requisição
+        
+        Mantém o mesmo formato de uma chamada individual, para que o resultado não
+        dependa de a requisição ter sido agrupada; o ID do item é removido.
+        """
+        text = json.dumps(
+            {key: value for key, value in item.items() if key != 'id'},
+            ensure_ascii=False, default=str
+        )
+        model = response.get('model') or response.get('modelVersion')
+        if provider == AIProvider.CLAUDE:
+            return {
+                'type': 'message', 'role': 'assistant', 'model': model,
+                'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn'
+            }
+        if provider == AIProvider.GPT:
+            return {
+                'object': 'chat.completion', 'model': model,
+                'choices': [{
+                    'index': 0, 'message': {'role': 'assistant', 'content': text},
+                    'finish_reason': 'stop'
+                }]
+            }
+        return {
+            'modelVersion': model,
+            'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}]
+        }
+
+    async def _batched_result(self, request: AIRequest) -> Dict[str, Any]:
+        """Resultado da requisição dentro da resposta do lote"""
+        batch_task = request.batch_task
+        # shield: cancelar uma requisição não cancela a chamada do lote inteiro
+        results = await asyncio.shield(batch_task)
+        item = results.get(request.id)
+        if item is not None:
+            return item
+        
+        # Item ausente na resposta do modelo: executar individualmente
+        self.stats['batch_fallbacks'] += 1
+        self.logger.warning(f"⚠️ {request.id} ausente na resposta do lote, executando individualmente")
+        request.batch_task = None
+        request.batchable = False
+        bucket = self.providers[request.provider]['bucket']
+        if bucket is not None:
+            await bucket.acquire()
+        return await self._call_provider(request, request.provider)
+
+    def _on_request_done(self, task: asyncio.Task, state: Dict[str, Any]):
+        """Libera as vagas de concorrência ao fim de uma requisição"""
+        self._tasks.discard(task)
+        state['active'] -= 1
+        state['semaphore'].release()
+        self._slots.release()
     
     async def _process_single_request(self, request: AIRequest):
         """Processa uma única requisição"""
@@ -333,15 +1336,17 @@ class AIIntegrationHub:
             request.status = RequestStatus.PROCESSING
             self.logger.info(f"🔄 Processando: {request.id}")
             
-            # Executar baseado no provedor
-            if request.provider == AIProvider.WARP_AGENT:
-                result = await self._process_warp_agent(request)
+            # Streams não fazem hedge: saídas parciais de dois provedores se misturariam
+            if request.fallback_providers is not None and not request.stream:
+                result = await self._process_routed(request)
             else:
-                result = await self._process_api_provider(request)
+                result = await self._call_provider(request, request.provider)
+                request.served_by = request.provider
             
             request.result = result
             request.status = RequestStatus.COMPLETED
             self.stats['successful_requests'] += 1
+            self._store_in_cache(request)
             
             self.logger.info(f"✅ Concluído: {request.id}")
             
@@ -361,23 +1366,433 @@ class AIIntegrationHub:
             # Remover da lista ativa
             if request.id in self.active_requests:
                 del self.active_requests[request.id]
+            self._remember_completed(request)
+            
+            if request.stream_queue is not None:
+                request.stream_queue.put_nowait(None)
             
+            self._resolve_followers(request)
+
+    async def _call_provider(self, request: AIRequest, provider: AIProvider) -> Dict[str, Any]:
+        """Executa a requisição em um provedor, medindo latência e erros"""
+        if request.batch_task is not None:
+            return await self._batched_result(request)
+        
+        attempt = request if provider == request.provider else replace(request, provider=provider)
+        state = self.providers[provider]
+        start_time = time.monotonic()
+        
+        try:
+            # Executar baseado no provedor
+            if provider == AIProvider.WARP_AGENT:
+                result = await self._process_warp_agent(attempt)
+            elif attempt.stream:
+                result = await self._process_api_stream(attempt)
+            else:
+                result = await self._process_api_provider(attempt)
+        except asyncio.CancelledError:
+            # Perdedor de um hedge: amostra de latência incompleta
+            raise
+        except Exception:
+            self._record_attempt(state, None)
+            raise
+        else:
+            self._record_attempt(state, time.monotonic() - start_time)
+            return result
+        finally:
             # Atualizar estatísticas do provedor
-            self.providers[request.provider]['requests_count'] += 1
-            self.providers[request.provider]['last_request'] = datetime.now(timezone.utc)
+            state['requests_count'] += 1
+            state['last_request'] = datetime.now(timezone.utc)
+
+    def _record_attempt(self, state: Dict[str, Any], latency: Optional[float]):
+        """Atualiza EWMA de latência e taxa de erro do provedor"""
+        alpha = self.config.get('routing', {}).get('ewma_alpha', 0.2)
+        error = 1.0 if latency is None else 0.0
+        state['error_ewma'] = alpha * error + (1 - alpha) * state['error_ewma']
+        
+        if latency is not None:
+            state['latencies'].append(latency)
+            if state['latency_ewma'] is None:
+                state['latency_ewma'] = latency
+            else:
+                state['latency_ewma'] = alpha * latency + (1 - alpha) * state['latency_ewma']
+
+    # ============================================
+    # 🧭 Roteamento Automático e Hedging
+    # ============================================
+
+    def _rank_providers(self) -> List[AIProvider]:
+        """Ordena provedores de API prontos pelo tempo esperado de resposta"""
+        default_latency = self.config.get('routing', {}).get('default_hedge_delay', 15.0)
+        scored = []
+        
+        for provider, state in self.providers.items():
+            if state['status'] != 'ready' or state['config'].get('local', False):
+                continue
+            
+            # Provedores sem amostras começam otimistas para serem explorados
+            latency = state['latency_ewma'] if state['latency_ewma'] is not None else default_latency / 2
+            backlog = 1 + (len(state['queue']) + state['active']) / state['max_concurrent']
+            success = max(1 - state['error_ewma'], 0.05)
+            scored.append((latency * backlog / success, provider.value, provider))
+        
+        return [provider for _, _, provider in sorted(scored)]
+
+    def _latency_percentile(self, provider: AIProvider, percentile: float) -> Optional[float]:
+        """Percentil de latência observado do provedor"""
+        samples = sorted(self.providers[provider]['latencies'])
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+    def _hedge_delay(self, provider: AIProvider) -> float:
+        """Tempo de espera pelo primário antes de disparar o hedge"""
+        routing = self.config.get('routing', {})
+        if len(self.providers[provider]['latencies']) < routing.get('min_samples', 10):
+            return routing.get('default_hedge_delay', 15.0)
+        
+        threshold = self._latency_percentile(provider, routing.get('hedge_percentile', 95))
+        return max(threshold, routing.get('min_hedge_delay', 2.0))
+
+    def _take_fallback(self, candidates: List[AIProvider]) -> Optional[AIProvider]:
+        """Próximo provedor reserva com status pronto e token de taxa disponível"""
+        for provider in list(candidates):
+            state = self.providers[provider]
+            if state['status'] != 'ready':
+                candidates.remove(provider)
+                continue
+            if state['bucket'] is None or state['bucket'].try_acquire():
+                candidates.remove(provider)
+                self._record_dispatch(state)
+                return provider
+        return None
+
+    def _release_fallback(self, provider: AIProvider):
+        self.providers[provider]['active'] -= 1
+
+    async def _process_routed(self, request: AIRequest) -> Dict[str, Any]:
+        """Executa no primário e faz hedge/failover para os provedores reserva"""
+        candidates = list(request.fallback_providers)
+        attempts: Dict[asyncio.Task, AIProvider] = {}
+        hedge_delay = self._hedge_delay(request.provider)
+        hedged = False
+        last_error: Optional[BaseException] = None
+        
+        def launch(provider: AIProvider):
+            task = asyncio.ensure_future(self._call_provider(request, provider))
+            attempts[task] = provider
+            if provider != request.provider:
+                # Tentativas extras contam na concorrência do provedor reserva
+                self.providers[provider]['active'] += 1
+                task.add_done_callback(
+                    lambda _, provider=provider: self._release_fallback(provider)
+                )
+        
+        launch(request.provider)
+        
+        try:
+            while attempts:
+                timeout = hedge_delay if candidates and not hedged else None
+                done, _ = await asyncio.wait(
+                    attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    # Primário acima do percentil de latência: disparar hedge
+                    hedged = True
+                    provider = self._take_fallback(candidates)
+                    if provider is not None:
+                        self.stats['hedged_requests'] += 1
+                        self.logger.info(
+                            f"🏁 Hedge: {request.id} também enviado para {provider.value} "
+                            f"após {hedge_delay:.1f}s"
+                        )
+                        launch(provider)
+                    continue
+                
+                for task in done:
+                    provider = attempts.pop(task)
+                    if task.exception() is None:
+                        request.served_by = provider
+                        if provider != request.provider:
+                            self.stats['hedge_wins'] += 1
+                        return task.result()
+                    last_error = task.exception()
+                    self.logger.warning(f"⚠️ {provider.value} falhou para {request.id}: {last_error}")
+                
+                # Falha antes do hedge: tentar imediatamente o próximo provedor
+                if not attempts:
+                    provider = self._take_fallback(candidates)
+                    if provider is not None:
+                        self.stats['failovers'] += 1
+                        launch(provider)
+            
+            raise last_error or Exception("Nenhum provedor disponível")
+        
+        finally:
+            # Cancelar o perdedor do hedge
+            for task in attempts:
+                task.cancel()
+            if attempts:
+                await asyncio.gather(*attempts, return_exceptions=True)
+
+    def _resolve_followers(self, leader: AIRequest):
+        """Entrega o resultado do líder às requisições agrupadas a ele"""
+        if self._inflight.get(leader.flight_key) is leader:
+            del self._inflight[leader.flight_key]
+        
+        # Líder interrompido antes de concluir (ex.: hub encerrado)
+        status = leader.status
+        if status not in (RequestStatus.COMPLETED, RequestStatus.FAILED):
+            status = RequestStatus.CANCELLED
+        
+        for follower in self._followers.pop(leader.id, []):
+            follower.status = status
+            follower.result = leader.result
+            follower.error = leader.error
+            follower.execution_time = leader.execution_time
+            if status == RequestStatus.COMPLETED:
+                self.stats['successful_requests'] += 1
+            elif status == RequestStatus.FAILED:
+                self.stats['failed_requests'] += 1
+            
+            self.pending_requests.pop(follower.id, None)
+            self._remember_completed(follower)
+
+    def _persist_status(self, request: AIRequest):
+        """Registra a mudança de status na fila persistente"""
+        if self.durable_queue is not None and not request.stream:
+            self.durable_queue.update(request)
+
+    def _remember_completed(self, request: AIRequest):
+        """Mantém um histórico limitado de requisições finalizadas"""
+        self._persist_status(request)
+        
+        size = len(json.dumps(request.result, default=str)) if request.result is not None else 0
+        if request.id in self._completed_meta:
+            self._completed_bytes -= self._completed_meta[request.id][1]
+        self.completed_requests[request.id] = request
+        self.completed_requests.move_to_end(request.id)
+        self._completed_meta[request.id] = (time.monotonic(), size)
+        self._completed_bytes += size
+        
+        self._evict_completed()
+
+    def _evict_completed(self):
+        """Despeja as requisições finalizadas mais antigas por quantidade, idade e tamanho"""
+        hub_config = self.config['hub']
+        limit = hub_config.get('completed_history', 1000)
+        max_bytes = hub_config.get('completed_max_bytes', 50 * 1024 * 1024)
+        oldest_allowed = time.monotonic() - hub_config.get('completed_ttl', 3600)
+        
+        while self.completed_requests:
+            oldest_id = next(iter(self.completed_requests))
+            completed_at, size = self._completed_meta[oldest_id]
+            if (len(self.completed_requests) <= limit
+                    and self._completed_bytes <= max_bytes
+                    and completed_at >= oldest_allowed):
+                break
+            del self.completed_requests[oldest_id]
+            del self._completed_meta[oldest_id]
+            self._completed_bytes -= size
+
+    def get_request(self, request_id: str) -> Optional[AIRequest]:
+        """Retorna uma requisição ativa ou finalizada recentemente"""
+        return (
+            self.pending_requests.get(request_id)
+            or self.active_requests.get(request_id)
+            or self.completed_requests.get(request_id)
+        )
+
+    def request_to_dict(self, request: AIRequest) -> Dict[str, Any]:
+        """Representação JSON de uma requisição para a API local"""
+        return {
+            'id': request.id,
+            'provider': request.provider.value,
+            'served_by': request.served_by.value if request.served_by else None,
+            'operation': request.operation,
+            'priority': request.priority,
+            'status': request.status.value,
+            'result': request.result,
+            'error': request.error,
+            'execution_time': request.execution_time,
+            'created_at': request.created_at.isoformat()
+        }
+
+    # ============================================
+    # 💾 Cache de Respostas
+    # ============================================
+
+    def _cache_ttl(self, request: AIRequest) -> float:
+        """TTL do cache para a operação (0 = não armazenar)"""
+        cache_config = self.config.get('cache', {})
+        return cache_config.get('ttl_per_operation', {}).get(
+            request.operation, cache_config.get('default_ttl', 0)
+        )
+
+    def _request_key(self, request: AIRequest) -> str:
+        """Identidade da requisição: provedor, modelo, operação e parâmetros canônicos"""
+        ignored = set(self.config.get('cache', {}).get('ignored_parameters', []))
+        parameters = {k: v for k, v in request.parameters.items() if k not in ignored}
+        if request.fallback_providers is not None:
+            # Requisições roteadas são equivalentes qualquer que seja o primário
+            return ResponseCache.make_key(AIProvider.AUTO.value, None, request.operation, parameters)
+        model = self.providers[request.provider]['config'].get('model')
+        return ResponseCache.make_key(request.provider.value, model, request.operation, parameters)
+
+    def _cache_key(self, request: AIRequest, request_key: str) -> Optional[str]:
+        """Chave de cache da requisição, ou None quando ela deve ignorar o cache"""
+        if self.cache is None:
+            return None
+        
+        # Emergências e pedidos explícitos sempre vão ao provedor
+        if (request.operation in self.config['operations']['emergency_only']
+                or request.parameters.get('no_cache')):
+            self.cache.stats['bypassed'] += 1
+            return None
+        
+        # Execuções reais do Warp Agent têm efeitos colaterais
+        if request.provider == AIProvider.WARP_AGENT and not request.parameters.get('dry_run', True):
+            self.cache.stats['bypassed'] += 1
+            return None
+        
+        if self._cache_ttl(request) <= 0:
+            return None
+        
+        return request_key
+
+    def _store_in_cache(self, request: AIRequest):
+        """Armazena a resposta bem-sucedida no cache"""
+        if request.cache_key is None or request.result is None:
+            return
+        
+        try:
+            self.cache.set(
+                request.cache_key, request.provider.value, request.operation,
+                request.result, self._cache_ttl(request)
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Falha ao gravar cache: {e}")
+
+    @staticmethod
+    def _resolve_path(path: str) -> Path:
+        """Resolve caminhos relativos ao diretório atual ou à raiz do repositório"""
+        candidate = Path(path)
+        if candidate.is_absolute() or candidate.exists():
+            return candidate
+        return Path(__file__).resolve().parent.parent / candidate
+
+    def _warp_command_name(self, operation: str, parameters: Dict[str, Any]) -> str:
+        """Comando do manual correspondente à operação (somente pela tabela de aliases)
+        
+        Um ``command`` nos parâmetros só é aceito se for o próprio comando da
+        operação: a validação de operações permitidas não pode ser contornada.
+        """
+        aliases = self.providers[AIProvider.WARP_AGENT]['config'].get('command_aliases', {})
+        command_name = aliases.get(operation, operation)
+        requested = parameters.get('command')
+        if requested is not None and requested != command_name:
+            raise ValueError(f"Comando não permitido para a operação {operation}: {requested}")
+        return command_name
+
+    def _get_warp_bot(self):
+        """Carrega AIManualParser/AIOperationsBot uma única vez por processo"""
+        with self._warp_bot_lock:
+            if self._warp_bot is None:
+                config = self.providers[AIProvider.WARP_AGENT]['config']
+                
+                # Nome do script tem hífen: carregar pelo caminho do arquivo
+                spec = importlib.util.spec_from_file_location(
+                    'ai_manual_parser', self._resolve_path(config['parser_script'])
+                )
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                
+                manual_parser = module.AIManualParser(str(self._resolve_path(config['manual_path'])))
+                manual_parser.parse_manual()
+                self._warp_bot = module.AIOperationsBot(manual_parser)
+                self.logger.info(
+                    f"📖 Manual carregado em processo: {len(manual_parser.commands)} comandos"
+                )
+            return self._warp_bot
+
+    def _execute_manual_command(self, command_name: str, dry_run: bool) -> Dict[str, Any]:
+        """Executa um comando do manual (roda em thread do executor)"""
+        return self._get_warp_bot().execute_command(command_name, dry_run=dry_run)
 
     async def _process_warp_agent(self, request: AIRequest) -> Dict[str, Any]:
         """Processa requisição para Warp Agent (local)"""
-        parser_script = self.providers[AIProvider.WARP_AGENT]['config']['parser_script']
+        state = self.providers[AIProvider.WARP_AGENT]
+        command_name = self._warp_command_name(request.operation, request.parameters)
+        dry_run = request.parameters.get('dry_run', True)
+        
+        if state['config'].get('execution', 'in_process') == 'subprocess':
+            return await self._process_warp_subprocess(request, command_name, dry_run)
         
-        # Construir comando
-        cmd_parts = ['python', parser_script]
+        # Execução real pode bloquear por minutos: fora do event loop
+        if self._warp_executor is None:
+            self._warp_executor = ThreadPoolExecutor(
+                max_workers=state['max_concurrent'], thread_name_prefix='warp-agent'
+            )
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self._warp_executor, self._execute_manual_command, command_name, dry_run
+        )
+        
+        if not result['success']:
+            raise Exception(f"Warp Agent error: {result.get('error')}")
+        
+        # Saídas grandes seguem a mesma política de cauda + arquivo do modo subprocesso
+        output = result.get('output') or ''
+        output_config = self.config.get('warp_output', {})
+        tail_bytes = output_config.get('tail_bytes', 64 * 1024)
+        output_file = None
+        if len(output) > tail_bytes:
+            output_dir = Path(output_config.get('output_dir', 'ai_hub_outputs'))
+            output_dir.mkdir(parents=True, exist_ok=True)
+            spool = OutputSpool(output_dir / f"{request.id}.log.gz", tail_bytes)
+            spool.write(output)
+            spool.close()
+            output_file = str(spool.path)
+            output = spool.text()
+        
+        if request.stream_queue is not None and output:
+            request.stream_queue.put_nowait({
+                'request_id': request.id,
+                'provider': request.provider.value,
+                'index': 0,
+                'delta': output
+            })
+        
+        return {
+            'command': command_name,
+            'success': True,
+            'dry_run': result.get('dry_run', dry_run),
+            'output': output,
+            # O bot já pode ter descartado o início da saída (íntegra em log_file)
+            'output_truncated': bool(result.get('output_truncated')) or output_file is not None,
+            'output_bytes': result.get('output_bytes', len(result.get('output') or '')),
+            'output_file': output_file,
+            'log_file': result.get('log_file'),
+            'return_code': result.get('return_code'),
+            'execution_mode': 'in_process'
+        }
+
+    async def _process_warp_subprocess(self, request: AIRequest, command_name: str,
+                                       dry_run: bool) -> Dict[str, Any]:
+        """Executa o parser do manual em um subprocesso isolado"""
+        config = self.providers[AIProvider.WARP_AGENT]['config']
         
-        if request.operation in self.config['operations']['allowed_commands']:
-            cmd_parts.extend(['--command', f'"{request.operation}"'])
+        # Construir comando (argumentos vão direto ao exec, sem aspas extras)
+        cmd_parts = [
+            sys.executable, str(self._resolve_path(config['parser_script'])),
+            '--manual', str(self._resolve_path(config['manual_path'])),
+            '--command', command_name
+        ]
         
         # Adicionar parâmetros
-        if request.parameters.get('dry_run', True):
+        if dry_run:
             cmd_parts.append('--dry-run')
         
         # Executar comando
@@ -387,22 +1802,151 @@ class AIIntegrationHub:
             stderr=asyncio.subprocess.PIPE
         )
         
-        stdout, stderr = await proc.communicate()
+        # Saída consumida em blocos: memória limitada independente do volume
+        output_config = self.config.get('warp_output', {})
+        tail_bytes = output_config.get('tail_bytes', 64 * 1024)
+        output_dir = Path(output_config.get('output_dir', 'ai_hub_outputs'))
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        spool = OutputSpool(output_dir / f"{request.id}.log.gz", tail_bytes)
+        stderr_spool = OutputSpool(None, tail_bytes)
+        chunk_index = itertools.count()
+        
+        async def pump(stream: asyncio.StreamReader, is_stderr: bool):
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            while True:
+                data = await stream.read(64 * 1024)
+                text = decoder.decode(data, final=not data)
+                if text:
+                    spool.write(text)
+                    if is_stderr:
+                        stderr_spool.write(text)
+                    elif request.stream_queue is not None:
+                        request.stream_queue.put_nowait({
+                            'request_id': request.id,
+                            'provider': request.provider.value,
+                            'index': next(chunk_index),
+                            'delta': text
+                        })
+                if not data:
+                    return
+        
+        try:
+            await asyncio.gather(pump(proc.stdout, False), pump(proc.stderr, True))
+            await proc.wait()
+        finally:
+            spool.close()
         
         if proc.returncode != 0:
-            raise Exception(f"Warp Agent error: {stderr.decode()}")
+            raise Exception(f"Warp Agent error: {stderr_spool.text()}")
         
         return {
-            'output': stdout.decode(),
+            'output': spool.text(),
+            'output_truncated': spool.truncated,
+            'output_bytes': spool.total_bytes,
+            'output_file': str(spool.path),
             'exit_code': proc.returncode,
-            'command': ' '.join(cmd_parts)
+            'command': command_name,
+            'execution_mode': 'subprocess'
         }
 
-    async def _process_api_provider(self, request: AIRequest) -> Dict[str, Any]:
+    def _prune_warp_outputs(self):
+        """Remove arquivos de saída do Warp Agent além do período de retenção"""
+        output_config = self.config.get('warp_output', {})
+        output_dir = Path(output_config.get('output_dir', 'ai_hub_outputs'))
+        if not output_dir.exists():
+            return
+        
+        cutoff = time.time() - output_config.get('retention_hours', 72) * 3600
+        removed = 0
+        for path in output_dir.glob('*.log.gz'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        
+        if removed:
+            self.logger.info(f"🧹 {removed} arquivos de saída antigos removidos de {output_dir}")
+
+    async def _process_api_provider(self, request: AIRequest, prompt: Optional[str] = None) -> Dict[str, Any]:
         """Processa requisição para provedor de API externa"""
         provider_config = self.providers[request.provider]['config']
+        headers = self._build_api_headers(request, provider_config)
         
-        # Preparar headers
+        # Preparar payload
+        payload = self._prepare_api_payload(request, provider_config, prompt)
+        
+        # Fazer requisição
+        url = self._build_api_url(request.provider, provider_config)
+        
+        timeout = aiohttp.ClientTimeout(total=self.config['hub']['request_timeout'])
+        
+        async with self.session.post(url, json=payload, headers=headers, timeout=timeout) as response:
+            await self._check_api_response(request, response)
+            return await response.json()
+
+    async def _process_api_stream(self, request: AIRequest) -> Dict[str, Any]:
+        """Consome a resposta SSE do provedor publicando cada trecho na fila do stream"""
+        provider_config = self.providers[request.provider]['config']
+        headers = self._build_api_headers(request, provider_config)
+        payload = self._prepare_api_payload(request, provider_config)
+        url = self._build_api_url(request.provider, provider_config)
+        
+        if request.provider == AIProvider.GEMINI:
+            url = url.replace(':generateContent?', ':streamGenerateContent?alt=sse&')
+        else:
+            payload['stream'] = True
+        
+        timeout = aiohttp.ClientTimeout(total=self.config['hub']['request_timeout'])
+        start_time = time.monotonic()
+        parts: List[str] = []
+        
+        async with self.session.post(url, json=payload, headers=headers, timeout=timeout) as response:
+            await self._check_api_response(request, response)
+            
+            # aiohttp entrega o corpo linha a linha conforme chega
+            async for raw_line in response.content:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                
+                delta = self._extract_stream_delta(request.provider, json.loads(data))
+                if not delta:
+                    continue
+                
+                if not parts:
+                    self.providers[request.provider]['ttft'].append(time.monotonic() - start_time)
+                parts.append(delta)
+                request.stream_queue.put_nowait({
+                    'request_id': request.id,
+                    'provider': request.provider.value,
+                    'index': len(parts) - 1,
+                    'delta': delta
+                })
+        
+        return {'text': ''.join(parts), 'streamed': True}
+
+    def _extract_stream_delta(self, provider: AIProvider, event: Dict[str, Any]) -> Optional[str]:
+        """Extrai o trecho de texto de um evento SSE de cada provedor"""
+        if provider == AIProvider.CLAUDE:
+            if event.get('type') == 'content_block_delta':
+                return event.get('delta', {}).get('text')
+        elif provider == AIProvider.GPT:
+            choices = event.get('choices') or [{}]
+            return (choices[0].get('delta') or {}).get('content')
+        elif provider == AIProvider.GEMINI:
+            candidates = event.get('candidates') or [{}]
+            parts = (candidates[0].get('content') or {}).get('parts') or []
+            return ''.join(part.get('text', '') for part in parts)
+        return None
+
+    def _build_api_headers(self, request: AIRequest, provider_config: Dict[str, Any]) -> Dict[str, str]:
+        """Monta headers com a autenticação do provedor"""
         headers = {'Content-Type': 'application/json'}
         
         # Adicionar autenticação
@@ -419,24 +1963,24 @@ class AIIntegrationHub:
             # Gemini usa API key na URL
             pass
         
-        # Preparar payload
-        payload = self._prepare_api_payload(request, provider_config)
-        
-        # Fazer requisição
-        url = self._build_api_url(request.provider, provider_config)
-        
-        timeout = aiohttp.ClientTimeout(total=self.config['hub']['request_timeout'])
+        return headers
+
+    async def _check_api_response(self, request: AIRequest, response: "aiohttp.ClientResponse"):
+        """Trata rate limit e erros HTTP da resposta do provedor"""
+        if response.status == 429:
+            # Respeitar Retry-After esvaziando o bucket do provedor
+            bucket = self.providers[request.provider]['bucket']
+            if bucket is not None:
+                bucket.penalize(float(response.headers.get('Retry-After', 60)))
         
-        async with self.session.post(url, json=payload, headers=headers, timeout=timeout) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                raise Exception(f"API error {response.status}: {error_text}")
-            
-            return await response.json()
+        if response.status != 200:
+            error_text = await response.text()
+            raise Exception(f"API error {response.status}: {error_text}")
 
-    def _prepare_api_payload(self, request: AIRequest, config: Dict[str, Any]) -> Dict[str, Any]:
+    def _prepare_api_payload(self, request: AIRequest, config: Dict[str, Any],
+                             prompt: Optional[str] = None) -> Dict[str, Any]:
         """Prepara payload para API do provedor"""
-        operation_prompt = self._build_operation_prompt(request)
+        operation_prompt = prompt or self._build_operation_prompt(request)
         
         if request.provider == AIProvider.CLAUDE:
             return {
@@ -537,13 +2081,40 @@ Responda no formato JSON com as seguintes chaves:
             'hub_status': 'active',
             'uptime_seconds': uptime.total_seconds(),
             'statistics': self.stats.copy(),
-            'queue_size': len(self.request_queue),
+            'queue_size': sum(len(config['queue']) for config in self.providers.values()),
             'active_requests': len(self.active_requests),
+            'completed_in_memory': {
+                'requests': len(self.completed_requests),
+                'approx_bytes': self._completed_bytes
+            },
+            'coalescing': {
+                'in_flight': len(self._inflight),
+                'coalesced_requests': self.stats['coalesced_requests'],
+                'waiting_followers': sum(len(f) for f in self._followers.values())
+            },
+            'batching': {
+                'batches': self.stats['batches'],
+                'batched_requests': self.stats['batched_requests'],
+                'avg_batch_size': round(
+                    self.stats['batched_requests'] / max(self.stats['batches'], 1), 2
+                ),
+                'fallbacks': self.stats['batch_fallbacks']
+            },
+            'cache': self.cache.get_stats() if self.cache else {'enabled': False},
+            'durable_queue': self.durable_queue.get_stats() if self.durable_queue else {'enabled': False},
             'providers': {
                 provider.value: {
                     'status': config['status'],
                     'requests_count': config['requests_count'],
-                    'last_request': config['last_request'].isoformat() if config['last_request'] else None
+                    'last_request': config['last_request'].isoformat() if config['last_request'] else None,
+                    'utilization': self._calculate_provider_utilization(config),
+                    'health': {
+                        'latency_ewma': round(config['latency_ewma'], 3) if config['latency_ewma'] is not None else None,
+                        'latency_p95': round(self._latency_percentile(provider, 95) or 0, 3) if config['latencies'] else None,
+                        'error_rate': round(config['error_ewma'] * 100, 1),
+                        'ttft_p50': self._ttft_percentile(config, 50),
+                        'ttft_p95': self._ttft_percentile(config, 95)
+                    }
                 }
                 for provider, config in self.providers.items()
             },
@@ -553,21 +2124,61 @@ Responda no formato JSON com as seguintes chaves:
                 ) * 100,
                 'avg_queue_wait': self._calculate_avg_wait_time(),
                 'provider_availability': self._calculate_provider_availability()
-            }
+            },
+            'kpis': self.kpi_engine.snapshot()
         }
 
+    def _ttft_percentile(self, config: Dict[str, Any], percentile: float) -> Optional[float]:
+        """Percentil do tempo até o primeiro token em requisições com streaming"""
+        samples = sorted(config['ttft'])
+        if not samples:
+            return None
+        return round(samples[min(len(samples) - 1, int(len(samples) * percentile / 100))], 3)
+
     def _calculate_avg_wait_time(self) -> float:
         """Calcula tempo médio de espera na fila"""
-        if not self.request_queue:
+        queued = [req for config in self.providers.values() for _, _, req in config['queue']]
+        if not queued:
             return 0.0
         
         now = datetime.now(timezone.utc)
         total_wait = sum(
             (now - req.created_at).total_seconds() 
-            for req in self.request_queue
+            for req in queued
         )
         
-        return total_wait / len(self.request_queue)
+        return total_wait / len(queued)
+
+    def _record_dispatch(self, state: Dict[str, Any]):
+        """Registra um despacho na janela deslizante de 60s do provedor"""
+        dispatched = state['dispatched_at']
+        now = time.monotonic()
+        dispatched.append(now)
+        while dispatched[0] < now - 60:
+            dispatched.popleft()
+
+    def _calculate_provider_utilization(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Calcula uso de taxa e concorrência de um provedor"""
+        # Janela deslizante de 60s de despachos
+        dispatched = config['dispatched_at']
+        cutoff = time.monotonic() - 60
+        while dispatched and dispatched[0] < cutoff:
+            dispatched.popleft()
+        
+        rate_limit = config['config'].get('rate_limit')
+        bucket = config['bucket']
+        
+        return {
+            'queued': len(config['queue']),
+            'active': config['active'],
+            'max_concurrent': config['max_concurrent'],
+            'concurrency_utilization': round(config['active'] / config['max_concurrent'] * 100, 1),
+            'requests_last_minute': len(dispatched),
+            'rate_limit_per_minute': rate_limit,
+            'rate_utilization': round(len(dispatched) / rate_limit * 100, 1) if rate_limit else None,
+            'tokens_available': round(bucket.available(), 2) if bucket else None,
+            'rate_limit_reset': config['rate_limit_reset'].isoformat()
+        }
 
     def _calculate_provider_availability(self) -> Dict[str, float]:
         """Calcula disponibilidade dos provedores"""
@@ -651,12 +2262,286 @@ Responda no formato JSON com as seguintes chaves:
         for cmd in self.config['operations']['emergency_only']:
             print(f"   • {cmd}")
 
+# ============================================
+# 🔌 API Local (Unix socket / HTTP)
+# ============================================
+
+MAX_API_REQUEST = 1024 * 1024
+FINAL_STATUSES = {'completed', 'failed', 'cancelled'}
+
+class HubAPIServer:
+    """API JSON local do daemon: submissão, status, consulta e stream de resultados
+    
+    Rotas:
+        GET  /healthz                  -> {"status": "ok"}
+        GET  /status                   -> get_status()
+        POST /requests                 -> {"request_id": ...} (ou NDJSON se "stream": true)
+        GET  /requests/<id>[?wait=s]   -> estado da requisição
+        GET  /requests/<id>/stream     -> NDJSON com os resultados parciais
+    """
+    
+    def __init__(self, hub: 'AIIntegrationHub', socket_path: Optional[str] = None,
+                 port: Optional[int] = None):
+        self.hub = hub
+        self.socket_path = socket_path
+        self.port = port
+        self.logger = hub.logger
+    
+    async def serve_forever(self):
+        """Inicia os servidores configurados até o cancelamento"""
+        servers = []
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                await self._check_socket_free()
+                # Socket órfão de um daemon anterior impede o bind
+                os.unlink(self.socket_path)
+            servers.append(await asyncio.start_unix_server(
+                self.handle_connection, path=self.socket_path, limit=MAX_API_REQUEST
+            ))
+            os.chmod(self.socket_path, 0o600)
+            self.logger.info(f"🔌 API local em unix://{self.socket_path}")
+        if self.port:
+            servers.append(await asyncio.start_server(
+                self.handle_connection, '127.0.0.1', self.port, limit=MAX_API_REQUEST
+            ))
+            self.logger.info(f"🔌 API local em http://127.0.0.1:{self.port}")
+        
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            for server in servers:
+                server.close()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+    
+    async def _check_socket_free(self):
+        """Recusa iniciar se outro daemon ainda atende no socket existente"""
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.socket_path), timeout=1.0
+            )
+        except (OSError, asyncio.TimeoutError):
+            return
+        writer.close()
+        raise RuntimeError(f"Outro daemon já atende em unix://{self.socket_path}")
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode('latin-1').split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+            
+            length = int(headers.get('content-length', 0))
+            if length > MAX_API_REQUEST:
+                raise ValueError("request body too large")
+            body = await reader.readexactly(length) if length else b''
+            
+            await self._route(method, target, body, writer)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            self._write_json(writer, '400 Bad Request', {'error': str(e) or 'bad request'})
+        except Exception as e:
+            self.logger.error(f"❌ Erro na API local: {e}")
+            self._write_json(writer, '500 Internal Server Error', {'error': str(e)})
+        
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def _route(self, method: str, target: str, body: bytes, writer: asyncio.StreamWriter):
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+        query = parse_qs(url.query)
+        
+        if method == 'GET' and parts == ['healthz']:
+            self._write_json(writer, '200 OK', {'status': 'ok'})
+        
+        elif method == 'GET' and parts == ['status']:
+            self._write_json(writer, '200 OK', self.hub.get_status())
+        
+        elif method == 'POST' and parts == ['requests']:
+            payload = json.loads(body or b'{}')
+            try:
+                request_id = self.hub.submit_request(
+                    payload['provider'],
+                    payload['operation'],
+                    payload.get('parameters', {}),
+                    int(payload.get('priority', 5)),
+                    stream=bool(payload.get('stream', False))
+                )
+            except (KeyError, ValueError) as e:
+                self._write_json(writer, '400 Bad Request', {'error': str(e)})
+                return
+            
+            if payload.get('stream'):
+                await self._write_stream(writer, request_id)
+            else:
+                self._write_json(writer, '202 Accepted', {'request_id': request_id})
+        
+        elif method == 'GET' and len(parts) in (2, 3) and parts[0] == 'requests':
+            request = self.hub.get_request(parts[1])
+            stored = self._stored_request(parts[1]) if request is None and len(parts) == 2 else None
+            if stored is not None:
+                # Já despejada da memória: estado gravado na fila persistente
+                self._write_json(writer, '200 OK', stored)
+            elif request is None:
+                self._write_json(writer, '404 Not Found', {'error': f'Requisição não encontrada: {parts[1]}'})
+            elif len(parts) == 3 and parts[2] == 'stream':
+                await self._write_stream(writer, request.id)
+            else:
+                wait = float(query.get('wait', ['0'])[0])
+                await self._wait_for(request, wait)
+                self._write_json(writer, '200 OK', self.hub.request_to_dict(request))
+        
+        else:
+            self._write_json(writer, '404 Not Found', {'error': 'rota não encontrada'})
+    
+    def _stored_request(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Requisição finalizada consultada na fila persistente, no formato da API"""
+        durable_queue = self.hub.durable_queue
+        if durable_queue is None:
+            return None
+        durable_queue.flush()
+        stored = DurableQueue.lookup(durable_queue.db_path, request_id)
+        if stored is None:
+            return None
+        return {'served_by': None, 'execution_time': None, **stored}
+    
+    async def _wait_for(self, request: AIRequest, timeout: float):
+        """Long polling: aguarda a requisição terminar por até ``timeout`` segundos"""
+        deadline = time.monotonic() + timeout
+        while request.status.value not in FINAL_STATUSES and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+    
+    def _write_json(self, writer: asyncio.StreamWriter, status: str, data: Any):
+        body = json.dumps(data, default=str, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode('latin-1')
+        )
+        writer.write(body)
+    
+    async def _write_stream(self, writer: asyncio.StreamWriter, request_id: str):
+        """Envia os resultados parciais como NDJSON até a requisição terminar"""
+        writer.write(
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/x-ndjson\r\n"
+            "Connection: close\r\n\r\n".encode('latin-1')
+        )
+        request = self.hub.get_request(request_id)
+        
+        if request.stream_queue is not None:
+            async for chunk in self.hub.iter_stream(request_id):
+                writer.write(json.dumps(chunk, default=str, ensure_ascii=False).encode('utf-8') + b"\n")
+                await writer.drain()
+        else:
+            # Requisição sem streaming: um único item final
+            await self._wait_for(request, self.hub.config['hub']['request_timeout'])
+            final = self.hub.request_to_dict(request)
+            final['done'] = True
+            writer.write(json.dumps(final, default=str, ensure_ascii=False).encode('utf-8') + b"\n")
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection sobre Unix domain socket"""
+    
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class HubClient:
+    """Cliente leve (somente stdlib) da API local do daemon"""
+    
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, port: Optional[int] = None,
+                 timeout: float = 330):
+        self.socket_path = socket_path
+        self.port = port
+        self.timeout = timeout
+    
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.port:
+            return http.client.HTTPConnection('127.0.0.1', self.port, timeout=self.timeout)
+        return _UnixHTTPConnection(self.socket_path, self.timeout)
+    
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None):
+        conn = self._connection()
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        return conn, conn.getresponse()
+    
+    def _json(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        conn, response = self._request(method, path, payload)
+        try:
+            data = json.loads(response.read() or b'{}')
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise ValueError(data.get('error', f'HTTP {response.status}'))
+        return data
+    
+    def is_available(self) -> bool:
+        """Verifica se há um daemon respondendo"""
+        try:
+            return self._json('GET', '/healthz').get('status') == 'ok'
+        except (OSError, ValueError, http.client.HTTPException):
+            return False
+    
+    def status(self) -> Dict[str, Any]:
+        return self._json('GET', '/status')
+    
+    def submit(self, provider: str, operation: str, parameters: Dict[str, Any],
+               priority: int = 5) -> str:
+        return self._json('POST', '/requests', {
+            'provider': provider,
+            'operation': operation,
+            'parameters': parameters,
+            'priority': priority
+        })['request_id']
+    
+    def result(self, request_id: str, wait: float = 0) -> Dict[str, Any]:
+        return self._json('GET', f'/requests/{request_id}?wait={wait}')
+    
+    def stream(self, provider: str, operation: str, parameters: Dict[str, Any],
+               priority: int = 5):
+        """Submete em modo streaming e itera os itens NDJSON conforme chegam"""
+        conn, response = self._request('POST', '/requests', {
+            'provider': provider,
+            'operation': operation,
+            'parameters': parameters,
+            'priority': priority,
+            'stream': True
+        })
+        try:
+            if response.status >= 400:
+                raise ValueError(json.loads(response.read() or b'{}').get('error'))
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
 # ============================================
 # 🚀 Função Principal
 # ============================================
 
-async def main():
-    """Função principal do hub"""
+def build_parser() -> argparse.ArgumentParser:
+    """Monta o parser da linha de comando"""
     parser = argparse.ArgumentParser(
         description="🤖 AI Integration Hub - Hub Central de Múltiplas IAs"
     )
@@ -665,6 +2550,10 @@ async def main():
         '--config', 
         help='Arquivo de configuração customizado'
     )
+    parser.add_argument(
+        '--socket', 
+        help=f'Unix socket da API local do daemon (padrão: {DEFAULT_SOCKET_PATH})'
+    )
     
     subparsers = parser.add_subparsers(dest='command', help='Comandos disponíveis')
     
@@ -681,7 +2570,7 @@ async def main():
     
     # Comando request - fazer requisição
     request_parser = subparsers.add_parser('request', help='Fazer requisição para IA')
-    request_parser.add_argument('provider', help='Provedor de IA')
+    request_parser.add_argument('provider', help='Provedor de IA (ou "auto" para roteamento automático)')
     request_parser.add_argument('operation', help='Operação a executar')
     request_parser.add_argument(
         '--parameters', 
@@ -694,6 +2583,21 @@ async def main():
         default=5, 
         help='Prioridade (1-10)'
     )
+    request_parser.add_argument(
+        '--stream', 
+        action='store_true', 
+        help='Processar imediatamente exibindo a resposta conforme chega'
+    )
+    
+    # Comando result - consultar resultado
+    result_parser = subparsers.add_parser('result', help='Consultar resultado de uma requisição')
+    result_parser.add_argument('request_id', help='ID da requisição')
+    result_parser.add_argument(
+        '--wait', 
+        type=float, 
+        default=0, 
+        help='Aguardar a conclusão por até N segundos'
+    )
     
     # Comando list - listar informações
     list_parser = subparsers.add_parser('list', help='Listar informações')
@@ -701,19 +2605,82 @@ async def main():
     list_subparsers.add_parser('providers', help='Listar provedores')
     list_subparsers.add_parser('operations', help='Listar operações')
     
-    args = parser.parse_args()
+    return parser
+
+def print_stream(chunks) -> None:
+    """Imprime os itens de um stream conforme chegam"""
+    for chunk in chunks:
+        if chunk.get('done'):
+            print()
+            if chunk.get('error'):
+                raise Exception(chunk['error'])
+        else:
+            print(chunk['delta'], end='', flush=True)
+
+def run_client_command(args: argparse.Namespace) -> bool:
+    """
+    Executa status/request/result no daemon em execução via API local
+    
+    Returns:
+        False quando não há daemon respondendo (o comando roda localmente)
+    """
+    if args.command not in ('status', 'request', 'result'):
+        return False
+    
+    client = HubClient(args.socket or DEFAULT_SOCKET_PATH)
+    if not client.is_available():
+        return False
     
+    if args.command == 'status':
+        print("📊 Status do AI Integration Hub:")
+        print("=" * 50)
+        print(json.dumps(client.status(), indent=2, default=str))
+    
+    elif args.command == 'request':
+        try:
+            parameters = json.loads(args.parameters)
+            if args.stream:
+                print_stream(client.stream(args.provider, args.operation, parameters, args.priority))
+            else:
+                request_id = client.submit(args.provider, args.operation, parameters, args.priority)
+                print(f"✅ Requisição submetida ao daemon: {request_id}")
+        except Exception as e:
+            print(f"❌ Erro ao submeter requisição: {e}")
+            sys.exit(1)
+    
+    elif args.command == 'result':
+        try:
+            print(json.dumps(client.result(args.request_id, args.wait), indent=2, default=str))
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    
+    return True
+
+async def main(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Função principal do hub"""
     # Executar comando
     async with AIIntegrationHub(args.config) as hub:
         
         if args.command == 'start':
+            # Processamento e API local rodam juntos no daemon
+            workers = [hub.process_requests()]
+            api_config = hub.config.get('api', {})
+            if api_config.get('enabled', False):
+                api = HubAPIServer(
+                    hub,
+                    args.socket or api_config.get('socket_path'),
+                    api_config.get('port')
+                )
+                workers.append(api.serve_forever())
+            
             if args.daemon:
                 print("🚀 Iniciando AI Hub em modo daemon...")
-                await hub.process_requests()
+                await asyncio.gather(*workers)
             else:
                 print("🚀 AI Hub inicializado. Use Ctrl+C para parar.")
                 try:
-                    await hub.process_requests()
+                    await asyncio.gather(*workers)
                 except KeyboardInterrupt:
                     print("\n👋 AI Hub finalizado.")
         
@@ -726,17 +2693,51 @@ async def main():
         elif args.command == 'request':
             try:
                 parameters = json.loads(args.parameters)
-                request_id = hub.submit_request(
-                    args.provider,
-                    args.operation, 
-                    parameters,
-                    args.priority
-                )
-                print(f"✅ Requisição submetida: {request_id}")
+                
+                if args.stream:
+                    # Apenas a requisição do stream: o backlog persistente é do daemon
+                    worker = asyncio.create_task(hub.process_requests(use_durable_queue=False))
+                    try:
+                        async for chunk in hub.stream_request(
+                            args.provider, args.operation, parameters, args.priority
+                        ):
+                            print_stream([chunk])
+                    finally:
+                        worker.cancel()
+                    return
+                
+                # O processo da CLI termina logo: entregar ao daemon pela fila persistente
+                if hub.durable_queue is not None:
+                    request_id = hub.enqueue_for_daemon(
+                        args.provider,
+                        args.operation,
+                        parameters,
+                        args.priority
+                    )
+                    print(f"✅ Requisição enfileirada para o daemon: {request_id}")
+                else:
+                    request_id = hub.submit_request(
+                        args.provider,
+                        args.operation, 
+                        parameters,
+                        args.priority
+                    )
+                    print(f"✅ Requisição submetida: {request_id}")
             except Exception as e:
                 print(f"❌ Erro ao submeter requisição: {e}")
                 sys.exit(1)
         
+        elif args.command == 'result':
+            # Sem daemon: consultar o que foi gravado na fila persistente
+            stored = None
+            if hub.durable_queue is not None:
+                hub.durable_queue.flush()
+                stored = DurableQueue.lookup(hub.durable_queue.db_path, args.request_id)
+            if stored is None:
+                print(f"❌ Requisição não encontrada: {args.request_id}")
+                sys.exit(1)
+            print(json.dumps(stored, indent=2, default=str))
+        
         elif args.command == 'list':
             if args.list_type == 'providers':
                 hub.list_providers()
@@ -749,10 +2750,14 @@ async def main():
             parser.print_help()
 
 if __name__ == "__main__":
+    parser = build_parser()
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        # Comandos cliente não instanciam o hub nem importam aiohttp
+        if not run_client_command(args):
+            asyncio.run(main(args, parser))
     except KeyboardInterrupt:
         print("\n👋 AI Integration Hub finalizado.")
     except Exception as e:
         print(f"❌ Erro crítico: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -10,13 +10,23 @@ import os
 import re
 import sys
 import json
+import hashlib
 import subprocess
 import logging
 import argparse
-from datetime import datetime
+import time
+import signal
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
-import yaml
+
+# Raiz do repositório no path para os utilitários compartilhados
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.utils.kpi_engine import KPIEngine
 
 
 # Configurar logging
@@ -30,15 +40,328 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Estrutura de um comando no manual (linha a linha)
+COMMAND_HEADER = re.compile(r'^### COMANDO: (.+)$')
+COMMAND_FIELD = re.compile(r'^\*\*(Descrição|Pré-requisitos|Verificação|Troubleshooting):\*\* (.*)$')
+COMMAND_CODE_LABEL = '**Comando:**'
+CODE_FENCE = '```'
+
+FIELD_KEYS = {
+    'Descrição': 'description',
+    'Pré-requisitos': 'prerequisites',
+    'Verificação': 'verification',
+    'Troubleshooting': 'troubleshooting'
+}
+REQUIRED_FIELDS = ('description', 'prerequisites', 'command', 'verification', 'troubleshooting')
+
+# Índice compilado do manual; invalidado por mtime/tamanho e hash do conteúdo
+INDEX_VERSION = 1
+DEFAULT_INDEX_CACHE = os.getenv('AI_MANUAL_INDEX_CACHE', '.ai_manual_index.json')
+
+# Rotinas como DAG: comando -> comandos que precisam terminar antes dele.
+# Uma lista exige que as dependências tenham sucesso; em {'requires': [...],
+# 'after': [...]}, 'after' apenas ordena e o comando roda mesmo se elas falharem
+DEFAULT_ROUTINES = {
+    'daily': {
+        'Verificar Status do Sistema': [],
+        'Executar Health Check': [],
+        'Gerar Dashboard': [],
+        # O motor de KPIs é alimentado pelo health check e pelo dashboard
+        'Calcular KPIs': ['Executar Health Check', 'Gerar Dashboard'],
+        # Remove __pycache__ e relatórios antigos: só depois dos comandos Python,
+        # mas sempre executada, como antes das rotinas em DAG
+        'Limpeza do Sistema': {'after': [
+            'Verificar Status do Sistema',
+            'Executar Health Check',
+            'Gerar Dashboard',
+            'Calcular KPIs'
+        ]}
+    },
+    'weekly': {
+        'Executar Automação Principal': [],
+        'Atualizar Submódulos MCP': [],
+        'Backup de Configuração': ['Atualizar Submódulos MCP'],
+        'Validar Estrutura': []
+    },
+    'emergency': {
+        'Diagnóstico Completo': [],
+        'Validar Estrutura': [],
+        'Calcular KPIs': []
+    }
+}
+
+# Comandos que a rotina executa de verdade após o dry run
+SAFE_ROUTINE_COMMANDS = {
+    'Verificar Status do Sistema',
+    'Gerar Dashboard',
+    'Calcular KPIs',
+    'Limpeza do Sistema',
+    'Diagnóstico Completo',
+    'Validar Estrutura'
+}
+
+DEFAULT_ROUTINES_FILE = os.getenv('AI_ROUTINES_FILE')
+DEFAULT_ROUTINE_PARALLELISM = int(os.getenv('AI_ROUTINE_PARALLELISM', '4'))
+
+# Execução de comandos: saída completa em arquivo, apenas a cauda em memória
+COMMAND_TIMEOUT = int(os.getenv('AI_COMMAND_TIMEOUT', '300'))
+OUTPUT_TAIL_BYTES = int(os.getenv('AI_OUTPUT_TAIL_BYTES', str(64 * 1024)))
+EXECUTION_LOG_DIR = os.getenv('AI_EXECUTION_LOG_DIR', 'ai_operations_logs')
+
+
+class OutputTail:
+    """Últimas linhas de uma saída, limitadas a ``max_bytes``.
+    
+    ``total_bytes`` conta toda a saída recebida, inclusive o que foi descartado.
+    """
+    
+    def __init__(self, max_bytes: int = OUTPUT_TAIL_BYTES):
+        self.max_bytes = max_bytes
+        self.lines = deque()
+        self.size = 0
+        self.total_bytes = 0
+        self.truncated = False
+    
+    def append(self, line: str):
+        self.lines.append(line)
+        self.size += len(line)
+        self.total_bytes += len(line)
+        while self.size > self.max_bytes and len(self.lines) > 1:
+            self.size -= len(self.lines.popleft())
+            self.truncated = True
+    
+    def text(self) -> str:
+        return ''.join(self.lines)
+
+
+DEFAULT_JOURNAL_PATH = os.getenv('AI_EXECUTION_JOURNAL', 'ai_operations_journal.db')
+REPORT_WINDOW_DAYS = int(os.getenv('AI_REPORT_WINDOW_DAYS', '30'))
+
+
+class ExecutionJournal:
+    """Histórico de execuções append-only em SQLite (WAL).
+    
+    Cada execução vira uma linha; os relatórios usam agregações indexadas
+    por comando e data em vez de carregar o histórico em memória.
+    """
+    
+    def __init__(self, db_path: str = DEFAULT_JOURNAL_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS executions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                command TEXT NOT NULL,
+                success INTEGER NOT NULL,
+                dry_run INTEGER NOT NULL,
+                duration REAL,
+                return_code INTEGER,
+                error TEXT,
+                output_length INTEGER NOT NULL DEFAULT 0,
+                log_file TEXT
+            )
+            """
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_executions_command ON executions (command, timestamp)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_executions_timestamp ON executions (timestamp)")
+        self.db.commit()
+    
+    def record(self, entry: Dict[str, Any]):
+        """Acrescentar uma execução ao histórico."""
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO executions "
+                "(timestamp, command, success, dry_run, duration, return_code, error, output_length, log_file) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry['timestamp'], entry['command_name'], int(entry['success']), int(entry['dry_run']),
+                    entry.get('duration_seconds'), entry.get('return_code'), entry.get('error'),
+                    entry.get('output_length', 0), entry.get('log_file')
+                )
+            )
+    
+    def summary(self, since: str) -> Dict[str, int]:
+        """Totais de execuções a partir de ``since``."""
+        with self.lock:
+            row = self.db.execute(
+                """
+                SELECT COUNT(*) AS total,
+                       COALESCE(SUM(success), 0) AS successes,
+                       COALESCE(SUM(dry_run), 0) AS dry_runs
+                FROM executions WHERE timestamp >= ?
+                """,
+                (since,)
+            ).fetchone()
+        return {
+            'total_executions': row['total'],
+            'successful_executions': row['successes'],
+            'failed_executions': row['total'] - row['successes'],
+            'dry_runs': row['dry_runs'],
+            'real_executions': row['total'] - row['dry_runs']
+        }
+    
+    def command_stats(self, since: str) -> Dict[str, Dict[str, Any]]:
+        """Taxa de sucesso, p50/p95 de duração e sequência de falhas por comando (execuções reais)."""
+        stats = {}
+        with self.lock:
+            rows = self.db.execute(
+                """
+                SELECT command, COUNT(*) AS executions, SUM(success) AS successes,
+                       COUNT(duration) AS timed, MAX(timestamp) AS last_run
+                FROM executions
+                WHERE dry_run = 0 AND timestamp >= ?
+                GROUP BY command
+                """,
+                (since,)
+            ).fetchall()
+            
+            for row in rows:
+                command = row['command']
+                stats[command] = {
+                    'executions': row['executions'],
+                    'success_rate': round(row['successes'] / row['executions'] * 100, 1),
+                    'p50_duration': self._duration_percentile(command, since, row['timed'], 0.50),
+                    'p95_duration': self._duration_percentile(command, since, row['timed'], 0.95),
+                    'failure_streak': self._failure_streak(command),
+                    'last_run': row['last_run']
+                }
+        return stats
+    
+    def _duration_percentile(self, command: str, since: str, count: int, quantile: float) -> Optional[float]:
+        if not count:
+            return None
+        # Linha de ordem k dentro do intervalo do comando (índice command, timestamp)
+        row = self.db.execute(
+            """
+            SELECT duration FROM executions
+            WHERE command = ? AND dry_run = 0 AND timestamp >= ? AND duration IS NOT NULL
+            ORDER BY duration LIMIT 1 OFFSET ?
+            """,
+            (command, since, int(round(quantile * (count - 1))))
+        ).fetchone()
+        return round(row['duration'], 3) if row else None
+    
+    def _failure_streak(self, command: str) -> int:
+        """Falhas reais consecutivas desde o último sucesso do comando."""
+        row = self.db.execute(
+            """
+            SELECT COUNT(*) AS streak FROM executions
+            WHERE command = ? AND dry_run = 0 AND success = 0
+              AND timestamp > COALESCE(
+                  (SELECT MAX(timestamp) FROM executions
+                   WHERE command = ? AND dry_run = 0 AND success = 1), '')
+            """,
+            (command, command)
+        ).fetchone()
+        return row['streak']
+    
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Últimas execuções, da mais antiga para a mais recente."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT timestamp, command AS command_name, success, dry_run, duration AS duration_seconds, "
+                "error, output_length FROM executions ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        recent = []
+        for row in reversed(rows):
+            entry = dict(row)
+            entry['success'] = bool(entry['success'])
+            entry['dry_run'] = bool(entry['dry_run'])
+            recent.append(entry)
+        return recent
+    
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def routine_edges(deps: Any) -> Tuple[List[str], List[str]]:
+    """Dependências de um comando da rotina: (obrigatórias, apenas de ordem)."""
+    if isinstance(deps, dict):
+        return list(deps.get('requires') or []), list(deps.get('after') or [])
+    return list(deps or []), []
+
+
+def load_routines(routines_file: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Carregar rotinas do YAML (se informado) sobre as rotinas padrão.
+
+    Formato esperado::
+
+        daily:
+          Gerar Dashboard: []
+          Calcular KPIs: [Gerar Dashboard]
+          Limpeza do Sistema:
+            after: [Gerar Dashboard, Calcular KPIs]
+    """
+    routines = {name: dict(graph) for name, graph in DEFAULT_ROUTINES.items()}
+    if not routines_file:
+        return routines
+    
+    import yaml  # Necessário apenas quando há arquivo de rotinas
+    
+    with open(routines_file, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    
+    for name, graph in data.items():
+        if isinstance(graph, list):
+            graph = {command: [] for command in graph}
+        routines[name] = {}
+        for command, deps in graph.items():
+            requires, after = routine_edges(deps)
+            routines[name][command] = {'requires': requires, 'after': after} if after else requires
+    
+    logger.info(f"📋 Rotinas carregadas de {routines_file}: {', '.join(data)}")
+    return routines
+
+
+def validate_routine(graph: Dict[str, Any]) -> None:
+    """Garantir que a rotina é um DAG com dependências conhecidas."""
+    edges = {}
+    for command, deps in graph.items():
+        requires, after = routine_edges(deps)
+        edges[command] = requires + after
+    for command, deps in edges.items():
+        unknown = [dep for dep in deps if dep not in graph]
+        if unknown:
+            raise ValueError(f"Dependências fora da rotina para {command}: {', '.join(unknown)}")
+    
+    # Kahn: se sobrar comando sem ordenar, há ciclo
+    pending = {command: len(deps) for command, deps in edges.items()}
+    ready = [command for command, count in pending.items() if count == 0]
+    ordered = 0
+    while ready:
+        current = ready.pop()
+        ordered += 1
+        for command, deps in edges.items():
+            if current in deps:
+                pending[command] -= 1
+                if pending[command] == 0:
+                    ready.append(command)
+    
+    if ordered != len(graph):
+        cyclic = [command for command, count in pending.items() if count > 0]
+        raise ValueError(f"Ciclo de dependências na rotina: {', '.join(cyclic)}")
+
 
 class AIManualParser:
     """Parser para extrair comandos do manual de operações."""
     
-    def __init__(self, manual_path: Optional[str] = None):
+    def __init__(self, manual_path: Optional[str] = None, index_cache: Optional[str] = None,
+                 use_cache: bool = True):
         """Inicializar parser."""
         self.root_dir = Path(__file__).parent.parent
         self.manual_path = Path(manual_path) if manual_path else self.root_dir / "docs" / "ai-operations-manual.md"
+        self.index_cache = Path(index_cache or DEFAULT_INDEX_CACHE)
+        self.use_cache = use_cache
         self.commands = {}
+        self.parsed = False
         
         if not self.manual_path.exists():
             raise FileNotFoundError(f"Manual não encontrado: {self.manual_path}")
@@ -46,36 +369,117 @@ class AIManualParser:
         logger.info(f"🤖 AI Manual Parser iniciado - Manual: {self.manual_path}")
     
     def parse_manual(self) -> Dict[str, Dict[str, Any]]:
-        """Extrair todos os comandos do manual."""
-        logger.info("📖 Parseando manual de operações...")
+        """Extrair todos os comandos do manual (usando o índice em cache quando válido)."""
+        stat = self.manual_path.stat()
+        index = self._load_index() if self.use_cache else None
         
-        with open(self.manual_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Caminho rápido: arquivo inalterado desde a última indexação
+        if index and index['mtime_ns'] == stat.st_mtime_ns and index['size'] == stat.st_size:
+            self.commands = index['commands']
+            self.parsed = True
+            logger.info(f"⚡ {len(self.commands)} comandos carregados do índice")
+            return self.commands
         
-        # Regex para extrair comandos
-        command_pattern = r'### COMANDO: (.+?)\n\*\*Descrição:\*\* (.+?)\n\*\*Pré-requisitos:\*\* (.+?)\n\*\*Comando:\*\*\n```bash\n(.*?)\n```\n\*\*Verificação:\*\* (.+?)\n\*\*Troubleshooting:\*\* (.+?)(?=\n###|\n---|\n##|\Z)'
+        with open(self.manual_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
         
-        matches = re.findall(command_pattern, content, re.DOTALL | re.MULTILINE)
+        if index and index['sha256'] == digest:
+            # Apenas o mtime mudou (checkout, touch): conteúdo idêntico
+            self.commands = index['commands']
+            logger.info(f"⚡ {len(self.commands)} comandos carregados do índice")
+        else:
+            logger.info("📖 Parseando manual de operações...")
+            self.commands = self._scan_commands(raw.decode('utf-8'))
+            logger.info(f"✅ {len(self.commands)} comandos extraídos do manual")
         
-        for match in matches:
-            command_name = match[0].strip()
-            description = match[1].strip()
-            prerequisites = match[2].strip()
-            command_code = match[3].strip()
-            verification = match[4].strip()
-            troubleshooting = match[5].strip()
+        self.parsed = True
+        if self.use_cache:
+            self._save_index(stat, digest)
+        return self.commands
+    
+    def _scan_commands(self, content: str) -> Dict[str, Dict[str, Any]]:
+        """Varre o manual em uma única passada, seção por seção."""
+        commands = {}
+        current: Optional[Dict[str, List[str]]] = None
+        name = None
+        field = None
+        in_code = False
+        
+        def finish():
+            if current is not None and all(key in current for key in REQUIRED_FIELDS):
+                entry = {key: '\n'.join(current[key]).strip() for key in REQUIRED_FIELDS}
+                entry['priority'] = self._determine_priority(name, entry['description'])
+                commands[name] = entry
+        
+        for line in content.splitlines():
+            if in_code:
+                if line == CODE_FENCE:
+                    in_code = False
+                    field = None
+                else:
+                    current['command'].append(line)
+                continue
             
-            self.commands[command_name] = {
-                'description': description,
-                'prerequisites': prerequisites,
-                'command': command_code,
-                'verification': verification,
-                'troubleshooting': troubleshooting,
-                'priority': self._determine_priority(command_name, description)
-            }
+            # Cabeçalhos e separadores encerram a seção anterior
+            if line.startswith('##') or line.startswith('---'):
+                finish()
+                header = COMMAND_HEADER.match(line)
+                current = {} if header else None
+                name = header.group(1).strip() if header else None
+                field = None
+                continue
+            
+            if current is None:
+                continue
+            
+            match = COMMAND_FIELD.match(line)
+            if match:
+                field = FIELD_KEYS[match.group(1)]
+                current[field] = [match.group(2)]
+            elif line == COMMAND_CODE_LABEL:
+                field = 'command'
+            elif field == 'command' and line.startswith(CODE_FENCE) and 'command' not in current:
+                current['command'] = []
+                in_code = True
+            elif field and field in current:
+                current[field].append(line)
         
-        logger.info(f"✅ {len(self.commands)} comandos extraídos do manual")
-        return self.commands
+        finish()
+        return commands
+    
+    def _load_index(self) -> Optional[Dict[str, Any]]:
+        """Carrega o índice em cache se corresponder a este manual e versão."""
+        if not self.index_cache.exists():
+            return None
+        try:
+            with open(self.index_cache, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Índice do manual ilegível, reconstruindo: {e}")
+            return None
+        
+        if index.get('version') != INDEX_VERSION or index.get('manual') != str(self.manual_path.resolve()):
+            return None
+        return index
+    
+    def _save_index(self, stat: os.stat_result, digest: str):
+        """Grava o índice de forma atômica."""
+        index = {
+            'version': INDEX_VERSION,
+            'manual': str(self.manual_path.resolve()),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest,
+            'commands': self.commands
+        }
+        tmp_path = self.index_cache.with_suffix(self.index_cache.suffix + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_cache)
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível gravar índice do manual: {e}")
     
     def _determine_priority(self, name: str, description: str) -> str:
         """Determinar prioridade do comando baseado em nome e descrição."""
@@ -97,7 +501,7 @@ class AIManualParser:
     
     def list_commands(self, priority_filter: Optional[str] = None) -> List[str]:
         """Listar comandos disponíveis, opcionalmente filtrados por prioridade."""
-        if not self.commands:
+        if not self.parsed:
             self.parse_manual()
         
         if priority_filter:
@@ -137,10 +541,15 @@ class AIManualParser:
 class AIOperationsBot:
     """Bot para execução automatizada de operações."""
     
-    def __init__(self, parser: AIManualParser):
+    def __init__(self, parser: AIManualParser, routines_file: Optional[str] = None,
+                 journal_path: Optional[str] = None):
         """Inicializar bot de operações."""
         self.parser = parser
-        self.execution_log = []
+        # Execuções desta sessão; o histórico completo fica no journal
+        self.execution_log = deque(maxlen=100)
+        self.journal = ExecutionJournal(journal_path or DEFAULT_JOURNAL_PATH)
+        self.kpi_engine = KPIEngine()
+        self.routines = load_routines(routines_file or DEFAULT_ROUTINES_FILE)
         
         logger.info("🤖 AI Operations Bot iniciado")
     
@@ -168,8 +577,9 @@ class AIOperationsBot:
     def execute_command(self, command_name: str, dry_run: bool = True) -> Dict[str, Any]:
         """Executar comando específico."""
         logger.info(f"🔄 Executando comando: {command_name} (dry_run={dry_run})")
+        started = time.monotonic()
         
-        if not self.parser.commands:
+        if not self.parser.parsed:
             self.parser.parse_manual()
         
         command_data = self.parser.get_command(command_name)
@@ -207,7 +617,7 @@ class AIOperationsBot:
         else:
             # Execução real
             try:
-                result = self._execute_bash_command(command_code)
+                result = self._execute_bash_command(command_code, command_name)
                 result['dry_run'] = False
                 result['command_data'] = command_data
                 
@@ -232,142 +642,266 @@ class AIOperationsBot:
             'success': result['success'],
             'dry_run': dry_run,
             'error': result.get('error'),
-            'output_length': len(result.get('output', ''))
+            # Tamanho real da saída, não só da cauda mantida em memória
+            'output_length': result.get('output_bytes', len(result.get('output', ''))),
+            'duration_seconds': round(time.monotonic() - started, 3),
+            'return_code': result.get('return_code'),
+            'log_file': result.get('log_file')
         }
         self.execution_log.append(execution_entry)
+        try:
+            self.journal.record(execution_entry)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Falha ao gravar execução no histórico: {e}")
+        
+        # Execuções reais alimentam a taxa de sucesso/erro dos KPIs
+        if not dry_run:
+            try:
+                self.kpi_engine.record_run('operations', result['success'])
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao atualizar KPIs: {e}")
         
         return result
     
-    def _execute_bash_command(self, command_code: str) -> Dict[str, Any]:
-        """Executar comando bash e capturar resultado."""
+    def _execution_log_path(self, command_name: str) -> Path:
+        """Arquivo de log dedicado a uma execução."""
+        log_dir = Path(EXECUTION_LOG_DIR)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r'[^a-z0-9]+', '-', command_name.lower()).strip('-') or 'comando'
+        return log_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{slug}.log"
+    
+    def _execute_bash_command(self, command_code: str, command_name: str = 'comando',
+                              timeout: int = COMMAND_TIMEOUT) -> Dict[str, Any]:
+        """Executar comando bash transmitindo a saída linha a linha.
+        
+        stdout/stderr vão para o logger e para um arquivo por execução;
+        em memória ficam apenas as caudas, preservadas também em timeout.
+        """
+        log_path = self._execution_log_path(command_name)
+        stdout_tail = OutputTail()
+        stderr_tail = OutputTail()
+        log_lock = threading.Lock()
+        
         try:
             # Preparar ambiente
             env = os.environ.copy()
             
-            # Executar comando
-            process = subprocess.run(
-                command_code,
-                shell=True,
-                cwd=self.parser.root_dir,
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=300  # 5 minutos timeout
-            )
+            with open(log_path, 'w', encoding='utf-8') as log_file:
+                # Nova sessão: o timeout encerra também os processos filhos do shell
+                process = subprocess.Popen(
+                    command_code,
+                    shell=True,
+                    cwd=self.parser.root_dir,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    errors='replace',
+                    env=env,
+                    start_new_session=True
+                )
+                
+                def pump(stream, tail: OutputTail, is_stderr: bool):
+                    for line in stream:
+                        tail.append(line)
+                        with log_lock:
+                            log_file.write(f"[stderr] {line}" if is_stderr else line)
+                        if is_stderr:
+                            logger.warning(f"[{command_name}] {line.rstrip()}")
+                        else:
+                            logger.info(f"[{command_name}] {line.rstrip()}")
+                    stream.close()
+                
+                readers = [
+                    threading.Thread(target=pump, args=(process.stdout, stdout_tail, False), daemon=True),
+                    threading.Thread(target=pump, args=(process.stderr, stderr_tail, True), daemon=True)
+                ]
+                for reader in readers:
+                    reader.start()
+                
+                timed_out = False
+                try:
+                    process.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    timed_out = True
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    process.wait()
+                
+                for reader in readers:
+                    reader.join(timeout=5)
             
-            return {
-                'success': process.returncode == 0,
-                'output': process.stdout,
-                'error': process.stderr if process.returncode != 0 else None,
-                'return_code': process.returncode
+            result = {
+                'success': process.returncode == 0 and not timed_out,
+                'output': stdout_tail.text(),
+                'output_truncated': stdout_tail.truncated,
+                'output_bytes': stdout_tail.total_bytes,
+                'log_file': str(log_path),
+                'return_code': -1 if timed_out else process.returncode
             }
+            if timed_out:
+                # Saída parcial preservada em 'output' e no arquivo de log
+                result['error'] = f'Comando excedeu timeout de {timeout}s'
+                if stderr_tail.lines:
+                    result['error'] += f"\n{stderr_tail.text()}"
+            else:
+                result['error'] = stderr_tail.text() if process.returncode != 0 else None
+            return result
             
-        except subprocess.TimeoutExpired:
-            return {
-                'success': False,
-                'output': '',
-                'error': 'Comando excedeu timeout de 5 minutos',
-                'return_code': -1
-            }
         except Exception as e:
             return {
                 'success': False,
-                'output': '',
+                'output': stdout_tail.text(),
+                'output_truncated': stdout_tail.truncated,
+                'output_bytes': stdout_tail.total_bytes,
                 'error': str(e),
+                'log_file': str(log_path),
                 'return_code': -1
             }
     
-    def run_routine(self, routine_type: str = 'daily') -> Dict[str, Any]:
-        """Executar rotina automatizada."""
-        logger.info(f"🔄 Executando rotina: {routine_type}")
+    def _run_routine_command(self, command_name: str) -> Dict[str, Any]:
+        """Executar um comando da rotina: dry run e, se seguro, execução real."""
+        logger.info(f"🔄 Executando: {command_name}")
+        started = time.monotonic()
+        
+        # Primeiro dry_run para validar
+        dry_result = self.execute_command(command_name, dry_run=True)
+        
+        if dry_result['success']:
+            # Se dry_run passou, executar real (mas só para comandos seguros)
+            if command_name in SAFE_ROUTINE_COMMANDS:
+                real_result = self.execute_command(command_name, dry_run=False)
+            else:
+                # Para comandos não seguros, apenas dry_run
+                real_result = dry_result
+                real_result['note'] = 'Executado apenas dry_run por segurança'
+        else:
+            real_result = dry_result
         
-        routines = {
-            'daily': [
-                'Verificar Status do Sistema',
-                'Executar Health Check',
-                'Gerar Dashboard',
-                'Calcular KPIs',
-                'Limpeza do Sistema'
-            ],
-            'weekly': [
-                'Executar Automação Principal',
-                'Atualizar Submódulos MCP',
-                'Backup de Configuração',
-                'Validar Estrutura'
-            ],
-            'emergency': [
-                'Diagnóstico Completo',
-                'Validar Estrutura',
-                'Calcular KPIs'
-            ]
+        return {
+            'command': command_name,
+            'success': real_result['success'],
+            'dry_run': real_result.get('dry_run', True),
+            'error': real_result.get('error'),
+            'note': real_result.get('note'),
+            'duration_seconds': round(time.monotonic() - started, 3)
         }
+    
+    def run_routine(self, routine_type: str = 'daily',
+                    max_parallel: int = DEFAULT_ROUTINE_PARALLELISM) -> Dict[str, Any]:
+        """Executar rotina automatizada respeitando o DAG de dependências.
+        
+        Comandos independentes rodam em paralelo (no máximo ``max_parallel``
+        processos ao mesmo tempo); dependentes de um comando com falha são pulados.
+        """
+        logger.info(f"🔄 Executando rotina: {routine_type}")
+        
+        graph = self.routines.get(routine_type, self.routines['daily'])
+        validate_routine(graph)
         
-        commands_to_run = routines.get(routine_type, routines['daily'])
         results = {
             'routine_type': routine_type,
             'start_time': datetime.now().isoformat(),
             'commands_executed': [],
             'success_count': 0,
             'failure_count': 0,
-            'total_commands': len(commands_to_run)
+            'total_commands': len(graph),
+            'max_parallel': max_parallel
         }
+        started = time.monotonic()
         
-        for command_name in commands_to_run:
-            logger.info(f"🔄 Executando: {command_name}")
-            
-            # Primeiro dry_run para validar
-            dry_result = self.execute_command(command_name, dry_run=True)
+        dependents = {command: [] for command in graph}
+        pending = {}
+        requires = {}
+        for command, deps in graph.items():
+            requires[command], after = routine_edges(deps)
+            pending[command] = len(requires[command]) + len(after)
+            for dep in requires[command] + after:
+                dependents[dep].append(command)
+        
+        entries: Dict[str, Dict[str, Any]] = {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_parallel), thread_name_prefix='routine') as executor:
+            running = {}
             
-            if dry_result['success']:
-                # Se dry_run passou, executar real (mas só para comandos seguros)
-                safe_commands = [
-                    'Verificar Status do Sistema',
-                    'Gerar Dashboard', 
-                    'Calcular KPIs',
-                    'Limpeza do Sistema',
-                    'Diagnóstico Completo',
-                    'Validar Estrutura'
-                ]
-                
-                if command_name in safe_commands:
-                    real_result = self.execute_command(command_name, dry_run=False)
-                else:
-                    # Para comandos não seguros, apenas dry_run
-                    real_result = dry_result
-                    real_result['note'] = 'Executado apenas dry_run por segurança'
-            else:
-                real_result = dry_result
+            def settle(command: str, entry: Dict[str, Any]):
+                # Libera dependentes; os de dependências obrigatórias com falha são
+                # pulados em cascata (dependências 'after' só ordenam)
+                stack = [(command, entry)]
+                while stack:
+                    name, name_entry = stack.pop()
+                    entries[name] = name_entry
+                    for child in dependents[name]:
+                        pending[child] -= 1
+                        if pending[child] > 0:
+                            continue
+                        failed = [dep for dep in requires[child] if not entries[dep]['success']]
+                        if failed:
+                            logger.warning(f"⏭️ Pulando {child}: dependência falhou ({', '.join(failed)})")
+                            stack.append((child, {
+                                'command': child,
+                                'success': False,
+                                'dry_run': True,
+                                'error': f"Dependência falhou: {', '.join(failed)}",
+                                'note': None,
+                                'skipped': True,
+                                'duration_seconds': 0.0
+                            }))
+                        else:
+                            running[executor.submit(self._run_routine_command, child)] = child
             
-            results['commands_executed'].append({
-                'command': command_name,
-                'success': real_result['success'],
-                'dry_run': real_result.get('dry_run', True),
-                'error': real_result.get('error'),
-                'note': real_result.get('note')
-            })
+            for command in graph:
+                if pending[command] == 0:
+                    running[executor.submit(self._run_routine_command, command)] = command
             
-            if real_result['success']:
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    command = running.pop(future)
+                    try:
+                        entry = future.result()
+                    except Exception as e:
+                        entry = {
+                            'command': command,
+                            'success': False,
+                            'dry_run': False,
+                            'error': str(e),
+                            'note': None,
+                            'duration_seconds': 0.0
+                        }
+                    settle(command, entry)
+        
+        # Resultados na ordem declarada da rotina
+        for command in graph:
+            entry = entries[command]
+            results['commands_executed'].append(entry)
+            if entry['success']:
                 results['success_count'] += 1
             else:
                 results['failure_count'] += 1
         
         results['end_time'] = datetime.now().isoformat()
-        results['success_rate'] = (results['success_count'] / results['total_commands']) * 100
+        results['elapsed_seconds'] = round(time.monotonic() - started, 3)
+        results['success_rate'] = (results['success_count'] / results['total_commands']) * 100 if graph else 0.0
         
-        logger.info(f"✅ Rotina {routine_type} concluída - Sucesso: {results['success_count']}/{results['total_commands']}")
+        logger.info(
+            f"✅ Rotina {routine_type} concluída em {results['elapsed_seconds']}s - "
+            f"Sucesso: {results['success_count']}/{results['total_commands']}"
+        )
         
         return results
     
-    def generate_report(self) -> Dict[str, Any]:
-        """Gerar relatório de execuções."""
+    def generate_report(self, window_days: int = REPORT_WINDOW_DAYS) -> Dict[str, Any]:
+        """Gerar relatório de execuções a partir do histórico persistido."""
+        since = (datetime.now() - timedelta(days=window_days)).isoformat()
+        
         report = {
             'generation_time': datetime.now().isoformat(),
-            'total_executions': len(self.execution_log),
-            'successful_executions': sum(1 for log in self.execution_log if log['success']),
-            'failed_executions': sum(1 for log in self.execution_log if not log['success']),
-            'dry_runs': sum(1 for log in self.execution_log if log['dry_run']),
-            'real_executions': sum(1 for log in self.execution_log if not log['dry_run']),
-            'recent_executions': self.execution_log[-10:],  # Últimas 10
+            'window_days': window_days,
+            **self.journal.summary(since),
+            'commands': self.journal.command_stats(since),
+            'recent_executions': self.journal.recent(10),  # Últimas 10
             'available_commands': len(self.parser.commands or {}),
             'command_categories': self.parser.get_commands_by_category() if self.parser.commands else {}
         }
@@ -384,16 +918,24 @@ def main():
     parser.add_argument('--dry-run', action='store_true', help='Executar apenas simulação (dry run)')
     parser.add_argument('--priority', '-p', choices=['alta', 'média', 'baixa'], help='Filtrar comandos por prioridade')
     parser.add_argument('--report', action='store_true', help='Gerar relatório de execuções')
+    parser.add_argument('--kpis', action='store_true', help='Exibir KPIs atuais e alertas')
+    parser.add_argument('--days', type=int, default=REPORT_WINDOW_DAYS, help='Janela do relatório em dias')
+    parser.add_argument('--journal', help='Banco SQLite do histórico de execuções')
     parser.add_argument('--manual', help='Caminho para manual personalizado')
+    parser.add_argument('--index-cache', help='Arquivo do índice compilado do manual')
+    parser.add_argument('--no-index-cache', action='store_true', help='Sempre reparsear o manual')
+    parser.add_argument('--routines', help='YAML com rotinas e dependências entre comandos')
+    parser.add_argument('--max-parallel', type=int, default=DEFAULT_ROUTINE_PARALLELISM,
+                        help='Máximo de comandos da rotina executando em paralelo')
     
     args = parser.parse_args()
     
     try:
         # Inicializar parser e bot
-        manual_parser = AIManualParser(args.manual)
+        manual_parser = AIManualParser(args.manual, args.index_cache, use_cache=not args.no_index_cache)
         manual_parser.parse_manual()
         
-        operations_bot = AIOperationsBot(manual_parser)
+        operations_bot = AIOperationsBot(manual_parser, args.routines, args.journal)
         
         if args.list:
             # Listar comandos
@@ -431,28 +973,45 @@ def main():
         
         elif args.routine:
             # Executar rotina
-            result = operations_bot.run_routine(args.routine)
+            result = operations_bot.run_routine(args.routine, args.max_parallel)
             
             print(f"\n🔄 Resultado da Rotina: {args.routine.upper()}")
             print("=" * 50)
             print(f"Comandos executados: {result['success_count']}/{result['total_commands']}")
             print(f"Taxa de sucesso: {result['success_rate']:.1f}%")
+            print(f"Tempo total: {result['elapsed_seconds']}s (paralelismo: {result['max_parallel']})")
             
             print(f"\n📋 Detalhes dos Comandos:")
             for cmd in result['commands_executed']:
                 status = "✅" if cmd['success'] else "❌"
                 mode = "🧪" if cmd.get('dry_run') else "🚀"
-                print(f"  {status} {mode} {cmd['command']}")
+                print(f"  {status} {mode} {cmd['command']} ({cmd.get('duration_seconds', 0)}s)")
                 if cmd.get('error'):
                     print(f"    ⚠️ {cmd['error']}")
                 if cmd.get('note'):
                     print(f"    ℹ️ {cmd['note']}")
         
+        elif args.kpis:
+            # KPIs mantidos incrementalmente pelos produtores (sem varrer relatórios)
+            kpis = operations_bot.kpi_engine.snapshot(str(manual_parser.root_dir))
+            
+            print('📊 KPIs Atuais:')
+            for kpi, value in kpis.items():
+                if kpi != 'alerts':
+                    print(f'  • {kpi}: {value if value is not None else "sem dados"}')
+            
+            if kpis['alerts']:
+                print('\n🚨 ALERTAS:')
+                for alert in kpis['alerts']:
+                    print(f'  ⚠️ {alert}')
+            else:
+                print('\n✅ Todos os KPIs dentro dos limites')
+        
         elif args.report:
             # Gerar relatório
-            report = operations_bot.generate_report()
+            report = operations_bot.generate_report(args.days)
             
-            print(f"\n📊 Relatório de Execuções")
+            print(f"\n📊 Relatório de Execuções (últimos {report['window_days']} dias)")
             print("=" * 50)
             print(f"Total de execuções: {report['total_executions']}")
             print(f"Sucessos: {report['successful_executions']}")
@@ -461,6 +1020,15 @@ def main():
             print(f"Execuções reais: {report['real_executions']}")
             print(f"Comandos disponíveis: {report['available_commands']}")
             
+            if report['commands']:
+                print(f"\n📋 Execuções reais por comando:")
+                for name, stats in sorted(report['commands'].items()):
+                    streak = f" | ⚠️ {stats['failure_streak']} falhas seguidas" if stats['failure_streak'] else ""
+                    print(
+                        f"  • {name}: {stats['executions']} execuções, {stats['success_rate']}% sucesso, "
+                        f"p50 {stats['p50_duration']}s, p95 {stats['p95_duration']}s{streak}"
+                    )
+            
             # Salvar relatório
             report_file = f"ai_operations_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             with open(report_file, 'w') as f:
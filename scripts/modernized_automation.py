@@ -13,13 +13,119 @@ import os
 import sys
 import json
 import logging
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import subprocess
 import yaml
 
+# Raiz do repositório no path para os utilitários compartilhados
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.utils.kpi_engine import KPIEngine
+
+# Paralelismo entre repositórios e timeout de cada chamada à API
+MAX_WORKERS = int(os.getenv('MODERNIZATION_MAX_WORKERS', '8'))
+REQUEST_TIMEOUT = int(os.getenv('MODERNIZATION_TIMEOUT', '30'))
+# Chamadas independentes dentro de um repositório (status, segurança)
+CALLS_PER_REPO = 4
+# Rate limit (primário e secundário): novas tentativas e espera máxima por tentativa
+RATE_LIMIT_RETRIES = int(os.getenv('MODERNIZATION_RATE_LIMIT_RETRIES', '3'))
+RATE_LIMIT_MAX_WAIT = int(os.getenv('MODERNIZATION_RATE_LIMIT_MAX_WAIT', '120'))
+# Espera padrão do GitHub para limite secundário sem Retry-After
+SECONDARY_RATE_LIMIT_WAIT = 60
+
+# Segurança: 'org' aplica uma code security configuration da organização em lote;
+# 'repo' usa apenas chamadas por repositório (somente para o que falta)
+SECURITY_MODE = os.getenv('MODERNIZATION_SECURITY_MODE', 'org')
+SECURITY_CONFIGURATION_NAME = 'org-automation-modern'
+# Apenas Dependabot e CodeQL são ligados; os demais recursos ficam 'not_set' para que
+# anexar a configuração não altere o que cada repositório já tem
+SECURITY_CONFIGURATION = {
+    "name": SECURITY_CONFIGURATION_NAME,
+    "description": "Dependabot alerts/security updates e CodeQL default setup (org-automation)",
+    "dependency_graph": "enabled",
+    "dependabot_alerts": "enabled",
+    "dependabot_security_updates": "enabled",
+    "code_scanning_default_setup": "enabled",
+    "dependency_graph_autosubmit_action": "not_set",
+    "secret_scanning": "not_set",
+    "secret_scanning_push_protection": "not_set",
+    "secret_scanning_validity_checks": "not_set",
+    "secret_scanning_non_provider_patterns": "not_set",
+    "private_vulnerability_reporting": "not_set",
+    "enforcement": "unenforced"
+}
+ATTACHED_STATUSES = 'attached,attaching,updating,enforced'
+ATTACH_BATCH_SIZE = 100
+
+# Manifestos -> ecossistema do Dependabot (detectados na árvore do repositório)
+MANIFEST_ECOSYSTEMS = {
+    'package.json': 'npm',
+    'pyproject.toml': 'pip',
+    'go.mod': 'gomod',
+    'pom.xml': 'maven',
+    'Dockerfile': 'docker'
+}
+ECOSYSTEM_LABELS = {
+    'pip': 'python',
+    'npm': 'npm',
+    'maven': 'java',
+    'gomod': 'golang',
+    'docker': 'docker',
+    'github-actions': 'github-actions'
+}
+# Ecossistema pela linguagem principal, quando a árvore não está disponível
+LANGUAGE_ECOSYSTEMS = {
+    'python': 'pip',
+    'javascript': 'npm',
+    'typescript': 'npm',
+    'java': 'maven',
+    'go': 'gomod'
+}
+IGNORED_TREE_DIRS = {'node_modules', 'vendor', '.git', '.venv', 'venv', 'site-packages'}
+DEPENDABOT_CONFIG_PATHS = {'.github/dependabot.yml', '.github/dependabot.yaml'}
+
+# Política moderna de proteção do branch padrão
+MODERN_BRANCH_PROTECTION = {
+    "required_status_checks": {
+        "strict": True,
+        "contexts": ["ci-build-test", "security-audit"]
+    },
+    "enforce_admins": False,
+    "required_pull_request_reviews": {
+        "required_approving_review_count": 1,
+        "dismiss_stale_reviews": True,
+        "require_code_owner_reviews": True,
+        "require_last_push_approval": False
+    },
+    "restrictions": None,  # Sem restrições de push
+    "allow_force_pushes": False,
+    "allow_deletions": False,
+    "block_creations": False,
+    "required_conversation_resolution": True
+}
+# Seções que podem ser corrigidas isoladamente (PATCH); as demais exigem o PUT completo
+PROTECTION_SUBRESOURCES = ("required_status_checks", "required_pull_request_reviews")
+# Valor mais rígido de cada opção: valores atuais mais rígidos que a política são mantidos
+STRICTER_PROTECTION_VALUES = {
+    "strict": True,
+    "enforce_admins": True,
+    "dismiss_stale_reviews": True,
+    "require_code_owner_reviews": True,
+    "require_last_push_approval": True,
+    "allow_force_pushes": False,
+    "allow_deletions": False,
+    "block_creations": True,
+    "required_conversation_resolution": True
+}
+# Opções fora da política, copiadas da proteção atual no PUT completo
+PRESERVED_PROTECTION_FLAGS = ("required_linear_history", "lock_branch", "allow_fork_syncing")
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -49,6 +155,32 @@ class ModernizedOrganizationAutomation:
             "X-GitHub-Api-Version": "2022-11-28"
         }
         
+        # Concorrência: sessão com pool de conexões dimensionado para as threads
+        self.max_workers = MAX_WORKERS
+        self.timeout = REQUEST_TIMEOUT
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_workers * CALLS_PER_REPO
+        )
+        self.session.mount('https://', adapter)
+        self._call_executor: Optional[ThreadPoolExecutor] = None
+        # _parallel_requests é chamado das threads dos repositórios
+        self._call_executor_lock = threading.Lock()
+        self.security_mode = SECURITY_MODE
+        # repo -> anexado agora à configuração de segurança da organização
+        self._security_handled: Dict[str, bool] = {}
+        # repo -> caminhos dos arquivos (uma listagem recursiva por repositório)
+        self._repo_trees: Dict[str, Optional[set]] = {}
+        # repo -> proteção atual do branch padrão (lida uma vez na verificação de status)
+        self._branch_protection: Dict[str, Optional[Dict]] = {}
+        self._stats_lock = threading.Lock()
+        # Escritas de conteúdo serializadas (um token por instância): o GitHub aplica
+        # limite secundário a requisições concorrentes que criam conteúdo
+        self._content_write_lock = threading.Lock()
+        self.api_calls = 0
+        self.rate_limited = 0
+        
         # Configurações modernizadas
         self.modern_tools = {
             'dependabot': True,
@@ -71,23 +203,60 @@ class ModernizedOrganizationAutomation:
             raise ValueError("Token GitHub não encontrado. Configure ORG_AUTOMATION_PAT ou GITHUB_TOKEN")
         return token
     
+    @staticmethod
+    def _rate_limit_wait(response: requests.Response, attempt: int) -> Optional[float]:
+        """Segundos a aguardar se a resposta é de rate limit (None se não for)."""
+        if response.status_code not in (403, 429):
+            return None
+        
+        headers = response.headers
+        if headers.get('Retry-After'):
+            try:
+                return float(headers['Retry-After'])
+            except ValueError:
+                pass
+        if headers.get('x-ratelimit-remaining') == '0' and headers.get('x-ratelimit-reset'):
+            return max(float(headers['x-ratelimit-reset']) - time.time(), 0) + 1
+        if response.status_code == 429 or 'rate limit' in response.text.lower():
+            # Limite secundário sem cabeçalhos: espera recomendada, crescente
+            return SECONDARY_RATE_LIMIT_WAIT * (2 ** attempt)
+        # 403 de permissão: não é rate limit
+        return None
+    
+    def _send(self, method: str, url: str, data: Optional[Dict] = None) -> requests.Response:
+        """Enviar a requisição respeitando o rate limit com novas tentativas limitadas."""
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            with self._stats_lock:
+                self.api_calls += 1
+            response = self.session.request(
+                method, url, json=data if method != 'GET' else None, timeout=self.timeout
+            )
+            
+            wait = self._rate_limit_wait(response, attempt)
+            if wait is None or attempt == RATE_LIMIT_RETRIES or wait > RATE_LIMIT_MAX_WAIT:
+                return response
+            
+            with self._stats_lock:
+                self.rate_limited += 1
+            logger.warning(f"⏳ Rate limit do GitHub ({response.status_code}): aguardando {wait:.0f}s")
+            time.sleep(wait)
+        return response
+    
     def _make_request(self, endpoint: str, method: str = 'GET', data: Optional[Dict] = None) -> Optional[Dict]:
         """Fazer requisição para API GitHub com tratamento de erro."""
         url = f"{self.api_base}/{endpoint}"
         
+        if method not in ('GET', 'POST', 'PUT', 'PATCH'):
+            raise ValueError(f"Método HTTP não suportado: {method}")
+        
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=self.headers)
-            elif method == 'POST':
-                response = requests.post(url, headers=self.headers, json=data)
-            elif method == 'PUT':
-                response = requests.put(url, headers=self.headers, json=data)
-            elif method == 'PATCH':
-                response = requests.patch(url, headers=self.headers, json=data)
+            if method == 'PUT' and '/contents/' in endpoint:
+                with self._content_write_lock:
+                    response = self._send(method, url, data)
             else:
-                raise ValueError(f"Método HTTP não suportado: {method}")
+                response = self._send(method, url, data)
             
-            if response.status_code in [200, 201, 204]:
+            if response.status_code in [200, 201, 202, 204]:
                 return response.json() if response.content else {}
             else:
                 logger.warning(f"API request failed: {response.status_code} - {response.text}")
@@ -97,6 +266,41 @@ class ModernizedOrganizationAutomation:
             logger.error(f"Erro na requisição: {e}")
             return None
     
+    def _parallel_requests(self, calls: Dict[str, tuple]) -> Dict[str, Optional[Dict]]:
+        """Executar chamadas independentes em paralelo.
+        
+        Args:
+            calls: nome -> (endpoint, método, dados)
+        """
+        with self._call_executor_lock:
+            if self._call_executor is None:
+                self._call_executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers * CALLS_PER_REPO, thread_name_prefix='github-call'
+                )
+            executor = self._call_executor
+        futures = {
+            name: executor.submit(self._make_request, *call)
+            for name, call in calls.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+    
+    def _paginate(self, endpoint: str) -> Optional[List[Dict]]:
+        """Percorrer um endpoint paginado seguindo o cursor do header Link."""
+        url = f"{self.api_base}/{endpoint}"
+        items = []
+        while url:
+            try:
+                response = self._send('GET', url)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Erro na requisição: {e}")
+                return None
+            if response.status_code != 200:
+                logger.warning(f"API request failed: {response.status_code} - {response.text}")
+                return None
+            items.extend(response.json())
+            url = response.links.get('next', {}).get('url')
+        return items
+    
     def get_organization_repos(self) -> List[Dict]:
         """Obter repositórios da organização."""
         logger.info("📊 Obtendo repositórios da organização...")
@@ -125,58 +329,127 @@ class ModernizedOrganizationAutomation:
         logger.info(f"✅ Encontrados {len(repos)} repositórios")
         return repos
     
+    @staticmethod
+    def _default_branch(repo: Dict) -> str:
+        """Branch padrão do repositório (informado na listagem da organização)."""
+        return repo.get('default_branch') or 'main'
+    
     def check_modern_tools_status(self, repo: Dict) -> Dict[str, bool]:
         """Verificar status das ferramentas modernas em um repositório."""
         repo_name = repo['name']
+        branch = self._default_branch(repo)
         status = {}
         
-        # Verificar Dependabot
-        endpoint = f"repos/{self.org_name}/{repo_name}/vulnerability-alerts"
-        dependabot_response = self._make_request(endpoint)
-        status['dependabot'] = dependabot_response is not None
+        # As quatro verificações são independentes
+        responses = self._parallel_requests({
+            'dependabot': (f"repos/{self.org_name}/{repo_name}/vulnerability-alerts",),
+            'codeql': (f"repos/{self.org_name}/{repo_name}/code-scanning/alerts",),
+            'workflows': (f"repos/{self.org_name}/{repo_name}/actions/workflows",),
+            'branch_protection': (f"repos/{self.org_name}/{repo_name}/branches/{branch}/protection",)
+        })
         
-        # Verificar CodeQL (GitHub Advanced Security)
-        endpoint = f"repos/{self.org_name}/{repo_name}/code-scanning/alerts"
-        codeql_response = self._make_request(endpoint)
-        status['codeql'] = codeql_response is not None
+        # Dependabot e CodeQL (GitHub Advanced Security)
+        status['dependabot'] = responses['dependabot'] is not None
+        status['codeql'] = responses['codeql'] is not None
         
         # Verificar se tem workflow de CI/CD moderno
-        endpoint = f"repos/{self.org_name}/{repo_name}/actions/workflows"
-        workflows_response = self._make_request(endpoint)
+        workflows_response = responses['workflows']
         has_modern_ci = False
+        status['has_workflows'] = bool(workflows_response and workflows_response.get('workflows'))
         if workflows_response and 'workflows' in workflows_response:
             workflow_names = [w['name'].lower() for w in workflows_response['workflows']]
             has_modern_ci = any('ci' in name or 'build' in name or 'test' in name for name in workflow_names)
         status['modern_ci'] = has_modern_ci
         
-        # Verificar branch protection
-        endpoint = f"repos/{self.org_name}/{repo_name}/branches/main/protection"
-        protection_response = self._make_request(endpoint)
-        status['branch_protection'] = protection_response is not None
+        # Verificar branch protection: conforme apenas se não houver diferença da política
+        self._branch_protection[repo_name] = responses['branch_protection']
+        status['branch_protection'] = (
+            responses['branch_protection'] is not None
+            and not self._protection_delta(responses['branch_protection'])
+        )
         
         return status
     
-    def enable_dependabot(self, repo: Dict) -> bool:
-        """Ativar Dependabot em um repositório (via arquivo de configuração)."""
+    def _get_repo_tree(self, repo: Dict) -> Optional[set]:
+        """Caminhos de todos os arquivos do repositório (None se indisponível ou truncado)."""
+        repo_name = repo['name']
+        if repo_name not in self._repo_trees:
+            branch = self._default_branch(repo)
+            tree = self._make_request(f"repos/{self.org_name}/{repo_name}/git/trees/{branch}?recursive=1")
+            if not tree or tree.get('truncated'):
+                self._repo_trees[repo_name] = None
+            else:
+                self._repo_trees[repo_name] = {
+                    entry['path'] for entry in tree.get('tree', []) if entry.get('type') == 'blob'
+                }
+        return self._repo_trees[repo_name]
+    
+    @staticmethod
+    def _detect_manifests(paths: set) -> Dict[str, set]:
+        """Ecossistema -> diretórios com manifestos, em todos os níveis da árvore."""
+        ecosystems: Dict[str, set] = {}
+        for path in paths:
+            parts = path.split('/')
+            if IGNORED_TREE_DIRS.intersection(parts[:-1]):
+                continue
+            
+            filename = parts[-1]
+            directory = '/' + '/'.join(parts[:-1])
+            
+            if filename in MANIFEST_ECOSYSTEMS:
+                ecosystem = MANIFEST_ECOSYSTEMS[filename]
+            elif filename.startswith('requirements') and filename.endswith('.txt'):
+                ecosystem = 'pip'
+            elif filename.startswith('Dockerfile.'):
+                ecosystem = 'docker'
+            elif path.startswith('.github/workflows/') and filename.endswith(('.yml', '.yaml')):
+                # Actions são declaradas a partir da raiz
+                ecosystem, directory = 'github-actions', '/'
+            else:
+                continue
+            
+            ecosystems.setdefault(ecosystem, set()).add(directory)
+        return ecosystems
+    
+    def enable_dependabot(self, repo: Dict, has_workflows: Optional[bool] = None) -> bool:
+        """Ativar Dependabot em um repositório (via arquivo de configuração).
+        
+        Args:
+            has_workflows: se o repositório tem workflows (entrada github-actions);
+                usado quando a árvore não está disponível (None = desconhecido)
+        """
         repo_name = repo['name']
         logger.info(f"🤖 Configurando Dependabot para {repo_name}...")
         
-        # Verificar se já existe configuração
         endpoint = f"repos/{self.org_name}/{repo_name}/contents/.github/dependabot.yml"
-        existing_config = self._make_request(endpoint)
+        
+        # A mesma listagem da árvore responde se já existe configuração e quais manifestos há
+        paths = self._get_repo_tree(repo)
+        if paths is not None:
+            existing_config = DEPENDABOT_CONFIG_PATHS.intersection(paths)
+            ecosystems = self._detect_manifests(paths) or None
+            has_workflows = any(path.startswith('.github/workflows/') for path in paths)
+        else:
+            existing_config = self._make_request(endpoint)
+            ecosystems = None
         
         if existing_config:
             logger.info(f"  ℹ️ Dependabot já configurado em {repo_name}")
             return True
         
-        # Criar configuração padrão baseada na linguagem do repo
-        dependabot_config = self._generate_dependabot_config(repo)
+        # Criar configuração a partir dos manifestos (ou da linguagem do repo)
+        dependabot_config = self._generate_dependabot_config(
+            repo, ecosystems, has_workflows is not False
+        )
+        if dependabot_config is None:
+            logger.info(f"  ℹ️ Nenhum ecossistema do Dependabot detectado em {repo_name}")
+            return False
         
         # Criar arquivo dependabot.yml
         create_data = {
             "message": "feat: add Dependabot configuration for automated dependency updates",
             "content": dependabot_config,
-            "branch": "main"
+            "branch": self._default_branch(repo)
         }
         
         create_response = self._make_request(endpoint, method='PUT', data=create_data)
@@ -188,120 +461,343 @@ class ModernizedOrganizationAutomation:
             logger.error(f"  ❌ Falha ao configurar Dependabot em {repo_name}")
             return False
     
-    def _generate_dependabot_config(self, repo: Dict) -> str:
-        """Gerar configuração do Dependabot baseada na linguagem do repositório."""
+    def _generate_dependabot_config(self, repo: Dict, ecosystems: Optional[Dict[str, set]] = None,
+                                    has_workflows: bool = True) -> Optional[str]:
+        """Gerar configuração do Dependabot com uma entrada por ecossistema e diretório.
+        
+        Sem manifestos detectados, usa a linguagem principal do repositório na raiz
+        (e github-actions apenas se houver workflows). None se não houver ecossistema.
+        """
         import base64
         
-        language = repo.get('language', '').lower()
+        if ecosystems is None:
+            language = (repo.get('language') or '').lower()
+            ecosystems = {'github-actions': {'/'}} if has_workflows else {}
+            if language in LANGUAGE_ECOSYSTEMS:
+                ecosystems[LANGUAGE_ECOSYSTEMS[language]] = {'/'}
+        
+        if not ecosystems:
+            return None
         
         config = {
             'version': 2,
             'updates': []
         }
         
-        # Configuração baseada na linguagem
-        if language == 'python':
-            config['updates'].append({
-                'package-ecosystem': 'pip',
-                'directory': '/',
-                'schedule': {'interval': 'weekly'},
-                'labels': ['dependencies', 'python', 'automated'],
-                'reviewers': ['arturdr']
-            })
-        elif language == 'javascript' or language == 'typescript':
-            config['updates'].append({
-                'package-ecosystem': 'npm',
-                'directory': '/',
-                'schedule': {'interval': 'weekly'},
-                'labels': ['dependencies', 'npm', 'automated'],
-                'reviewers': ['arturdr']
-            })
-        elif language == 'java':
-            config['updates'].append({
-                'package-ecosystem': 'maven',
-                'directory': '/',
-                'schedule': {'interval': 'weekly'},
-                'labels': ['dependencies', 'java', 'automated'],
-                'reviewers': ['arturdr']
-            })
-        elif language == 'go':
-            config['updates'].append({
-                'package-ecosystem': 'gomod',
-                'directory': '/',
-                'schedule': {'interval': 'weekly'},
-                'labels': ['dependencies', 'golang', 'automated'],
-                'reviewers': ['arturdr']
-            })
-        
-        # Sempre adicionar GitHub Actions
-        config['updates'].append({
-            'package-ecosystem': 'github-actions',
-            'directory': '/',
-            'schedule': {'interval': 'weekly'},
-            'labels': ['dependencies', 'github-actions', 'automated'],
-            'reviewers': ['arturdr']
-        })
+        for ecosystem in sorted(ecosystems):
+            for directory in sorted(ecosystems[ecosystem]):
+                config['updates'].append({
+                    'package-ecosystem': ecosystem,
+                    'directory': directory,
+                    'schedule': {'interval': 'weekly'},
+                    'labels': ['dependencies', ECOSYSTEM_LABELS[ecosystem], 'automated'],
+                    'reviewers': ['arturdr']
+                })
         
-        yaml_content = yaml.dump(config, default_flow_style=False)
+        yaml_content = yaml.dump(config, default_flow_style=False, sort_keys=False)
         return base64.b64encode(yaml_content.encode()).decode()
     
-    def enable_security_features(self, repo: Dict) -> Dict[str, bool]:
-        """Ativar recursos de segurança avançados."""
+    def _security_configurations(self) -> Optional[List[Dict]]:
+        """Configurações de segurança da organização, com a moderna criada/corrigida se preciso."""
+        endpoint = f"orgs/{self.org_name}/code-security/configurations"
+        configurations = self._make_request(endpoint)
+        if configurations is None:
+            return None
+        
+        for configuration in configurations:
+            if configuration.get('name') != SECURITY_CONFIGURATION_NAME:
+                continue
+            # Configuração criada com outros valores: alinhar antes de anexar qualquer repo
+            changes = {
+                key: value for key, value in SECURITY_CONFIGURATION.items()
+                if configuration.get(key) != value
+            }
+            if changes:
+                updated = self._make_request(f"{endpoint}/{configuration['id']}", method='PATCH', data=changes)
+                if updated is None:
+                    return None
+                configuration.update(changes)
+            return configurations
+        
+        created = self._make_request(endpoint, method='POST', data=SECURITY_CONFIGURATION)
+        return configurations + [created] if created else None
+    
+    @staticmethod
+    def _missing_security_features(repo: Dict, current_status: Optional[Dict[str, bool]]) -> List[str]:
+        """Recursos da configuração moderna que o repositório ainda não tem.
+        
+        Usa o bloco ``security_and_analysis`` da listagem e o status já verificado
+        de vulnerability alerts e CodeQL.
+        """
+        security = repo.get('security_and_analysis') or {}
+        current_status = current_status or {}
+        missing = []
+        if not current_status.get('dependabot', False):
+            missing.append('dependabot_alerts')
+        if (security.get('dependabot_security_updates') or {}).get('status') != 'enabled':
+            missing.append('dependabot_security_updates')
+        if not current_status.get('codeql', False):
+            missing.append('code_scanning_default_setup')
+        return missing
+    
+    def enable_security_features_bulk(self, repos: List[Dict],
+                                      statuses: Dict[str, Dict[str, bool]]) -> Optional[Dict[str, bool]]:
+        """Ativar recursos de segurança em lote via configuração da organização.
+        
+        Só são anexados os repositórios aos quais falta algum recurso e que não
+        estão em outra configuração. Retorna repo -> houve mudança, ou None se a
+        organização não suporta configurações (o chamador recorre às chamadas
+        por repositório).
+        """
+        configurations = self._security_configurations()
+        if configurations is None:
+            logger.warning("⚠️ Code security configurations indisponíveis: usando chamadas por repositório")
+            return None
+        
+        # Repositório -> configuração anexada (poucas configurações por organização)
+        attached_to: Dict[str, int] = {}
+        for configuration in configurations:
+            entries = self._paginate(
+                f"orgs/{self.org_name}/code-security/configurations/{configuration['id']}"
+                f"/repositories?per_page=100&status={ATTACHED_STATUSES}"
+            )
+            if entries is None:
+                return None
+            for entry in entries:
+                attached_to[entry['repository']['name']] = configuration['id']
+        
+        configuration_id = next(
+            c['id'] for c in configurations if c.get('name') == SECURITY_CONFIGURATION_NAME
+        )
+        handled: Dict[str, bool] = {}
+        delta = []
+        other_configuration = 0
+        for repo in repos:
+            repo_name = repo['name']
+            if repo.get('archived'):
+                continue
+            if attached_to.get(repo_name, configuration_id) != configuration_id:
+                # Governado por outra configuração: não é movido
+                other_configuration += 1
+                handled[repo_name] = False
+            elif repo_name not in statuses:
+                # Sem status não há como calcular o delta: caminho por repositório
+                continue
+            elif self._missing_security_features(repo, statuses[repo_name]):
+                delta.append(repo)
+            else:
+                handled[repo_name] = False
+        
+        base = f"orgs/{self.org_name}/code-security/configurations/{configuration_id}"
+        for start in range(0, len(delta), ATTACH_BATCH_SIZE):
+            batch = delta[start:start + ATTACH_BATCH_SIZE]
+            response = self._make_request(
+                f"{base}/attach", method='POST',
+                data={"scope": "selected", "selected_repository_ids": [repo['id'] for repo in batch]}
+            )
+            if response is None:
+                # Lote recusado: esses repositórios seguem pelo caminho por repositório
+                continue
+            handled.update({repo['name']: True for repo in batch})
+        
+        logger.info(
+            f"🛡️ Segurança em lote: {sum(handled.values())}/{len(delta)} anexados à configuração "
+            f"{SECURITY_CONFIGURATION_NAME}, {other_configuration} em outras configurações"
+        )
+        return handled
+    
+    def enable_security_features(self, repo: Dict, current_status: Optional[Dict[str, bool]] = None) -> Dict[str, bool]:
+        """Ativar recursos de segurança avançados que ainda estão desligados.
+        
+        O estado vem do bloco ``security_and_analysis`` da listagem de repositórios
+        e do status já verificado; só o que falta gera chamadas.
+        """
         repo_name = repo['name']
-        logger.info(f"🛡️ Ativando recursos de segurança para {repo_name}...")
+        missing = self._missing_security_features(repo, current_status)
         
-        results = {}
+        if not missing:
+            logger.info(f"  ℹ️ Recursos de segurança já ativos em {repo_name}")
+            return {}
         
-        # Ativar vulnerability alerts
-        endpoint = f"repos/{self.org_name}/{repo_name}/vulnerability-alerts"
-        alert_response = self._make_request(endpoint, method='PUT')
-        results['vulnerability_alerts'] = alert_response is not None
+        logger.info(f"🛡️ Ativando recursos de segurança para {repo_name}...")
         
-        # Ativar automated security fixes (Dependabot security updates)
-        endpoint = f"repos/{self.org_name}/{repo_name}/automated-security-fixes"
-        security_response = self._make_request(endpoint, method='PUT')
-        results['automated_security_fixes'] = security_response is not None
+        # Vulnerability alerts e CodeQL (requer GitHub Advanced Security para repos
+        # privados) em paralelo; security fixes dependem dos alerts ativos
+        calls = {}
+        if 'dependabot_alerts' in missing:
+            calls['vulnerability_alerts'] = (f"repos/{self.org_name}/{repo_name}/vulnerability-alerts", 'PUT')
+        if 'code_scanning_default_setup' in missing:
+            calls['codeql'] = (
+                f"repos/{self.org_name}/{repo_name}/code-scanning/default-setup", 'PATCH',
+                {"state": "configured"}
+            )
         
-        # Tentar ativar CodeQL (requer GitHub Advanced Security para repos privados)
         try:
-            endpoint = f"repos/{self.org_name}/{repo_name}/code-scanning/default-setup"
-            codeql_data = {"state": "configured"}
-            codeql_response = self._make_request(endpoint, method='PATCH', data=codeql_data)
-            results['codeql'] = codeql_response is not None
+            responses = self._parallel_requests(calls)
+            if 'dependabot_security_updates' in missing:
+                responses['automated_security_fixes'] = self._make_request(
+                    f"repos/{self.org_name}/{repo_name}/automated-security-fixes", method='PUT'
+                )
+            results = {name: response is not None for name, response in responses.items()}
         except Exception as e:
-            logger.warning(f"  ⚠️ Não foi possível ativar CodeQL: {e}")
-            results['codeql'] = False
+            logger.warning(f"  ⚠️ Não foi possível ativar recursos de segurança: {e}")
+            results = {name: False for name in calls}
         
         logger.info(f"  ✅ Recursos de segurança configurados: {sum(results.values())}/{len(results)}")
         return results
     
+    @staticmethod
+    def _stricter(name: str, current: Any, desired: Any) -> Any:
+        """Valor mais rígido entre o atual e o da política."""
+        if name == 'required_approving_review_count':
+            return max(current or 0, desired)
+        strictest = STRICTER_PROTECTION_VALUES[name]
+        return strictest if strictest in (current, desired) else desired
+    
+    @staticmethod
+    def _enabled(value: Any) -> Optional[bool]:
+        """Opção da proteção lida pela API (``{"enabled": bool}``) como booleano."""
+        return value.get('enabled') if isinstance(value, dict) else value
+    
+    @staticmethod
+    def _status_check(check: Dict) -> Dict[str, Any]:
+        """Check obrigatório no formato do PUT/PATCH (sem app_id = qualquer origem)."""
+        if check.get('app_id') is None:
+            return {"context": check['context']}
+        return {"context": check['context'], "app_id": check['app_id']}
+    
+    @staticmethod
+    def _actors(value: Optional[Dict]) -> Optional[Dict[str, List[str]]]:
+        """Usuários/times/apps da resposta no formato aceito pelo PUT de proteção."""
+        if not value:
+            return None
+        return {
+            "users": [user['login'] for user in value.get('users', [])],
+            "teams": [team['slug'] for team in value.get('teams', [])],
+            "apps": [app['slug'] for app in value.get('apps', [])]
+        }
+    
+    def _protection_delta(self, current: Dict) -> Dict[str, Any]:
+        """Seções da política moderna que a proteção atual ainda não cumpre.
+        
+        Cada valor do delta já combina o atual com a política, mantendo o que for
+        mais rígido (checks extras, mais aprovações, opções mais restritivas).
+        """
+        delta = {}
+        for key, desired in MODERN_BRANCH_PROTECTION.items():
+            value = current.get(key)
+            if key == 'restrictions':
+                # Restrições de push existentes não são removidas
+                continue
+            if key == 'required_status_checks':
+                value = value or {}
+                contexts = set(value.get('contexts', []))
+                strict = self._stricter('strict', value.get('strict'), desired['strict'])
+                if value.get('strict') != strict or not contexts.issuperset(desired['contexts']):
+                    section = {"strict": strict}
+                    if value.get('checks'):
+                        # Checks vinculados a apps são mantidos com seus app_id
+                        known = {check['context'] for check in value['checks']}
+                        section['checks'] = [
+                            self._status_check(check) for check in value['checks']
+                        ] + [{"context": context} for context in desired['contexts'] if context not in known]
+                    else:
+                        section['contexts'] = sorted(contexts.union(desired['contexts']))
+                    delta[key] = section
+            elif key == 'required_pull_request_reviews':
+                value = value or {}
+                section = {
+                    field: self._stricter(field, value.get(field), desired[field]) for field in desired
+                }
+                if any(value.get(field) != section[field] for field in section):
+                    delta[key] = section
+            else:
+                enabled = self._enabled(value)
+                target = self._stricter(key, enabled, desired)
+                if enabled != target:
+                    delta[key] = target
+        return delta
+    
+    def _protection_put_body(self, current: Dict, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """Corpo do PUT completo: o delta sobre a proteção atual, sem perder o que a
+        política não menciona (checks de apps, revisores de dismissal, restrições,
+        histórico linear, bloqueio do branch)."""
+        checks = current.get('required_status_checks')
+        if 'required_status_checks' in delta:
+            status_checks = delta['required_status_checks']
+        elif checks and checks.get('checks'):
+            status_checks = {
+                "strict": checks.get('strict', False),
+                "checks": [self._status_check(check) for check in checks['checks']]
+            }
+        elif checks:
+            status_checks = {"strict": checks.get('strict', False), "contexts": checks.get('contexts', [])}
+        else:
+            status_checks = None
+        
+        reviews_current = current.get('required_pull_request_reviews') or {}
+        reviews = delta.get('required_pull_request_reviews') or {
+            field: reviews_current[field]
+            for field in MODERN_BRANCH_PROTECTION['required_pull_request_reviews']
+            if field in reviews_current
+        }
+        if reviews_current.get('dismissal_restrictions'):
+            reviews['dismissal_restrictions'] = self._actors(reviews_current['dismissal_restrictions'])
+        if reviews_current.get('bypass_pull_request_allowances'):
+            reviews['bypass_pull_request_allowances'] = self._actors(
+                reviews_current['bypass_pull_request_allowances']
+            )
+        
+        body = {
+            "required_status_checks": status_checks,
+            "required_pull_request_reviews": reviews or None,
+            "restrictions": self._actors(current.get('restrictions'))
+        }
+        for key in MODERN_BRANCH_PROTECTION:
+            if key not in body:
+                body[key] = delta[key] if key in delta else bool(self._enabled(current.get(key)))
+        for key in PRESERVED_PROTECTION_FLAGS:
+            if key in current:
+                body[key] = bool(self._enabled(current[key]))
+        return body
+    
     def apply_modern_branch_protection(self, repo: Dict) -> bool:
-        """Aplicar proteção de branch moderna."""
+        """Aplicar proteção de branch moderna (somente o que difere da atual)."""
         repo_name = repo['name']
-        logger.info(f"🛡️ Aplicando proteção de branch moderna para {repo_name}...")
-        
-        # Configuração moderna de proteção
-        protection_data = {
-            "required_status_checks": {
-                "strict": True,
-                "contexts": ["ci-build-test", "security-audit"]
-            },
-            "enforce_admins": False,
-            "required_pull_request_reviews": {
-                "required_approving_review_count": 1,
-                "dismiss_stale_reviews": True,
-                "require_code_owner_reviews": True,
-                "require_last_push_approval": False
-            },
-            "restrictions": None,  # Sem restrições de push
-            "allow_force_pushes": False,
-            "allow_deletions": False,
-            "block_creations": False,
-            "required_conversation_resolution": True
-        }
+        branch = self._default_branch(repo)
+        logger.info(f"🛡️ Aplicando proteção de branch moderna para {repo_name} ({branch})...")
         
-        endpoint = f"repos/{self.org_name}/{repo_name}/branches/main/protection"
-        response = self._make_request(endpoint, method='PUT', data=protection_data)
+        endpoint = f"repos/{self.org_name}/{repo_name}/branches/{branch}/protection"
+        
+        # Proteção atual já lida em check_modern_tools_status
+        if repo_name in self._branch_protection:
+            current = self._branch_protection.pop(repo_name)
+        else:
+            current = self._make_request(endpoint)
+        
+        if current is None:
+            # Branch sem proteção: política completa
+            response = self._make_request(endpoint, method='PUT', data=MODERN_BRANCH_PROTECTION)
+        else:
+            delta = self._protection_delta(current)
+            if not delta:
+                logger.info(f"  ℹ️ Proteção de branch já conforme em {repo_name}")
+                return False
+            
+            if all(key in PROTECTION_SUBRESOURCES and current.get(key) for key in delta):
+                # Apenas checks/revisões já habilitados: PATCH das seções alteradas
+                # (o PATCH de uma seção desabilitada responde 404)
+                responses = self._parallel_requests({
+                    key: (f"{endpoint}/{key}", 'PATCH', delta[key]) for key in delta
+                })
+                response = all(result is not None for result in responses.values())
+            else:
+                # Demais opções só podem ser alteradas pelo PUT, que recebe a proteção atual
+                # inteira com o delta aplicado
+                response = self._make_request(
+                    endpoint, method='PUT', data=self._protection_put_body(current, delta)
+                )
+            logger.info(f"  🔧 Seções ajustadas em {repo_name}: {', '.join(sorted(delta))}")
         
         if response:
             logger.info(f"  ✅ Proteção de branch aplicada em {repo_name}")
@@ -320,30 +816,37 @@ class ModernizedOrganizationAutomation:
         workflows_created = 0
         
         # Template de CI/CD baseado na linguagem
+        existing_paths = self._get_repo_tree(repo)
+        branch = self._default_branch(repo)
+        workflows = []
         if language == 'python':
-            workflow_content = self._get_python_modern_workflow()
-            if self._create_workflow_file(repo_name, 'ci-python-modern.yml', workflow_content):
-                workflows_created += 1
+            workflows.append(('ci-python-modern.yml', self._get_python_modern_workflow()))
         elif language in ['javascript', 'typescript']:
-            workflow_content = self._get_nodejs_modern_workflow()
-            if self._create_workflow_file(repo_name, 'ci-nodejs-modern.yml', workflow_content):
-                workflows_created += 1
+            workflows.append(('ci-nodejs-modern.yml', self._get_nodejs_modern_workflow()))
         
         # Workflow de segurança universal
-        security_workflow = self._get_security_workflow()
-        if self._create_workflow_file(repo_name, 'security-audit.yml', security_workflow):
-            workflows_created += 1
+        workflows.append(('security-audit.yml', self._get_security_workflow()))
+        
+        for filename, workflow_content in workflows:
+            # Gatilhos apontam para o branch padrão do repositório
+            workflow_content = workflow_content.replace('branches: [ main', f'branches: [ {branch}')
+            if self._create_workflow_file(repo_name, filename, workflow_content, existing_paths, branch):
+                workflows_created += 1
         
         logger.info(f"  ✅ {workflows_created} workflows modernos criados em {repo_name}")
         return workflows_created
     
-    def _create_workflow_file(self, repo_name: str, filename: str, content: str) -> bool:
+    def _create_workflow_file(self, repo_name: str, filename: str, content: str,
+                              existing_paths: Optional[set] = None, branch: str = 'main') -> bool:
         """Criar arquivo de workflow no repositório."""
         import base64
         
-        # Verificar se workflow já existe
+        # Verificar se workflow já existe (pela árvore já listada, quando disponível)
         endpoint = f"repos/{self.org_name}/{repo_name}/contents/.github/workflows/{filename}"
-        existing = self._make_request(endpoint)
+        if existing_paths is not None:
+            existing = f".github/workflows/{filename}" in existing_paths
+        else:
+            existing = self._make_request(endpoint)
         
         if existing:
             logger.info(f"    ℹ️ Workflow {filename} já existe em {repo_name}")
@@ -353,13 +856,16 @@ class ModernizedOrganizationAutomation:
         create_data = {
             "message": f"feat: add modern {filename} workflow",
             "content": base64.b64encode(content.encode()).decode(),
-            "branch": "main"
+            "branch": branch
         }
         
         response = self._make_request(endpoint, method='PUT', data=create_data)
         
         if response:
             logger.info(f"    ✅ Workflow {filename} criado em {repo_name}")
+            if existing_paths is not None:
+                # Árvore em cache reflete o novo arquivo (usada pelo Dependabot em seguida)
+                existing_paths.add(f".github/workflows/{filename}")
             return True
         else:
             logger.error(f"    ❌ Falha ao criar workflow {filename} em {repo_name}")
@@ -495,6 +1001,7 @@ jobs:
         
         if not repos:
             logger.error("❌ Nenhum repositório encontrado")
+            self._record_kpis(False)
             return {"error": "No repositories found"}
         
         results = {
@@ -505,47 +1012,47 @@ jobs:
             "branch_protection_applied": 0,
             "modern_workflows_created": 0,
             "errors": [],
-            "processing_time": None
+            "processing_time": None,
+            "max_workers": self.max_workers,
+            "security_mode": self.security_mode,
+            "api_calls": 0,
+            "rate_limited": 0
         }
         
-        # Processar cada repositório
-        for i, repo in enumerate(repos, 1):
-            repo_name = repo['name']
-            logger.info(f"📦 Processando repositório {i}/{len(repos)}: {repo_name}")
-            
-            try:
-                # Verificar status atual das ferramentas modernas
-                current_status = self.check_modern_tools_status(repo)
-                logger.info(f"  📊 Status atual: {current_status}")
-                
-                # Ativar Dependabot se não estiver ativo
-                if not current_status.get('dependabot', False):
-                    if self.enable_dependabot(repo):
-                        results['dependabot_enabled'] += 1
-                
-                # Ativar recursos de segurança
-                security_results = self.enable_security_features(repo)
-                if any(security_results.values()):
-                    results['security_features_enabled'] += 1
-                
-                # Aplicar proteção de branch moderna
-                if not current_status.get('branch_protection', False):
-                    if self.apply_modern_branch_protection(repo):
-                        results['branch_protection_applied'] += 1
-                
-                # Criar workflows modernos se necessário
-                if not current_status.get('modern_ci', False):
-                    workflows_created = self.create_modern_workflows(repo)
-                    if workflows_created > 0:
-                        results['modern_workflows_created'] += workflows_created
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='modernize') as executor:
+                # Status de todos os repositórios primeiro: o lote de segurança depende dele
+                status_futures = {
+                    executor.submit(self.check_modern_tools_status, repo): repo['name'] for repo in repos
+                }
+                statuses = {}
+                for future in as_completed(status_futures):
+                    if future.exception() is None:
+                        statuses[status_futures[future]] = future.result()
                 
-                results['processed_repos'] += 1
-                logger.info(f"  ✅ {repo_name} processado com sucesso")
+                # Segurança em lote antes do processamento por repositório
+                if self.security_mode == 'org':
+                    self._security_handled = self.enable_security_features_bulk(repos, statuses) or {}
+                    if not self._security_handled:
+                        results['security_mode'] = 'repo'
                 
-            except Exception as e:
-                error_msg = f"Erro ao processar {repo_name}: {str(e)}"
-                logger.error(f"  ❌ {error_msg}")
-                results['errors'].append(error_msg)
+                # Repositórios em paralelo; resultados agregados conforme concluem
+                futures = {
+                    executor.submit(self.process_repository, repo, statuses.get(repo['name'])): repo['name']
+                    for repo in repos
+                }
+                for i, future in enumerate(as_completed(futures), 1):
+                    repo_name = futures[future]
+                    self._aggregate_result(results, future.result())
+                    logger.info(f"📦 [{i}/{len(repos)}] {repo_name} concluído")
+        finally:
+            with self._call_executor_lock:
+                call_executor, self._call_executor = self._call_executor, None
+            if call_executor:
+                call_executor.shutdown(wait=False)
+        
+        results['api_calls'] = self.api_calls
+        results['rate_limited'] = self.rate_limited
         
         # Calcular tempo de processamento
         end_time = datetime.now()
@@ -561,7 +1068,10 @@ jobs:
         logger.info(f"🛡️ Recursos de segurança: {results['security_features_enabled']} repos")
         logger.info(f"🔒 Proteção de branches: {results['branch_protection_applied']} repos")
         logger.info(f"⚙️ Workflows modernos: {results['modern_workflows_created']} criados")
-        logger.info(f"⏱️ Tempo total: {results['processing_time']}")
+        logger.info(
+            f"⏱️ Tempo total: {results['processing_time']} "
+            f"({results['max_workers']} workers, {results['api_calls']} chamadas à API)"
+        )
         
         if results['errors']:
             logger.warning(f"⚠️ Erros encontrados: {len(results['errors'])}")
@@ -574,8 +1084,81 @@ jobs:
             json.dump(results, f, indent=2, default=str)
         
         logger.info(f"📄 Relatório salvo em: {report_file}")
+        self._record_kpis(not results['errors'])
         
         return results
+    
+    def process_repository(self, repo: Dict, current_status: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+        """Modernizar um repositório (executado em paralelo com os demais)."""
+        repo_name = repo['name']
+        outcome = {
+            "repo": repo_name,
+            "dependabot_enabled": False,
+            "security_features_enabled": False,
+            "branch_protection_applied": False,
+            "modern_workflows_created": 0,
+            "error": None
+        }
+        
+        try:
+            # Verificar status atual das ferramentas modernas (se ainda não verificado)
+            if current_status is None:
+                current_status = self.check_modern_tools_status(repo)
+            logger.info(f"  📊 Status atual de {repo_name}: {current_status}")
+            
+            # Ativar recursos de segurança (já tratados em lote quando possível)
+            if repo_name in self._security_handled:
+                outcome['security_features_enabled'] = self._security_handled[repo_name]
+            else:
+                security_results = self.enable_security_features(repo, current_status)
+                outcome['security_features_enabled'] = any(security_results.values())
+            
+            # Aplicar proteção de branch moderna
+            if not current_status.get('branch_protection', False):
+                outcome['branch_protection_applied'] = self.apply_modern_branch_protection(repo)
+            
+            # Criar workflows modernos se necessário
+            if not current_status.get('modern_ci', False):
+                outcome['modern_workflows_created'] = self.create_modern_workflows(repo)
+            
+            # Ativar Dependabot se não estiver ativo (após os workflows, que ele passa a cobrir)
+            if not current_status.get('dependabot', False):
+                outcome['dependabot_enabled'] = self.enable_dependabot(
+                    repo,
+                    has_workflows=current_status.get('has_workflows', False)
+                    or outcome['modern_workflows_created'] > 0
+                )
+            
+            logger.info(f"  ✅ {repo_name} processado com sucesso")
+            
+        except Exception as e:
+            outcome['error'] = f"Erro ao processar {repo_name}: {str(e)}"
+            logger.error(f"  ❌ {outcome['error']}")
+        finally:
+            self._repo_trees.pop(repo_name, None)
+            self._branch_protection.pop(repo_name, None)
+        
+        return outcome
+    
+    @staticmethod
+    def _aggregate_result(results: Dict[str, Any], outcome: Dict[str, Any]) -> None:
+        """Somar o resultado de um repositório aos totais da execução."""
+        if outcome['error']:
+            results['errors'].append(outcome['error'])
+            return
+        
+        results['processed_repos'] += 1
+        results['dependabot_enabled'] += int(outcome['dependabot_enabled'])
+        results['security_features_enabled'] += int(outcome['security_features_enabled'])
+        results['branch_protection_applied'] += int(outcome['branch_protection_applied'])
+        results['modern_workflows_created'] += outcome['modern_workflows_created']
+    
+    def _record_kpis(self, success: bool) -> None:
+        """Registra a execução no motor de KPIs."""
+        try:
+            KPIEngine().record_run('automation', success)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao atualizar KPIs: {e}")
 
 
 def main():
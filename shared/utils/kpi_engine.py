@@ -0,0 +1,279 @@
+"""
+Motor de KPIs incremental
+
+Objetivo:
+- Manter os KPIs do manual de operações a partir das saídas do health check,
+  do dashboard e das execuções de automação, no momento em que são produzidas
+- Usar contadores e janelas deslizantes com somas acumuladas, de modo que a leitura
+  seja O(1) sem varrer relatórios no sistema de arquivos
+
+Uso rápido:
+
+    from shared.utils.kpi_engine import KPIEngine
+
+    engine = KPIEngine()
+    engine.record_health(monitor.health_status)        # produtores
+    engine.record_run("automation", success=True)
+
+    kpis = engine.snapshot()                            # consumidores (parser, hub, dashboard)
+
+Observações:
+- O estado fica em kpi_state.json na raiz do repositório (ou KPI_STATE_FILE), gravado
+  de forma atômica sob lock de arquivo para que processos concorrentes não percam
+  atualizações.
+- Os KPIs derivados são materializados a cada registro; ``snapshot`` só acrescenta
+  os valores dependentes do momento (idade da última execução, disco e memória).
+- Taxas de sucesso/erro e a última execução bem-sucedida vêm apenas de execuções
+  reais (``record_run``); health check e dashboard são relatórios e não contam
+  como execuções.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - plataformas sem flock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Na raiz do repositório: produtores e consumidores rodam em diretórios diferentes
+DEFAULT_STATE_FILE = os.getenv(
+    "KPI_STATE_FILE", str(Path(__file__).resolve().parent.parent.parent / "kpi_state.json")
+)
+DEFAULT_WINDOW_SIZE = int(os.getenv("KPI_WINDOW_SIZE", "50"))
+STATE_VERSION = 2
+
+# Limites do manual de operações: (direção, valor)
+KPI_THRESHOLDS = {
+    "system_health_score": ("min", 95),
+    "workflow_success_rate": ("min", 90),
+    "error_rate_percent": ("max", 5),
+    "disk_usage_percent": ("max", 80),
+    "memory_usage_percent": ("max", 70),
+    "last_success_age_hours": ("max", 24),
+}
+
+WINDOWS = ("health_score", "workflow_success_rate", "run_outcomes")
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {
+        "version": STATE_VERSION,
+        "windows": {name: {"values": [], "sum": 0.0} for name in WINDOWS},
+        "counters": {"runs": {}, "failures": {}},
+        "last_run": {},
+        "last_success": {},
+        "last_report": {},
+        "latest": {},
+        "kpis": {},
+    }
+
+
+def disk_usage_percent(path: str = ".") -> Optional[float]:
+    """Uso do disco que contém ``path`` (uma chamada statvfs)."""
+    try:
+        usage = shutil.disk_usage(path)
+    except OSError:
+        return None
+    return round(usage.used / usage.total * 100, 1) if usage.total else None
+
+
+def memory_usage_percent() -> Optional[float]:
+    """Uso de memória a partir de /proc/meminfo (Linux)."""
+    try:
+        meminfo = {}
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = int(value.split()[0])
+                if "MemTotal" in meminfo and "MemAvailable" in meminfo:
+                    break
+        total, available = meminfo["MemTotal"], meminfo["MemAvailable"]
+    except (OSError, KeyError, ValueError):
+        return None
+    return round((total - available) / total * 100, 1) if total else None
+
+
+class KPIEngine:
+    """KPIs mantidos incrementalmente e compartilhados entre processos."""
+
+    def __init__(self, state_path: Optional[str] = None, window_size: int = DEFAULT_WINDOW_SIZE):
+        self.state_path = Path(state_path or DEFAULT_STATE_FILE)
+        self.lock_path = self.state_path.with_suffix(self.state_path.suffix + ".lock")
+        self.window_size = window_size
+        self._mtime_ns: Optional[int] = None
+        self.state = self._load_state()
+
+    # ------------------------------------------------------------------
+    # Persistência do estado
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path.exists():
+            try:
+                self._mtime_ns = self.state_path.stat().st_mtime_ns
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                if state.get("version") == STATE_VERSION:
+                    return state
+            except Exception as e:
+                logger.warning(f"Erro ao carregar estado de KPIs: {e}")
+        return _empty_state()
+
+    def _save_state(self) -> None:
+        """Grava o estado de forma atômica."""
+        tmp_path = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+        self._mtime_ns = self.state_path.stat().st_mtime_ns
+
+    @contextmanager
+    def _update(self) -> Iterator[Dict[str, Any]]:
+        """Ler-modificar-gravar sob lock exclusivo entre processos."""
+        with open(self.lock_path, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.state = self._load_state()
+                yield self.state
+                self._materialize()
+                self._save_state()
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Recarrega o estado apenas se outro processo o alterou."""
+        try:
+            mtime_ns = self.state_path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime_ns != self._mtime_ns:
+            self.state = self._load_state()
+
+    # ------------------------------------------------------------------
+    # Janelas e contadores
+    # ------------------------------------------------------------------
+
+    def _push(self, name: str, value: float) -> None:
+        window = self.state["windows"][name]
+        window["values"].append(value)
+        window["sum"] += value
+        while len(window["values"]) > self.window_size:
+            window["sum"] -= window["values"].pop(0)
+
+    def _mean(self, name: str) -> Optional[float]:
+        window = self.state["windows"][name]
+        if not window["values"]:
+            return None
+        return round(window["sum"] / len(window["values"]), 1)
+
+    def _count_run(self, source: str, success: bool) -> None:
+        now = time.time()
+        counters = self.state["counters"]
+        counters["runs"][source] = counters["runs"].get(source, 0) + 1
+        if not success:
+            counters["failures"][source] = counters["failures"].get(source, 0) + 1
+        self.state["last_run"][source] = now
+        if success:
+            self.state["last_success"][source] = now
+        self._push("run_outcomes", 100.0 if success else 0.0)
+
+    def _materialize(self) -> None:
+        """Recalcula os KPIs derivados após cada registro."""
+        success_rate = self._mean("run_outcomes")
+        latest = self.state["latest"]
+        counters = self.state["counters"]
+        self.state["kpis"] = {
+            "system_health_score": self._mean("health_score"),
+            "workflow_success_rate": self._mean("workflow_success_rate"),
+            "success_rate_percent": success_rate,
+            "error_rate_percent": round(100 - success_rate, 1) if success_rate is not None else None,
+            "compliance_rate": latest.get("compliance_rate"),
+            "critical_vulnerabilities": latest.get("critical_vulnerabilities"),
+            "overall_health": latest.get("overall_health"),
+            "total_runs": sum(counters["runs"].values()),
+            "total_failures": sum(counters["failures"].values()),
+        }
+
+    # ------------------------------------------------------------------
+    # Produtores
+    # ------------------------------------------------------------------
+
+    def record_health(self, health_status: Dict[str, Any]) -> None:
+        """Registra o resultado de ``OrganizationHealthMonitor.run_health_check``.
+
+        A taxa de workflows do health check (repositório de automação) só compõe o
+        score de saúde; ``workflow_success_rate`` é o agregado da organização do
+        dashboard.
+        """
+        compliance = health_status.get("automation_stats", {}).get("compliance_percentage", 0)
+        workflow_rate = health_status.get("workflow_health", {}).get("success_rate")
+
+        with self._update():
+            scores = [compliance] + ([workflow_rate] if workflow_rate is not None else [])
+            self._push("health_score", sum(scores) / len(scores))
+            self.state["latest"]["compliance_rate"] = compliance
+            self.state["latest"]["overall_health"] = health_status.get("overall_health")
+            self.state["last_report"]["health"] = time.time()
+
+    def record_dashboard(self, metrics: Dict[str, Any]) -> None:
+        """Registra as métricas consolidadas de ``OrganizationDashboard``."""
+        vulnerabilities = metrics.get("security", {}).get("vulnerabilities", {})
+
+        with self._update():
+            if metrics.get("repositories"):
+                self._push("workflow_success_rate", metrics["quality"]["workflow_success_rate"])
+                self.state["latest"]["compliance_rate"] = metrics["automation"]["compliance_rate"]
+            self.state["latest"]["critical_vulnerabilities"] = (
+                vulnerabilities.get("critical", 0) + vulnerabilities.get("high", 0)
+            )
+            self.state["last_report"]["dashboard"] = time.time()
+
+    def record_run(self, source: str, success: bool) -> None:
+        """Registra uma execução de automação ou de comando do manual."""
+        with self._update():
+            self._count_run(source, success)
+
+    # ------------------------------------------------------------------
+    # Consumidores
+    # ------------------------------------------------------------------
+
+    def snapshot(self, disk_path: str = ".") -> Dict[str, Any]:
+        """KPIs atuais e alertas (O(1): nenhum relatório é relido)."""
+        self._refresh()
+        kpis = dict(self.state.get("kpis") or {})
+
+        last_success = max(self.state["last_success"].values(), default=None)
+        kpis["last_success"] = datetime.fromtimestamp(last_success).isoformat() if last_success else None
+        kpis["last_success_age_hours"] = (
+            round((time.time() - last_success) / 3600, 1) if last_success else None
+        )
+        kpis["disk_usage_percent"] = disk_usage_percent(disk_path)
+        kpis["memory_usage_percent"] = memory_usage_percent()
+        kpis["alerts"] = self.alerts(kpis)
+        return kpis
+
+    @staticmethod
+    def alerts(kpis: Dict[str, Any]) -> List[str]:
+        """KPIs fora dos limites definidos no manual."""
+        alerts = []
+        for name, (direction, limit) in KPI_THRESHOLDS.items():
+            value = kpis.get(name)
+            if value is None:
+                continue
+            if (direction == "min" and value < limit) or (direction == "max" and value > limit):
+                symbol = ">=" if direction == "min" else "<="
+                alerts.append(f"{name}: {value} (esperado {symbol} {limit})")
+        return alerts
@@ -0,0 +1,35 @@
+"""Configuração comum dos testes."""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Os módulos de core/ exigem um token na importação; os testes nunca chamam a API real
+os.environ.setdefault("GITHUB_TOKEN", "test-token")
+
+_original_cwd = os.getcwd()
+_workdir = None
+
+
+def pytest_configure(config):
+    """Executa os testes em um diretório temporário.
+
+    Vários módulos criam arquivos de log ao serem importados (``logging.FileHandler``
+    relativo ao diretório atual); assim nada é gravado na árvore do repositório.
+    """
+    global _workdir
+    _workdir = tempfile.mkdtemp(prefix="org-automation-tests-")
+    os.chdir(_workdir)
+    # O estado de KPIs fica na raiz do repositório por padrão
+    os.environ["KPI_STATE_FILE"] = os.path.join(_workdir, "kpi_state.json")
+
+
+def pytest_unconfigure(config):
+    os.chdir(_original_cwd)
+    if _workdir:
+        shutil.rmtree(_workdir, ignore_errors=True)
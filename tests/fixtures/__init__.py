@@ -1 +1,18 @@
-"""Package module."""
+"""Utilitários compartilhados pelos testes."""
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent.parent / "scripts"
+
+
+def load_script(filename: str) -> ModuleType:
+    """Importa um script de ``scripts/`` (nomes com hífen não são importáveis)."""
+    module_name = Path(filename).stem.replace("-", "_")
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / filename)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
@@ -0,0 +1,89 @@
+"""Testes do coletor de atividade via GraphQL."""
+from datetime import datetime, timedelta, timezone
+
+from core.monitoring.activity import OrganizationActivityCollector
+
+
+def _iso(delta: timedelta) -> str:
+    return (datetime.now(timezone.utc) - delta).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _repo_node(total_commits, logins, prs, history_next=None, prs_next=None):
+    return {
+        "defaultBranchRef": {"target": {"history": {
+            "totalCount": total_commits,
+            "pageInfo": {"hasNextPage": history_next is not None, "endCursor": history_next},
+            "nodes": [{"author": {"email": f"{login}@x", "user": {"login": login}}} for login in logins],
+        }}},
+        "pullRequests": {
+            "pageInfo": {"hasNextPage": prs_next is not None, "endCursor": prs_next},
+            "nodes": prs,
+        },
+    }
+
+
+def test_initial_query_batches_repositories_with_aliases():
+    collector = OrganizationActivityCollector("org", {}, batch_size=3)
+    query, variables = collector._build_initial_query(["a", "b"])
+
+    assert "r0: repository(owner: $owner, name: $name0)" in query
+    assert "r1: repository(owner: $owner, name: $name1)" in query
+    assert "i1: search(query: $issues1, type: ISSUE)" in query
+    assert variables["name1"] == "b"
+    assert variables["issues0"].startswith("repo:org/a is:issue created:>=")
+
+
+def test_followup_query_declares_since_only_for_history():
+    collector = OrganizationActivityCollector("org", {})
+    query, variables = collector._build_followup_query([{"repo": "a", "kind": "prs", "cursor": "c1"}])
+
+    assert "$since" not in query
+    assert variables == {"owner": "org", "name0": "a", "after0": "c1"}
+
+
+def test_collect_uses_one_query_per_batch_and_paginates_only_what_is_needed(monkeypatch):
+    collector = OrganizationActivityCollector("org", {}, batch_size=2)
+    recent, old = _iso(timedelta(days=1)), _iso(timedelta(days=30))
+    queries = []
+
+    def execute(query, variables):
+        queries.append(variables)
+        if "after0" in variables:
+            # Continuação dos PRs de "a": o segundo já é anterior ao período
+            return {"r0": _repo_node(0, [], [{"createdAt": recent, "mergedAt": None},
+                                              {"createdAt": old, "mergedAt": old}])}
+        if variables.get("name0") == "a":
+            return {
+                "r0": _repo_node(12, ["alice", "bob"], [{"createdAt": recent, "mergedAt": _iso(timedelta(hours=22))}],
+                                 prs_next="cursor-a"),
+                "i0": {"issueCount": 3},
+                "r1": _repo_node(1, ["alice"], [{"createdAt": old, "mergedAt": None}], prs_next="cursor-b"),
+                "i1": {"issueCount": 0},
+            }
+        return {"r0": _repo_node(0, [], []), "i0": {"issueCount": 1}}
+
+    monkeypatch.setattr(collector, "_execute", execute)
+    activity = collector.collect(["a", "b", "c"])
+
+    # Dois lotes iniciais + uma continuação (só "a" tem PRs novos além da página)
+    assert len(queries) == 3
+    assert activity["a"]["commits_last_week"] == 12
+    assert activity["a"]["prs_last_week"] == 2
+    assert activity["a"]["issues_last_week"] == 3
+    assert activity["a"]["avg_pr_time_hours"] == 2.0
+    assert activity["b"]["prs_last_week"] == 0
+    assert activity["c"]["issues_last_week"] == 1
+    assert OrganizationActivityCollector.unique_contributors(activity) == {"alice", "bob"}
+
+
+def test_failed_batch_keeps_empty_activity(monkeypatch):
+    collector = OrganizationActivityCollector("org", {})
+
+    def execute(query, variables):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(collector, "_execute", execute)
+    activity = collector.collect(["a"])
+
+    assert activity["a"]["commits_last_week"] == 0
+    assert "avg_pr_time_hours" not in activity["a"]
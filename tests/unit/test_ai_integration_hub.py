@@ -0,0 +1,664 @@
+"""Testes do agendamento, cache, agrupamento e fila do hub de IA."""
+import asyncio
+import json
+import socket
+import tempfile
+
+import pytest
+
+from tests.fixtures import load_script
+
+hub_module = load_script("ai-integration-hub.py")
+AIProvider = hub_module.AIProvider
+RequestStatus = hub_module.RequestStatus
+
+FINAL = (RequestStatus.COMPLETED, RequestStatus.FAILED, RequestStatus.CANCELLED)
+
+
+@pytest.fixture
+def make_hub(tmp_path, monkeypatch):
+    """Hub com bancos em ``tmp_path`` e provedores de API prontos."""
+    for env in ("CLAUDE_API_KEY", "OPENAI_API_KEY", "GEMINI_API_KEY"):
+        monkeypatch.setenv(env, "test-key")
+    hubs = []
+
+    def factory(**sections):
+        config = {
+            "cache": {"enabled": False},
+            "queue": {"durable": False},
+            "batching": {"enabled": False},
+        }
+        config.update(sections)
+        config_path = tmp_path / f"hub-{len(hubs)}.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+        hub = hub_module.AIIntegrationHub(str(config_path))
+        hubs.append(hub)
+        return hub
+
+    yield factory
+    for hub in hubs:
+        if hub.cache:
+            hub.cache.close()
+        if hub.durable_queue:
+            hub.durable_queue.close()
+        if hub._warp_bot:
+            hub._warp_bot.journal.close()
+        if hub._warp_executor:
+            hub._warp_executor.shutdown()
+
+
+def _fake_upstream(hub, calls, delay=0.0):
+    """Substitui a chamada HTTP ao provedor, registrando cada chamada."""
+    async def process_api_provider(request, prompt=None):
+        calls.append((request.id, prompt))
+        await asyncio.sleep(delay)
+        return {"answer": request.parameters}
+
+    hub._process_api_provider = process_api_provider
+
+
+async def _drain(hub, request_ids, timeout=5.0):
+    """Processa a fila até as requisições finalizarem."""
+    worker = asyncio.ensure_future(hub.process_requests(use_durable_queue=False))
+    try:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while any(hub.get_request(rid).status not in FINAL for rid in request_ids):
+            assert asyncio.get_running_loop().time() < deadline, "requisições não finalizaram"
+            await asyncio.sleep(0.01)
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+
+# --------------------------------------------------------------------
+# Agendamento
+# --------------------------------------------------------------------
+
+def test_dispatch_follows_priority_then_submission_order(make_hub):
+    hub = make_hub()
+    hub.providers[AIProvider.GPT]["max_concurrent"] = 1
+    calls = []
+    _fake_upstream(hub, calls)
+
+    ids = [
+        hub.submit_request("gpt", "Monitorar Recursos", {"n": n}, priority=priority)
+        for n, priority in enumerate([5, 1, 5, 3])
+    ]
+    asyncio.run(_drain(hub, ids))
+
+    assert [request_id for request_id, _ in calls] == [ids[1], ids[3], ids[0], ids[2]]
+    assert all(hub.get_request(rid).status == RequestStatus.COMPLETED for rid in ids)
+
+
+def test_saturated_provider_does_not_block_others(make_hub):
+    hub = make_hub()
+    hub.providers[AIProvider.GPT]["max_concurrent"] = 1
+    calls = []
+    _fake_upstream(hub, calls, delay=0.2)
+
+    async def scenario():
+        slow = [hub.submit_request("gpt", "Monitorar Recursos", {"n": n}) for n in range(3)]
+        fast = hub.submit_request("claude", "Monitorar Recursos", {"n": 0})
+        worker = asyncio.ensure_future(_drain(hub, slow + [fast]))
+        while hub.get_request(fast).status not in FINAL:
+            await asyncio.sleep(0.01)
+        # Claude concluiu enquanto o GPT ainda tinha requisições na fila
+        assert hub.get_request(slow[-1]).status not in FINAL
+        await worker
+
+    asyncio.run(scenario())
+
+
+def test_submit_rejects_unknown_operation(make_hub):
+    hub = make_hub()
+    with pytest.raises(ValueError):
+        hub.submit_request("gpt", "Apagar Tudo", {})
+
+
+# --------------------------------------------------------------------
+# Controle de taxa
+# --------------------------------------------------------------------
+
+def test_token_bucket_consumes_capacity_then_waits(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(hub_module.time, "monotonic", lambda: now[0])
+    bucket = hub_module.TokenBucket(rate_per_minute=60, capacity=2)
+
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.time_until_available() == pytest.approx(1.0)
+
+    now[0] += 1.0
+    assert bucket.try_acquire()
+
+
+def test_token_bucket_penalty_delays_next_token(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(hub_module.time, "monotonic", lambda: now[0])
+    bucket = hub_module.TokenBucket(rate_per_minute=60)
+
+    bucket.penalize(5)
+    assert bucket.time_until_available() == pytest.approx(6.0)
+    now[0] += 6.0
+    assert bucket.try_acquire()
+
+
+# --------------------------------------------------------------------
+# Cache de respostas
+# --------------------------------------------------------------------
+
+def test_cache_key_ignores_parameter_order():
+    make_key = hub_module.ResponseCache.make_key
+    assert make_key("gpt", "m", "op", {"a": 1, "b": 2}) == make_key("gpt", "m", "op", {"b": 2, "a": 1})
+    assert make_key("gpt", "m", "op", {"a": 1}) != make_key("gpt", "other", "op", {"a": 1})
+
+
+def test_response_cache_lru_disk_promotion_and_expiry(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "cache.db")
+    cache = hub_module.ResponseCache(db_path, memory_size=1)
+    cache.set("a", "gpt", "op", {"v": "a"}, ttl=60)
+    cache.set("b", "gpt", "op", {"v": "b"}, ttl=60)
+
+    assert list(cache.memory) == ["b"]
+    assert cache.get("a") == {"v": "a"}
+    assert cache.stats["disk_hits"] == 1 and list(cache.memory) == ["a"]
+    cache.close()
+
+    # Entradas expiradas não sobrevivem a um novo processo
+    now = hub_module.time.time()
+    monkeypatch.setattr(hub_module.time, "time", lambda: now + 120)
+    reopened = hub_module.ResponseCache(db_path)
+    assert reopened.get("a") is None
+    assert reopened.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+    reopened.close()
+
+
+def test_repeated_operation_is_served_from_cache(make_hub, tmp_path):
+    hub = make_hub(cache={
+        "enabled": True,
+        "db_path": str(tmp_path / "cache.db"),
+        "ttl_per_operation": {"Monitorar Recursos": 30},
+        "ignored_parameters": ["requested_by"],
+    })
+    calls = []
+    _fake_upstream(hub, calls)
+
+    first = hub.submit_request("gpt", "Monitorar Recursos", {"host": "a", "requested_by": "x"})
+    asyncio.run(_drain(hub, [first]))
+
+    cached = hub.submit_request("gpt", "Monitorar Recursos", {"host": "a", "requested_by": "y"})
+    assert hub.get_request(cached).status == RequestStatus.COMPLETED
+    assert hub.get_request(cached).result == hub.get_request(first).result
+
+    bypass = hub.submit_request("gpt", "Monitorar Recursos", {"host": "a", "no_cache": True})
+    asyncio.run(_drain(hub, [bypass]))
+    assert len(calls) == 2
+    assert hub.cache.stats["bypassed"] == 1
+
+
+# --------------------------------------------------------------------
+# Agrupamento de requisições idênticas
+# --------------------------------------------------------------------
+
+def test_identical_inflight_requests_share_one_upstream_call(make_hub):
+    hub = make_hub()
+    calls = []
+    _fake_upstream(hub, calls, delay=0.05)
+
+    leader = hub.submit_request("gpt", "Monitorar Recursos", {"host": "a"})
+    follower = hub.submit_request("gpt", "Monitorar Recursos", {"host": "a"})
+    other = hub.submit_request("gpt", "Monitorar Recursos", {"host": "b"})
+    asyncio.run(_drain(hub, [leader, follower, other]))
+
+    assert sorted(request_id for request_id, _ in calls) == sorted([leader, other])
+    assert hub.get_request(follower).status == RequestStatus.COMPLETED
+    assert hub.get_request(follower).result == hub.get_request(leader).result
+    assert hub.stats["coalesced_requests"] == 1
+    assert not hub._inflight and not hub._followers
+
+
+def test_followers_receive_leader_failure(make_hub):
+    hub = make_hub()
+
+    async def failing(request, prompt=None):
+        raise RuntimeError("upstream down")
+
+    async def no_notification(request, error):
+        pass
+
+    hub._process_api_provider = failing
+    hub._notify_failure = no_notification
+
+    leader = hub.submit_request("gpt", "Monitorar Recursos", {"host": "a"})
+    follower = hub.submit_request("gpt", "Monitorar Recursos", {"host": "a"})
+    asyncio.run(_drain(hub, [leader, follower]))
+
+    assert hub.get_request(follower).status == RequestStatus.FAILED
+    assert hub.get_request(follower).error == "upstream down"
+    assert hub.stats["failed_requests"] == 2
+
+
+# --------------------------------------------------------------------
+# Roteamento automático
+# --------------------------------------------------------------------
+
+def _upstream_by_provider(hub, behaviours):
+    """Upstream falso cujo comportamento depende do provedor da tentativa."""
+    async def process_api_provider(request, prompt=None):
+        delay, error = behaviours.get(request.provider, (0.0, None))
+        await asyncio.sleep(delay)
+        if error:
+            raise RuntimeError(error)
+        return {"provider": request.provider.value}
+
+    async def no_notification(request, error):
+        pass
+
+    hub._process_api_provider = process_api_provider
+    hub._notify_failure = no_notification
+
+
+def test_rank_prefers_lower_expected_latency(make_hub):
+    hub = make_hub()
+    hub.providers[AIProvider.GPT]["latency_ewma"] = 1.0
+    hub.providers[AIProvider.CLAUDE]["latency_ewma"] = 5.0
+    hub.providers[AIProvider.CLAUDE]["error_ewma"] = 0.5
+
+    assert hub._rank_providers() == [AIProvider.GPT, AIProvider.GEMINI, AIProvider.CLAUDE]
+
+
+def test_slow_primary_is_hedged(make_hub):
+    hub = make_hub(routing={"default_hedge_delay": 0.05, "min_samples": 10})
+    hub.providers[AIProvider.GPT]["latency_ewma"] = 0.001
+    _upstream_by_provider(hub, {AIProvider.GPT: (2.0, None)})
+
+    request_id = hub.submit_request("auto", "Monitorar Recursos", {"host": "a"})
+    asyncio.run(_drain(hub, [request_id]))
+
+    request = hub.get_request(request_id)
+    assert request.provider == AIProvider.GPT
+    assert request.served_by != AIProvider.GPT
+    assert request.result == {"provider": request.served_by.value}
+    assert hub.stats["hedged_requests"] == hub.stats["hedge_wins"] == 1
+
+
+def test_failed_primary_fails_over(make_hub):
+    hub = make_hub()
+    hub.providers[AIProvider.GPT]["latency_ewma"] = 0.1
+    _upstream_by_provider(hub, {AIProvider.GPT: (0.0, "boom")})
+
+    request_id = hub.submit_request("auto", "Monitorar Recursos", {"host": "a"})
+    asyncio.run(_drain(hub, [request_id]))
+
+    request = hub.get_request(request_id)
+    assert request.status == RequestStatus.COMPLETED
+    assert request.served_by in (AIProvider.CLAUDE, AIProvider.GEMINI)
+    assert hub.stats["failovers"] == 1
+    assert hub.providers[AIProvider.GPT]["error_ewma"] > 0
+
+
+# --------------------------------------------------------------------
+# Streaming
+# --------------------------------------------------------------------
+
+class FakeStreamResponse:
+    def __init__(self, lines):
+        self.status = 200
+        self.headers = {}
+        self._lines = lines
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def content(self):
+        for line in self._lines:
+            yield line
+
+
+class FakeSession:
+    def __init__(self, lines):
+        self.lines = lines
+        self.posts = []
+
+    def post(self, url, json, headers, timeout):
+        self.posts.append((url, json))
+        return FakeStreamResponse(self.lines)
+
+
+def test_sse_chunks_are_published_in_order(make_hub):
+    hub = make_hub()
+    events = [{"choices": [{"delta": {"content": text}}]} for text in ("Olá", ", ", "mundo")]
+    hub.session = FakeSession(
+        [b": keep-alive\n"]
+        + [f"data: {json.dumps(event)}\n".encode() for event in events]
+        + [b"data: [DONE]\n", b"data: {\"ignored\": true}\n"]
+    )
+
+    async def scenario():
+        worker = asyncio.ensure_future(hub.process_requests(use_durable_queue=False))
+        chunks = [chunk async for chunk in hub.stream_request("gpt", "Monitorar Recursos", {})]
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        return chunks
+
+    chunks = asyncio.run(scenario())
+
+    assert [chunk["delta"] for chunk in chunks[:-1]] == ["Olá", ", ", "mundo"]
+    assert [chunk["index"] for chunk in chunks[:-1]] == [0, 1, 2]
+    assert chunks[-1]["done"] and chunks[-1]["status"] == "completed"
+    assert hub.session.posts[0][1]["stream"] is True
+    assert hub.completed_requests[chunks[-1]["request_id"]].result == {"text": "Olá, mundo", "streamed": True}
+
+
+def test_stream_delta_extraction_per_provider(make_hub):
+    hub = make_hub()
+    extract = hub._extract_stream_delta
+
+    assert extract(AIProvider.CLAUDE, {"type": "content_block_delta", "delta": {"text": "a"}}) == "a"
+    assert extract(AIProvider.CLAUDE, {"type": "message_start"}) is None
+    assert extract(AIProvider.GEMINI, {"candidates": [{"content": {"parts": [{"text": "b"}, {"text": "c"}]}}]}) == "bc"
+    assert extract(AIProvider.GPT, {"choices": [{"delta": {}}]}) is None
+
+
+# --------------------------------------------------------------------
+# Fila persistente
+# --------------------------------------------------------------------
+
+def _stored_status(db_path, request_id):
+    stored = hub_module.DurableQueue.lookup(db_path, request_id)
+    return stored and stored["status"]
+
+
+def test_durable_queue_flushes_at_batch_size(tmp_path):
+    db_path = str(tmp_path / "queue.db")
+    queue = hub_module.DurableQueue(db_path, batch_size=3)
+    requests = [hub_module.AIRequest(f"r{n}", AIProvider.GPT, "op", {"n": n}) for n in range(3)]
+
+    queue.add(requests[0], "gpt")
+    queue.add(requests[1], "gpt")
+    assert queue.stats["flushes"] == 0
+    queue.add(requests[2], "gpt")
+    assert queue.stats["flushes"] == 1 and not queue.pending_writes
+
+    requests[0].status = RequestStatus.PROCESSING
+    queue.update(requests[0])
+    queue.close()
+
+    assert _stored_status(db_path, "r0") == "processing"
+
+
+def test_recover_requeues_interrupted_and_claims_external(tmp_path):
+    db_path = str(tmp_path / "queue.db")
+    queue = hub_module.DurableQueue(db_path)
+    request = hub_module.AIRequest("r0", AIProvider.GPT, "op", {}, status=RequestStatus.PROCESSING)
+    queue.add(request, "gpt")
+    queue.update(request)
+    queue.flush()
+
+    external = hub_module.DurableQueue.enqueue(db_path, "claude", "op", {"x": 1})
+
+    assert [row["id"] for row in queue.recover()] == ["r0"]
+    assert [row["id"] for row in queue.claim_external()] == [external]
+    assert queue.claim_external() == []
+    queue.close()
+
+
+def test_daemon_recovers_queue_but_one_shot_run_does_not(make_hub, tmp_path):
+    db_path = str(tmp_path / "queue.db")
+    external = hub_module.DurableQueue.enqueue(db_path, "gpt", "Monitorar Recursos", {"host": "a"})
+    hub = make_hub(queue={"durable": True, "db_path": db_path, "poll_interval": 0.01})
+    calls = []
+    _fake_upstream(hub, calls)
+
+    async def run(use_durable_queue):
+        worker = asyncio.ensure_future(hub.process_requests(use_durable_queue=use_durable_queue))
+        await asyncio.sleep(0.2)
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+    asyncio.run(run(False))
+    assert calls == [] and _stored_status(db_path, external) == "pending"
+
+    asyncio.run(run(True))
+    hub.durable_queue.flush()
+    assert [request_id for request_id, _ in calls] == [external]
+    assert _stored_status(db_path, external) == "completed"
+
+
+# --------------------------------------------------------------------
+# API local
+# --------------------------------------------------------------------
+
+@pytest.fixture
+def socket_path():
+    # Caminhos de Unix socket são limitados a ~100 caracteres
+    with tempfile.TemporaryDirectory(prefix="hub") as directory:
+        yield f"{directory}/api.sock"
+
+
+def test_api_round_trip_and_durable_lookup(make_hub, tmp_path, socket_path):
+    hub = make_hub(queue={"durable": True, "db_path": str(tmp_path / "queue.db")})
+    _fake_upstream(hub, [])
+    server = hub_module.HubAPIServer(hub, socket_path=socket_path)
+    client = hub_module.HubClient(socket_path, timeout=5)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        tasks = [
+            asyncio.ensure_future(server.serve_forever()),
+            asyncio.ensure_future(hub.process_requests(use_durable_queue=False)),
+        ]
+        try:
+            while not await loop.run_in_executor(None, client.is_available):
+                await asyncio.sleep(0.01)
+            request_id = await loop.run_in_executor(
+                None, client.submit, "gpt", "Monitorar Recursos", {"host": "a"}
+            )
+            result = await loop.run_in_executor(None, client.result, request_id, 2)
+
+            # Requisição despejada da memória: servida pela fila persistente
+            hub.completed_requests.clear()
+            stored = await loop.run_in_executor(None, client.result, request_id)
+            with pytest.raises(ValueError):
+                await loop.run_in_executor(None, client.result, "desconhecida")
+            return result, stored
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    result, stored = asyncio.run(scenario())
+
+    assert result["status"] == "completed" and result["served_by"] == "gpt"
+    assert stored["status"] == "completed" and stored["result"] == result["result"]
+    assert stored["served_by"] is None
+
+
+def test_live_socket_is_not_taken_over(make_hub, socket_path):
+    hub = make_hub()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(hub_module.HubAPIServer(hub, socket_path=socket_path).serve_forever())
+    finally:
+        listener.close()
+
+    # Socket órfão (ninguém escutando) é substituído
+    async def start_and_stop():
+        task = asyncio.ensure_future(hub_module.HubAPIServer(hub, socket_path=socket_path).serve_forever())
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(start_and_stop())
+
+
+# --------------------------------------------------------------------
+# Lotes
+# --------------------------------------------------------------------
+
+BATCHING = {
+    "enabled": True,
+    "max_batch_size": 8,
+    "max_wait": 0.05,
+    "max_parameters_size": 2000,
+    "operations": ["Health Check"],
+}
+
+
+def _batch_upstream(hub, calls, drop=()):
+    """Responde prompts em lote no formato do GPT, omitindo os IDs em ``drop``."""
+    async def process_api_provider(request, prompt=None):
+        calls.append(prompt)
+        if prompt is None:
+            return {"single": request.id}
+        items = json.loads(prompt.split("Itens:\n", 1)[1].split("\n\nContexto:", 1)[0])
+        results = [
+            {"id": item["id"], "status": "success", "data": item["parameters"]}
+            for item in items if item["id"] not in drop
+        ]
+        content = "```json\n" + json.dumps({"results": results}) + "\n```"
+        return {"model": "gpt-test", "choices": [{"message": {"content": content}}]}
+
+    hub._process_api_provider = process_api_provider
+
+
+def test_small_requests_share_one_prompt_with_native_results(make_hub):
+    hub = make_hub(batching=BATCHING)
+    calls = []
+    _batch_upstream(hub, calls)
+
+    ids = [hub.submit_request("gpt", "Health Check", {"host": host}) for host in "abc"]
+    asyncio.run(_drain(hub, ids))
+
+    assert len(calls) == 1
+    assert hub.stats["batches"] == 1 and hub.stats["batched_requests"] == 3
+    for request_id, host in zip(ids, "abc"):
+        result = hub.get_request(request_id).result
+        assert result["object"] == "chat.completion" and result["model"] == "gpt-test"
+        content = json.loads(result["choices"][0]["message"]["content"])
+        # Mesmo formato de uma chamada individual: sem o ID do lote
+        assert content == {"status": "success", "data": {"host": host}}
+
+
+def test_item_missing_from_batch_runs_individually(make_hub):
+    hub = make_hub(batching=BATCHING)
+    calls = []
+    ids = [hub.submit_request("gpt", "Health Check", {"host": host}) for host in "ab"]
+    _batch_upstream(hub, calls, drop={ids[1]})
+
+    asyncio.run(_drain(hub, ids))
+
+    assert len(calls) == 2 and calls[1] is None
+    assert hub.get_request(ids[1]).result == {"single": ids[1]}
+    assert hub.stats["batch_fallbacks"] == 1
+
+
+def test_large_or_unlisted_requests_are_not_batched(make_hub):
+    hub = make_hub(batching=dict(BATCHING, max_parameters_size=20))
+    small = hub_module.AIRequest("a", AIProvider.GPT, "Health Check", {"host": "a"})
+    large = hub_module.AIRequest("b", AIProvider.GPT, "Health Check", {"host": "x" * 50})
+    other = hub_module.AIRequest("c", AIProvider.GPT, "Monitorar Recursos", {})
+    local = hub_module.AIRequest("d", AIProvider.WARP_AGENT, "Health Check", {})
+
+    assert hub._is_batchable(small)
+    assert not any(hub._is_batchable(request) for request in (large, other, local))
+
+
+# --------------------------------------------------------------------
+# Memória limitada
+# --------------------------------------------------------------------
+
+def test_output_spool_keeps_tail_and_full_gzip_copy(tmp_path):
+    import gzip
+
+    path = tmp_path / "out.log.gz"
+    spool = hub_module.OutputSpool(path, tail_bytes=20)
+    lines = [f"linha {n:02d}\n" for n in range(10)]
+    for line in lines:
+        spool.write(line)
+    spool.close()
+
+    assert spool.truncated
+    # Cauda limitada, começando em uma linha completa
+    tail = spool.text()
+    assert len(tail) <= 20 and tail.startswith("linha") and tail.endswith(lines[-1])
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert f.read() == "".join(lines)
+
+
+def test_completed_requests_are_evicted_by_count_and_size(make_hub):
+    hub = make_hub(hub={"completed_history": 3, "completed_ttl": 3600, "completed_max_bytes": 100})
+
+    def complete(request_id, payload):
+        request = hub_module.AIRequest(request_id, AIProvider.GPT, "op", {}, result={"p": payload})
+        hub._remember_completed(request)
+
+    for n in range(5):
+        complete(f"r{n}", "x")
+    assert list(hub.completed_requests) == ["r2", "r3", "r4"]
+
+    complete("big", "x" * 80)
+    assert list(hub.completed_requests) == ["r4", "big"]
+    assert hub._completed_bytes == sum(size for _, size in hub._completed_meta.values())
+
+
+# --------------------------------------------------------------------
+# Warp Agent em processo
+# --------------------------------------------------------------------
+
+def test_warp_agent_loads_manual_once_and_runs_in_process(make_hub):
+    hub = make_hub()
+
+    ids = [
+        hub.submit_request("warp_agent", "Health Check", {"dry_run": True, "n": n})
+        for n in range(2)
+    ]
+    asyncio.run(_drain(hub, ids))
+
+    for request_id in ids:
+        result = hub.get_request(request_id).result
+        assert result["command"] == "Executar Health Check"
+        assert result["dry_run"] is True and result["execution_mode"] == "in_process"
+    assert hub._warp_bot is not None
+    assert len(hub._warp_bot.execution_log) == 2
+
+
+def test_in_process_warp_result_keeps_bot_truncation_and_log(make_hub, monkeypatch):
+    hub = make_hub()
+    monkeypatch.setattr(hub, "_execute_manual_command", lambda command_name, dry_run: {
+        "success": True, "dry_run": False, "output": "cauda\n", "output_truncated": True,
+        "output_bytes": 4096, "log_file": "logs/health.log", "return_code": 0,
+    })
+
+    request_id = hub.submit_request("warp_agent", "Health Check", {"dry_run": False})
+    asyncio.run(_drain(hub, [request_id]))
+
+    result = hub.get_request(request_id).result
+    assert result["output"] == "cauda\n" and result["output_file"] is None
+    assert result["output_truncated"] is True and result["output_bytes"] == 4096
+    assert result["log_file"] == "logs/health.log"
+
+
+def test_warp_command_resolves_only_through_aliases(make_hub):
+    hub = make_hub()
+    assert hub._warp_command_name("Monitorar Recursos", {}) == "Monitoramento do Sistema"
+    assert hub._warp_command_name("Health Check", {"command": "Executar Health Check"}) == "Executar Health Check"
+
+
+def test_forged_warp_command_is_refused(make_hub, tmp_path):
+    hub = make_hub(queue={"durable": True, "db_path": str(tmp_path / "queue.db")})
+    forged = {"command": "Limpeza do Sistema", "dry_run": False}
+
+    with pytest.raises(ValueError, match="Comando não permitido"):
+        hub.submit_request("warp_agent", "Health Check", forged)
+    with pytest.raises(ValueError, match="Comando não permitido"):
+        hub.enqueue_for_daemon("warp_agent", "Health Check", forged)
+    assert not hub.pending_requests
@@ -0,0 +1,297 @@
+"""Testes do parser do manual de operações e do bot de execução."""
+import json
+import os
+
+import pytest
+
+from tests.fixtures import load_script
+
+parser_module = load_script("ai-manual-parser.py")
+AIManualParser = parser_module.AIManualParser
+
+MANUAL = """# Manual
+
+## 🔧 Comandos
+
+### COMANDO: Verificar Status do Sistema
+**Descrição:** Verificar status geral
+**Pré-requisitos:** Nenhum
+**Comando:**
+```bash
+echo ok
+```
+**Verificação:** Deve mostrar ok
+**Troubleshooting:** Reexecutar
+
+### COMANDO: Sem Comando
+**Descrição:** Seção incompleta é ignorada
+**Pré-requisitos:** Nenhum
+
+### COMANDO: Gerar Dashboard
+**Descrição:** Gerar o dashboard
+com descrição em duas linhas
+**Pré-requisitos:** Nenhum
+**Comando:**
+```bash
+echo "## não é cabeçalho"
+echo fim
+```
+**Verificação:** Arquivo gerado
+**Troubleshooting:** Ver logs
+
+---
+
+### COMANDO: Falhar
+**Descrição:** Comando que sempre falha
+**Pré-requisitos:** Nenhum
+**Comando:**
+```bash
+echo erro >&2; exit 3
+```
+**Verificação:** Nunca
+**Troubleshooting:** Nenhum
+"""
+
+
+@pytest.fixture
+def manual(tmp_path):
+    path = tmp_path / "manual.md"
+    path.write_text(MANUAL, encoding="utf-8")
+    return path
+
+
+def _parser(manual, tmp_path, **kwargs):
+    return AIManualParser(str(manual), str(tmp_path / "index.json"), **kwargs)
+
+
+# --------------------------------------------------------------------
+# Varredura e índice
+# --------------------------------------------------------------------
+
+def test_scan_extracts_complete_sections_only(manual, tmp_path):
+    commands = _parser(manual, tmp_path, use_cache=False).parse_manual()
+
+    assert list(commands) == ["Verificar Status do Sistema", "Gerar Dashboard", "Falhar"]
+    dashboard = commands["Gerar Dashboard"]
+    assert dashboard["description"] == "Gerar o dashboard\ncom descrição em duas linhas"
+    assert dashboard["command"] == 'echo "## não é cabeçalho"\necho fim'
+    assert dashboard["priority"] == "média"
+    assert commands["Verificar Status do Sistema"]["priority"] == "alta"
+    assert not (tmp_path / "index.json").exists()
+
+
+def test_index_is_reused_until_content_changes(manual, tmp_path, monkeypatch):
+    first = _parser(manual, tmp_path).parse_manual()
+    index = json.loads((tmp_path / "index.json").read_text(encoding="utf-8"))
+    assert index["commands"] == first
+
+    scans = []
+    original_scan = AIManualParser._scan_commands
+    monkeypatch.setattr(AIManualParser, "_scan_commands",
+                        lambda self, content: scans.append(1) or original_scan(self, content))
+
+    # Apenas o mtime mudou: conteúdo idêntico, sem nova varredura
+    os.utime(manual, ns=(0, 0))
+    assert _parser(manual, tmp_path).parse_manual() == first
+    assert scans == []
+
+    manual.write_text(MANUAL.replace("Falhar", "Falhar Sempre"), encoding="utf-8")
+    assert "Falhar Sempre" in _parser(manual, tmp_path).parse_manual()
+    assert scans == [1]
+
+
+def test_index_for_other_manual_is_ignored(manual, tmp_path):
+    _parser(manual, tmp_path).parse_manual()
+    other = tmp_path / "other.md"
+    other.write_text(MANUAL.split("---")[0], encoding="utf-8")
+
+    assert "Falhar" not in _parser(other, tmp_path).parse_manual()
+
+
+# --------------------------------------------------------------------
+# Rotinas como DAG
+# --------------------------------------------------------------------
+
+@pytest.fixture
+def bot(manual, tmp_path):
+    operations_bot = parser_module.AIOperationsBot(
+        _parser(manual, tmp_path), journal_path=str(tmp_path / "journal.db")
+    )
+    yield operations_bot
+    operations_bot.journal.close()
+
+
+def test_validate_routine_rejects_cycles_and_unknown_dependencies():
+    parser_module.validate_routine({"a": [], "b": ["a"], "c": ["a", "b"]})
+
+    with pytest.raises(ValueError, match="Ciclo"):
+        parser_module.validate_routine({"a": ["c"], "b": ["a"], "c": ["b"], "d": []})
+    with pytest.raises(ValueError, match="fora da rotina"):
+        parser_module.validate_routine({"a": ["x"]})
+
+
+def test_default_routines_are_valid_dags():
+    for graph in parser_module.DEFAULT_ROUTINES.values():
+        parser_module.validate_routine(graph)
+
+
+def test_routine_runs_dependencies_first_and_skips_after_failure(bot):
+    import threading
+
+    started = []
+    lock = threading.Lock()
+
+    def run(command):
+        with lock:
+            started.append(command)
+        return {"command": command, "success": command != "falha", "dry_run": False,
+                "error": None, "note": None, "duration_seconds": 0.0}
+
+    bot._run_routine_command = run
+    bot.routines["teste"] = {
+        "base": [],
+        "falha": [],
+        "depois": ["base"],
+        "pulado": ["falha", "base"],
+        "cascata": ["pulado"],
+    }
+    results = bot.run_routine("teste", max_parallel=2)
+
+    assert sorted(started) == ["base", "depois", "falha"]
+    assert started.index("base") < started.index("depois")
+    entries = {entry["command"]: entry for entry in results["commands_executed"]}
+    assert [entry["command"] for entry in results["commands_executed"]] == list(bot.routines["teste"])
+    assert entries["pulado"]["skipped"] and entries["cascata"]["skipped"]
+    assert results["success_count"] == 2 and results["failure_count"] == 3
+
+
+def test_after_edges_only_order_and_still_run_after_failure(bot):
+    started = []
+
+    def run(command):
+        started.append(command)
+        return {"command": command, "success": command != "falha", "dry_run": False,
+                "error": None, "note": None, "duration_seconds": 0.0}
+
+    bot._run_routine_command = run
+    bot.routines["teste"] = {
+        "falha": [],
+        "base": [],
+        "limpeza": {"after": ["falha", "base"]},
+    }
+    results = bot.run_routine("teste", max_parallel=1)
+
+    assert started[-1] == "limpeza"
+    entries = {entry["command"]: entry for entry in results["commands_executed"]}
+    assert entries["limpeza"]["success"] and not entries["limpeza"].get("skipped")
+
+
+def test_load_routines_keeps_after_edges(tmp_path):
+    routines_file = tmp_path / "routines.yml"
+    routines_file.write_text(
+        "teste:\n"
+        "  a: []\n"
+        "  b: [a]\n"
+        "  c:\n"
+        "    after: [a, b]\n",
+        encoding="utf-8",
+    )
+
+    routines = parser_module.load_routines(str(routines_file))
+
+    assert routines["teste"] == {"a": [], "b": ["a"], "c": {"requires": [], "after": ["a", "b"]}}
+    parser_module.validate_routine(routines["teste"])
+    with pytest.raises(ValueError, match="Ciclo"):
+        parser_module.validate_routine({"a": {"after": ["b"]}, "b": ["a"]})
+
+
+# --------------------------------------------------------------------
+# Execução com saída limitada
+# --------------------------------------------------------------------
+
+def test_output_tail_keeps_last_lines():
+    tail = parser_module.OutputTail(max_bytes=10)
+    for line in ("aaaa\n", "bbbb\n", "cccc\n"):
+        tail.append(line)
+
+    assert tail.text() == "bbbb\ncccc\n"
+    assert tail.truncated
+    assert tail.total_bytes == 15
+
+
+def test_real_execution_reports_stderr_and_full_log(bot):
+    result = bot.execute_command("Falhar", dry_run=False)
+
+    assert not result["success"]
+    assert result["return_code"] == 3
+    assert result["error"] == "erro\n"
+    with open(result["log_file"], encoding="utf-8") as f:
+        assert f.read() == "[stderr] erro\n"
+
+
+def test_timeout_keeps_partial_output(bot):
+    result = bot._execute_bash_command("echo parcial; sleep 30", "lento", timeout=1)
+
+    assert not result["success"] and result["return_code"] == -1
+    assert "timeout" in result["error"]
+    assert result["output"] == "parcial\n"
+
+
+def test_journal_records_full_output_size_not_tail(bot, monkeypatch):
+    monkeypatch.setattr(parser_module.OutputTail.__init__, "__defaults__", (10,))
+
+    result = bot.execute_command("Gerar Dashboard", dry_run=False)
+
+    assert result["output_truncated"] and result["output"] == "fim\n"
+    assert result["output_bytes"] == len("## não é cabeçalho\nfim\n")
+    assert bot.execution_log[-1]["output_length"] == result["output_bytes"]
+    assert bot.journal.recent(1)[0]["output_length"] == result["output_bytes"]
+
+
+# --------------------------------------------------------------------
+# Histórico de execuções
+# --------------------------------------------------------------------
+
+def _entry(command, success, timestamp, duration=1.0, dry_run=False):
+    return {"timestamp": timestamp, "command_name": command, "success": success,
+            "dry_run": dry_run, "duration_seconds": duration}
+
+
+def test_journal_aggregates_real_executions(tmp_path):
+    journal = parser_module.ExecutionJournal(str(tmp_path / "journal.db"))
+    for minute, (success, duration) in enumerate([(True, 1.0), (True, 3.0), (False, 2.0), (False, 9.0)]):
+        journal.record(_entry("deploy", success, f"2026-01-01T00:0{minute}:00", duration))
+    journal.record(_entry("deploy", True, "2026-01-01T00:09:00", dry_run=True))
+    journal.record(_entry("antigo", True, "2025-01-01T00:00:00"))
+
+    since = "2026-01-01T00:00:00"
+    assert journal.summary(since) == {
+        "total_executions": 5, "successful_executions": 3, "failed_executions": 2,
+        "dry_runs": 1, "real_executions": 4,
+    }
+    stats = journal.command_stats(since)
+    assert set(stats) == {"deploy"}
+    assert stats["deploy"]["success_rate"] == 50.0
+    assert stats["deploy"]["p50_duration"] == 3.0
+    assert stats["deploy"]["p95_duration"] == 9.0
+    assert stats["deploy"]["failure_streak"] == 2
+    assert [entry["command_name"] for entry in journal.recent(2)] == ["deploy", "antigo"]
+    journal.close()
+
+
+def test_report_reads_history_from_previous_sessions(manual, tmp_path):
+    journal_path = str(tmp_path / "journal.db")
+    first = parser_module.AIOperationsBot(_parser(manual, tmp_path), journal_path=journal_path)
+    first.execute_command("Verificar Status do Sistema", dry_run=True)
+    first.execute_command("Falhar", dry_run=False)
+    first.journal.close()
+
+    second = parser_module.AIOperationsBot(_parser(manual, tmp_path), journal_path=journal_path)
+    report = second.generate_report()
+    second.journal.close()
+
+    assert report["total_executions"] == 2
+    assert report["failed_executions"] == 1
+    assert report["dry_runs"] == 1
+    assert report["commands"]["Falhar"]["failure_streak"] == 1
+    assert report["recent_executions"][-1]["command_name"] == "Falhar"
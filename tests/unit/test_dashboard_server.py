@@ -0,0 +1,71 @@
+"""Testes do agendamento de atualização do servidor do dashboard."""
+from core.monitoring.server import DashboardServer, _prometheus_label
+
+
+class FakeDashboard:
+    def __init__(self, repos):
+        self.repos = repos
+        self.org_name = "org"
+        self.metrics = {"security": {}}
+        self.refreshed = []
+
+    def _get_repositories(self):
+        return self.repos
+
+    def prune_repositories(self, names):
+        pass
+
+    def collect_security_metrics(self):
+        pass
+
+    def refresh_repositories(self, repos):
+        self.refreshed.append([repo["name"] for repo in repos])
+
+    def calculate_summary_metrics(self):
+        pass
+
+    def update_kpis(self):
+        pass
+
+
+def _repos(count):
+    return [{"name": f"r{i}", "pushed_at": "2026-01-01T00:00:00Z"} for i in range(count)]
+
+
+def _server(repos, **kwargs):
+    server = DashboardServer(FakeDashboard(repos), **kwargs)
+    server.build_snapshot = lambda: "snapshot"
+    return server
+
+
+def test_select_prioritizes_pushed_then_stale_repositories():
+    repos = _repos(4)
+    server = _server(repos, batch_size=2, max_age=100)
+    for repo, refreshed in zip(repos, (50.0, 10.0, 190.0, 195.0)):
+        server.last_refreshed[repo["name"]] = refreshed
+        server.last_pushed[repo["name"]] = repo["pushed_at"]
+    repos[3] = dict(repos[3], pushed_at="2026-01-02T00:00:00Z")
+
+    selected = server.select_repositories(repos, now=200.0)
+    assert [repo["name"] for repo in selected] == ["r3", "r1"]
+    assert len(server.select_repositories(repos, now=200.0, limit=10)) == 3
+
+
+def test_first_cycle_collects_every_repository_then_batches():
+    repos = _repos(5)
+    server = _server(repos, batch_size=2)
+
+    server.snapshot = server._refresh_cycle()
+    assert server.dashboard.refreshed == [["r0", "r1", "r2", "r3", "r4"]]
+
+    repos[4]["pushed_at"] = "2026-02-01T00:00:00Z"
+    assert server._refresh_cycle() == "snapshot"
+    assert server.dashboard.refreshed[-1] == ["r4"]
+
+    # Sem mudanças: nenhum repositório nem snapshot novo
+    assert server._refresh_cycle() is None
+    assert len(server.dashboard.refreshed) == 2
+
+
+def test_prometheus_label_escaping():
+    assert _prometheus_label('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
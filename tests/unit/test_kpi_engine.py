@@ -0,0 +1,73 @@
+"""Testes do motor de KPIs incremental."""
+import pytest
+
+from shared.utils.kpi_engine import KPIEngine
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "kpi_state.json")
+
+
+def _dashboard(success_rate, critical=0, high=0):
+    return {
+        "repositories": {"repo": {}},
+        "quality": {"workflow_success_rate": success_rate},
+        "automation": {"compliance_rate": 80},
+        "security": {"vulnerabilities": {"critical": critical, "high": high}},
+    }
+
+
+def test_run_outcomes_use_a_sliding_window(state_path):
+    engine = KPIEngine(state_path, window_size=4)
+    for success in (False, False, True, True, True, True):
+        engine.record_run("automation", success)
+
+    kpis = engine.state["kpis"]
+    # Apenas as 4 execuções mais recentes entram na taxa
+    assert kpis["success_rate_percent"] == 100.0
+    assert kpis["error_rate_percent"] == 0.0
+    assert kpis["total_runs"] == 6 and kpis["total_failures"] == 2
+    window = engine.state["windows"]["run_outcomes"]
+    assert len(window["values"]) == 4 and window["sum"] == 400.0
+
+
+def test_reports_do_not_count_as_runs(state_path):
+    engine = KPIEngine(state_path)
+    engine.record_health({
+        "automation_stats": {"compliance_percentage": 80},
+        "workflow_health": {"success_rate": 40},
+        "overall_health": "warning",
+    })
+    engine.record_dashboard(_dashboard(70, critical=1, high=2))
+
+    kpis = engine.snapshot()
+    assert kpis["system_health_score"] == 60.0
+    # Só o dashboard (agregado da organização) alimenta a taxa de workflows
+    assert kpis["workflow_success_rate"] == 70.0
+    assert kpis["critical_vulnerabilities"] == 3
+    assert kpis["total_runs"] == 0 and kpis["success_rate_percent"] is None
+    assert kpis["last_success"] is None
+    assert "workflow_success_rate: 70.0 (esperado >= 90)" in kpis["alerts"]
+
+
+def test_state_is_shared_between_engines(state_path):
+    producer = KPIEngine(state_path)
+    consumer = KPIEngine(state_path)
+
+    producer.record_run("operations", True)
+    producer.record_run("operations", False)
+
+    kpis = consumer.snapshot()
+    assert kpis["success_rate_percent"] == 50.0
+    assert kpis["last_success_age_hours"] == 0.0
+    assert "error_rate_percent: 50.0 (esperado <= 5)" in kpis["alerts"]
+
+
+def test_state_from_older_version_is_reset(state_path):
+    with open(state_path, "w", encoding="utf-8") as f:
+        f.write('{"version": 1, "windows": {}}')
+
+    engine = KPIEngine(state_path)
+    engine.record_run("automation", True)
+    assert engine.state["kpis"]["total_runs"] == 1
@@ -0,0 +1,434 @@
+"""Testes da automação de modernização de repositórios."""
+import base64
+import threading
+
+import pytest
+import yaml
+
+from tests.fixtures import load_script
+
+modernization = load_script("modernized_automation.py")
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, headers=None, text=""):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.text = text
+        self.content = b"{}" if body is not None else b""
+        self.links = {}
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    """Sessão que devolve as respostas programadas, em ordem."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, json=None, timeout=None):
+        self.requests.append((method, url, json))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def automation(monkeypatch):
+    instance = modernization.ModernizedOrganizationAutomation()
+    sleeps = []
+    monkeypatch.setattr(modernization.time, "sleep", sleeps.append)
+    instance.sleeps = sleeps
+    yield instance
+    if instance._call_executor:
+        instance._call_executor.shutdown()
+
+
+# --------------------------------------------------------------------
+# Rate limit
+# --------------------------------------------------------------------
+
+def test_rate_limit_wait_reads_github_headers(monkeypatch):
+    wait = modernization.ModernizedOrganizationAutomation._rate_limit_wait
+    monkeypatch.setattr(modernization.time, "time", lambda: 1000.0)
+
+    assert wait(FakeResponse(200), 0) is None
+    assert wait(FakeResponse(429, headers={"Retry-After": "7"}), 0) == 7.0
+    primary = FakeResponse(403, headers={"x-ratelimit-remaining": "0", "x-ratelimit-reset": "1030"})
+    assert wait(primary, 0) == 31.0
+    secondary = FakeResponse(403, text="You have exceeded a secondary rate limit")
+    assert wait(secondary, 1) == modernization.SECONDARY_RATE_LIMIT_WAIT * 2
+    # 403 de permissão não é rate limit
+    assert wait(FakeResponse(403, text="Resource not accessible"), 0) is None
+
+
+def test_send_retries_after_rate_limit(automation):
+    automation.session = FakeSession([
+        FakeResponse(429, headers={"Retry-After": "2"}),
+        FakeResponse(200, body={"ok": True}),
+    ])
+
+    assert automation._make_request("repos/org/repo") == {"ok": True}
+    assert automation.sleeps == [2.0]
+    assert automation.api_calls == 2 and automation.rate_limited == 1
+
+
+def test_send_gives_up_when_wait_exceeds_limit(automation, monkeypatch):
+    monkeypatch.setattr(modernization, "RATE_LIMIT_MAX_WAIT", 10)
+    automation.session = FakeSession([FakeResponse(429, headers={"Retry-After": "3600"})])
+
+    assert automation._make_request("repos/org/repo") is None
+    assert automation.sleeps == []
+
+
+def test_content_writes_are_serialized(automation):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    class SlowSession:
+        def request(self, method, url, json=None, timeout=None):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            # time.sleep é substituído pela fixture
+            threading.Event().wait(0.02)
+            with lock:
+                active[0] -= 1
+            return FakeResponse(201, body={})
+
+    automation.session = SlowSession()
+    threads = [
+        threading.Thread(target=automation._make_request,
+                         args=(f"repos/org/r{n}/contents/x.yml", "PUT", {}))
+        for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 1
+
+
+def test_call_executor_is_created_once_across_threads(automation, monkeypatch):
+    created = []
+
+    class SlowExecutor(modernization.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            # Alarga a janela entre o teste de None e a atribuição
+            threading.Event().wait(0.02)
+            created.append(self)
+            super().__init__(*args, **kwargs)
+
+    class OkSession:
+        def request(self, method, url, json=None, timeout=None):
+            return FakeResponse(200, body={"ok": True})
+
+    monkeypatch.setattr(modernization, "ThreadPoolExecutor", SlowExecutor)
+    automation.session = OkSession()
+    threads = [
+        threading.Thread(target=automation._parallel_requests,
+                         args=({"a": (f"repos/org/r{n}", "GET", None)},))
+        for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created == [automation._call_executor]
+
+
+# --------------------------------------------------------------------
+# Segurança em lote
+# --------------------------------------------------------------------
+
+class FakeGitHub:
+    """API do GitHub em memória para ``_make_request``/``_paginate``."""
+
+    def __init__(self, responses=None, pages=None):
+        self.responses = responses or {}
+        self.pages = pages or {}
+        self.calls = []
+
+    def make_request(self, endpoint, method="GET", data=None):
+        self.calls.append((method, endpoint, data))
+        default = {"ok": True} if method != "GET" else None
+        return self.responses.get((method, endpoint.split("?")[0]), default)
+
+    def paginate(self, endpoint):
+        return self.pages.get(endpoint.split("?")[0], [])
+
+    def install(self, automation):
+        automation._make_request = self.make_request
+        automation._paginate = self.paginate
+        return self
+
+
+def _repo(name, repo_id, security_updates="enabled"):
+    return {
+        "name": name,
+        "id": repo_id,
+        "security_and_analysis": {"dependabot_security_updates": {"status": security_updates}},
+    }
+
+
+def test_missing_security_features_uses_listing_and_status():
+    missing = modernization.ModernizedOrganizationAutomation._missing_security_features
+
+    assert missing(_repo("a", 1), {"dependabot": True, "codeql": True}) == []
+    assert missing(_repo("a", 1, "disabled"), {"dependabot": True, "codeql": False}) == [
+        "dependabot_security_updates", "code_scanning_default_setup",
+    ]
+    assert missing({"name": "b"}, None) == [
+        "dependabot_alerts", "dependabot_security_updates", "code_scanning_default_setup",
+    ]
+
+
+def test_bulk_attaches_only_repos_missing_features(automation):
+    configurations = f"orgs/{automation.org_name}/code-security/configurations"
+    stale = dict(modernization.SECURITY_CONFIGURATION, id=7, secret_scanning="enabled")
+    github = FakeGitHub(
+        responses={("GET", configurations): [{"id": 3, "name": "legado"}, stale]},
+        pages={
+            f"{configurations}/3/repositories": [{"repository": {"name": "governado"}}],
+            f"{configurations}/7/repositories": [],
+        },
+    ).install(automation)
+
+    repos = [_repo("falta", 1), _repo("completo", 2), _repo("governado", 3), _repo("sem-status", 4)]
+    statuses = {
+        "falta": {"dependabot": True, "codeql": False},
+        "completo": {"dependabot": True, "codeql": True},
+        "governado": {"dependabot": False, "codeql": False},
+    }
+    handled = automation.enable_security_features_bulk(repos, statuses)
+
+    assert handled == {"falta": True, "completo": False, "governado": False}
+    writes = [call for call in github.calls if call[0] != "GET"]
+    # Configuração existente com outro valor é alinhada antes de anexar
+    assert writes[0] == ("PATCH", f"{configurations}/7", {"secret_scanning": "not_set"})
+    assert writes[1] == (
+        "POST", f"{configurations}/7/attach", {"scope": "selected", "selected_repository_ids": [1]}
+    )
+    assert len(writes) == 2
+
+
+def test_security_configuration_leaves_unrelated_features_unset():
+    configuration = modernization.SECURITY_CONFIGURATION
+    enabled = {key for key, value in configuration.items() if value == "enabled"}
+
+    assert enabled == {
+        "dependency_graph", "dependabot_alerts", "dependabot_security_updates", "code_scanning_default_setup",
+    }
+    assert configuration["secret_scanning"] == "not_set"
+    assert configuration["enforcement"] == "unenforced"
+
+
+def test_bulk_falls_back_when_configurations_are_unavailable(automation):
+    FakeGitHub().install(automation)
+    assert automation.enable_security_features_bulk([_repo("a", 1)], {"a": {}}) is None
+
+
+# --------------------------------------------------------------------
+# Dependabot a partir dos manifestos
+# --------------------------------------------------------------------
+
+def _decoded_updates(config):
+    return [
+        (update["package-ecosystem"], update["directory"])
+        for update in yaml.safe_load(base64.b64decode(config))["updates"]
+    ]
+
+
+def test_detect_manifests_at_every_level():
+    detect = modernization.ModernizedOrganizationAutomation._detect_manifests
+    ecosystems = detect({
+        "pyproject.toml",
+        "services/api/requirements-dev.txt",
+        "web/package.json",
+        "web/node_modules/lib/package.json",
+        "deploy/Dockerfile.prod",
+        ".github/workflows/ci.yml",
+        "README.md",
+    })
+
+    assert ecosystems == {
+        "pip": {"/", "/services/api"},
+        "npm": {"/web"},
+        "docker": {"/deploy"},
+        "github-actions": {"/"},
+    }
+
+
+def test_config_without_tree_uses_language_and_workflows(automation):
+    generate = automation._generate_dependabot_config
+
+    assert _decoded_updates(generate({"language": "Go"}, has_workflows=False)) == [("gomod", "/")]
+    assert _decoded_updates(generate({"language": "Go"})) == [("github-actions", "/"), ("gomod", "/")]
+    assert generate({"language": "Haskell"}, has_workflows=False) is None
+
+
+def test_dependabot_covers_workflows_created_in_the_same_run(automation):
+    tree = {"tree": [{"path": "go.mod", "type": "blob"}, {"path": "cmd", "type": "tree"}]}
+    github = FakeGitHub(responses={
+        ("GET", f"repos/{automation.org_name}/svc/git/trees/main"): tree,
+    }).install(automation)
+    repo = {"name": "svc", "language": "Go", "default_branch": "main"}
+
+    assert automation.create_modern_workflows(repo) == 1
+    assert automation.enable_dependabot(repo)
+
+    method, endpoint, data = github.calls[-1]
+    assert (method, endpoint) == ("PUT", f"repos/{automation.org_name}/svc/contents/.github/dependabot.yml")
+    assert _decoded_updates(data["content"]) == [("github-actions", "/"), ("gomod", "/")]
+    # Uma única listagem da árvore para workflows e Dependabot
+    assert sum(1 for call in github.calls if "/git/trees/" in call[1]) == 1
+
+
+def test_existing_dependabot_config_is_kept(automation):
+    tree = {"tree": [{"path": ".github/dependabot.yaml", "type": "blob"}]}
+    github = FakeGitHub(responses={
+        ("GET", f"repos/{automation.org_name}/svc/git/trees/main"): tree,
+    }).install(automation)
+
+    assert automation.enable_dependabot({"name": "svc", "language": "Go"})
+    assert not any(method == "PUT" for method, _, _ in github.calls)
+
+
+# --------------------------------------------------------------------
+# Proteção de branch
+# --------------------------------------------------------------------
+
+def _protection(**overrides):
+    """Proteção no formato de leitura da API, já conforme com a política."""
+    current = {
+        "required_status_checks": {
+            "strict": True,
+            "contexts": ["ci-build-test", "security-audit"],
+            "checks": [
+                {"context": "ci-build-test", "app_id": None},
+                {"context": "security-audit", "app_id": None},
+            ],
+        },
+        "enforce_admins": {"enabled": False},
+        "required_pull_request_reviews": {
+            "required_approving_review_count": 1,
+            "dismiss_stale_reviews": True,
+            "require_code_owner_reviews": True,
+            "require_last_push_approval": False,
+        },
+        "allow_force_pushes": {"enabled": False},
+        "allow_deletions": {"enabled": False},
+        "block_creations": {"enabled": False},
+        "required_conversation_resolution": {"enabled": True},
+    }
+    current.update(overrides)
+    return current
+
+
+def test_conforming_or_stricter_protection_has_no_delta(automation):
+    assert automation._protection_delta(_protection()) == {}
+
+    stricter = _protection(enforce_admins={"enabled": True}, block_creations={"enabled": True})
+    stricter["required_pull_request_reviews"].update(
+        required_approving_review_count=3, require_last_push_approval=True
+    )
+    assert automation._protection_delta(stricter) == {}
+
+
+def test_delta_merges_toward_stricter_values(automation):
+    current = _protection(
+        allow_force_pushes={"enabled": True},
+        required_pull_request_reviews={"required_approving_review_count": 2, "dismiss_stale_reviews": False},
+    )
+    current["required_status_checks"] = {
+        "strict": False,
+        "contexts": ["lint"],
+        "checks": [{"context": "lint", "app_id": 15368}],
+    }
+
+    delta = automation._protection_delta(current)
+
+    assert delta["allow_force_pushes"] is False
+    assert delta["required_pull_request_reviews"] == {
+        "required_approving_review_count": 2,
+        "dismiss_stale_reviews": True,
+        "require_code_owner_reviews": True,
+        "require_last_push_approval": False,
+    }
+    assert delta["required_status_checks"] == {
+        "strict": True,
+        "checks": [
+            {"context": "lint", "app_id": 15368},
+            {"context": "ci-build-test"},
+            {"context": "security-audit"},
+        ],
+    }
+
+
+def test_put_body_preserves_settings_outside_the_policy(automation):
+    current = _protection(
+        allow_deletions={"enabled": True},
+        required_linear_history={"enabled": True},
+        lock_branch={"enabled": False},
+        restrictions={"users": [{"login": "octocat"}], "teams": [{"slug": "core"}], "apps": []},
+    )
+    current["required_pull_request_reviews"]["dismissal_restrictions"] = {
+        "users": [], "teams": [{"slug": "leads"}], "apps": [],
+    }
+
+    delta = automation._protection_delta(current)
+    assert delta == {"allow_deletions": False}
+    body = automation._protection_put_body(current, delta)
+
+    assert body["allow_deletions"] is False
+    assert body["required_linear_history"] is True and body["lock_branch"] is False
+    assert body["restrictions"] == {"users": ["octocat"], "teams": ["core"], "apps": []}
+    assert body["required_pull_request_reviews"]["dismissal_restrictions"]["teams"] == ["leads"]
+    assert body["required_status_checks"]["checks"] == [
+        {"context": "ci-build-test"}, {"context": "security-audit"},
+    ]
+    assert body["required_conversation_resolution"] is True
+
+
+def test_apply_patches_subresources_or_puts_merged_body(automation):
+    repo = {"name": "svc", "default_branch": "develop"}
+    endpoint = f"repos/{automation.org_name}/svc/branches/develop/protection"
+
+    reviews_only = _protection(required_pull_request_reviews={"required_approving_review_count": 0})
+    automation._branch_protection["svc"] = reviews_only
+    github = FakeGitHub().install(automation)
+    assert automation.apply_modern_branch_protection(repo)
+    assert [(method, path) for method, path, _ in github.calls] == [
+        ("PATCH", f"{endpoint}/required_pull_request_reviews"),
+    ]
+
+    automation._branch_protection["svc"] = _protection(allow_force_pushes={"enabled": True})
+    github = FakeGitHub().install(automation)
+    assert automation.apply_modern_branch_protection(repo)
+    (method, path, data), = github.calls
+    assert (method, path) == ("PUT", endpoint) and data["allow_force_pushes"] is False
+
+    automation._branch_protection["svc"] = _protection()
+    github = FakeGitHub().install(automation)
+    assert not automation.apply_modern_branch_protection(repo)
+    assert github.calls == []
+
+
+def test_missing_sections_are_enabled_through_put(automation):
+    repo = {"name": "svc", "default_branch": "main"}
+    endpoint = f"repos/{automation.org_name}/svc/branches/main/protection"
+    current = _protection()
+    del current["required_status_checks"], current["required_pull_request_reviews"]
+
+    automation._branch_protection["svc"] = current
+    github = FakeGitHub().install(automation)
+    assert automation.apply_modern_branch_protection(repo)
+
+    (method, path, data), = github.calls
+    assert (method, path) == ("PUT", endpoint)
+    assert data["required_status_checks"]["strict"] is True
+    assert data["required_pull_request_reviews"]["required_approving_review_count"] == 1
@@ -0,0 +1,87 @@
+"""Testes do renderizador HTML do dashboard."""
+import io
+import json
+import re
+
+from core.monitoring.renderer import COMPILED_PAGE, DashboardRenderer, compile_template
+
+
+def _metrics(**overrides):
+    metrics = {
+        "timestamp": "2026-01-02T03:04:05",
+        "organization": {
+            "name": "<org>",
+            "total_repos": 2,
+            "visibility": {"public": 1, "private": 1},
+            "languages": {"<Py&thon>": 2},
+        },
+        "repositories": {
+            "<script>alert(1)</script>": {
+                "language": "Python",
+                "compliance": {"score": 90},
+                "workflows": {"success_rate": 95.0},
+                "last_push": "2026-01-01T00:00:00Z",
+            },
+            "plain": {"compliance": {"score": 40}},
+        },
+        "automation": {"compliance_rate": 65},
+        "development": {"commits_last_week": 3, "prs_last_week": 1, "issues_last_week": 0, "avg_pr_time": 2.5},
+        "quality": {
+            "workflow_success_rate": 85,
+            "failed_workflows": [{"repo": "r&d", "workflow": "<ci>", "date": None}],
+            "slowest_workflows": [{"repo": "r", "workflow": "b\"uild", "duration_p50": 10, "duration_p95": 30}],
+            "flaky_workflows": [{"repo": "r", "workflow": "b\"uild"}],
+        },
+        "security": {
+            "vulnerabilities": {"critical": 0, "high": 1},
+            "secret_scanning_alerts": 0,
+            "dependency_alerts": 4,
+        },
+    }
+    metrics.update(overrides)
+    return metrics
+
+
+def _render(metrics) -> str:
+    buffer = io.StringIO()
+    DashboardRenderer(metrics).render(buffer)
+    return buffer.getvalue()
+
+
+def test_compile_template_splits_literals_and_fields():
+    assert compile_template("a{{ x }}b{{y}}") == [("a", "x"), ("b", "y"), ("", None)]
+    assert all(field is None or field.isidentifier() for _, field in COMPILED_PAGE)
+
+
+def test_markup_from_metrics_is_escaped():
+    page = _render(_metrics())
+
+    assert "<org>" not in page and "&lt;org&gt;" in page
+    assert "&lt;Py&amp;thon&gt;" in page
+    assert "r&amp;d" in page and "&lt;ci&gt;" in page
+    assert "b&quot;uild 🎲" in page
+    assert "<script>alert(1)</script>" not in page
+
+
+def test_repo_data_island_is_valid_json_without_closing_tags():
+    page = _render(_metrics())
+    island = re.search(r'<script[^>]*id="repo-data"[^>]*>(.*?)</script>', page, re.S)
+    assert island is not None
+    assert "</" not in island.group(1)
+
+    data = json.loads(island.group(1))
+    assert data["rows"][0][0] == "<script>alert(1)</script>"
+    assert data["rows"][0][-1] == "2026-01-01"
+    assert data["rows"][1][-1] is None
+    assert len(data["columns"]) == len(data["rows"][0])
+
+
+def test_optional_sections_are_omitted():
+    metrics = _metrics()
+    metrics["quality"].update(failed_workflows=[], slowest_workflows=[])
+    page = _render(metrics)
+
+    assert "Workflows com Falhas Recentes" not in page
+    assert "Workflows Mais Lentos" not in page
+    assert "KPIs Operacionais" not in page
+    assert "{{" not in page
@@ -0,0 +1,69 @@
+"""Testes da agregação de alertas de segurança da organização."""
+import pytest
+
+from core.monitoring import security
+from core.monitoring.security import OrganizationSecurityCollector
+
+
+class FakeResponse:
+    def __init__(self, status_code, alerts=None):
+        self.status_code = status_code
+        self._alerts = alerts or []
+        self.links = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+    def json(self):
+        return self._alerts
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    by_endpoint = {}
+
+    def fake_get(url, headers, params, timeout):
+        endpoint = url.split("/orgs/org/")[1]
+        return by_endpoint.get(endpoint, FakeResponse(200))
+
+    monkeypatch.setattr(security.requests, "get", fake_get)
+    return by_endpoint
+
+
+def _alert(number, repo, severity, updated_at="2026-01-01T00:00:00Z", state="open"):
+    return {
+        "number": number,
+        "state": state,
+        "updated_at": updated_at,
+        "repository": {"name": repo},
+        "security_advisory": {"severity": severity},
+    }
+
+
+def test_unavailable_endpoint_keeps_watermark(tmp_path, responses):
+    collector = OrganizationSecurityCollector("org", {}, state_path=str(tmp_path / "alerts.json"))
+    collector.state["code_scanning"]["synced_at"] = "2026-01-01T00:00:00Z"
+    responses["code-scanning/alerts"] = FakeResponse(403)
+
+    changes = collector.sync()
+
+    assert changes["code_scanning"] == 0
+    assert collector.state["code_scanning"]["synced_at"] == "2026-01-01T00:00:00Z"
+    assert collector.state["dependabot"]["synced_at"] is not None
+
+
+def test_alerts_grouped_by_repository_and_severity(tmp_path, responses):
+    responses["dependabot/alerts"] = FakeResponse(200, [
+        _alert(1, "api", "critical"),
+        _alert(2, "api", "moderate"),
+        _alert(3, "web", "high", state="fixed"),
+    ])
+    collector = OrganizationSecurityCollector("org", {}, state_path=str(tmp_path / "alerts.json"))
+    collector.sync()
+
+    grouped = collector.by_repository()
+    assert set(grouped) == {"api"}
+    assert grouped["api"]["dependabot"]["critical"] == 1
+    assert grouped["api"]["dependabot"]["medium"] == 1
+    assert collector.totals(grouped)["dependency_alerts"] == 2
@@ -0,0 +1,146 @@
+"""Testes do analytics incremental de workflows."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.monitoring import workflow_analytics
+from core.monitoring.workflow_analytics import (
+    HISTOGRAM_BOUNDS,
+    WorkflowAnalyticsCollector,
+    _new_histogram,
+    _observe,
+    histogram_percentile,
+)
+
+NOW = datetime.now(timezone.utc)
+
+
+def _iso(hours_ago: float) -> str:
+    return (NOW - timedelta(hours=hours_ago)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _run(run_id, hours_ago, status="completed", conclusion="success", attempt=1, duration=60):
+    return {
+        "id": run_id,
+        "name": "ci",
+        "created_at": _iso(hours_ago),
+        "run_started_at": _iso(hours_ago),
+        "updated_at": _iso(hours_ago - duration / 3600),
+        "status": status,
+        "conclusion": conclusion if status == "completed" else None,
+        "run_attempt": attempt,
+    }
+
+
+class FakeActions:
+    """API de runs: filtro ``created>=``, mais novos primeiro, paginada."""
+
+    def __init__(self):
+        self.runs = []
+        self.fail = False
+        self.requests = []
+
+    def get(self, url, headers, params, timeout):
+        self.requests.append(dict(params))
+        since = params["created"][2:]
+        selected = sorted(
+            (run for run in self.runs if run["created_at"] >= since),
+            key=lambda run: run["created_at"], reverse=True,
+        )
+        page = params["page"]
+        return FakeResponse(selected[(page - 1) * params["per_page"]:page * params["per_page"]], not self.fail)
+
+
+class FakeResponse:
+    def __init__(self, runs, ok):
+        self.ok = ok
+        self.status_code = 200 if ok else 502
+        self._runs = runs
+
+    def json(self):
+        return {"workflow_runs": self._runs}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    fake = FakeActions()
+    monkeypatch.setattr(workflow_analytics.requests, "get", fake.get)
+    return fake
+
+
+@pytest.fixture
+def collector(tmp_path, api):
+    return WorkflowAnalyticsCollector("org", {}, state_path=str(tmp_path / "state.json"))
+
+
+def test_histogram_percentiles_interpolate_within_buckets():
+    histogram = _new_histogram()
+    for value in [5] * 90 + [500] * 10:
+        _observe(histogram, value)
+
+    assert histogram_percentile(histogram, 0.5) <= HISTOGRAM_BOUNDS[0]
+    assert 300 < histogram_percentile(histogram, 0.95) <= 500
+    assert histogram_percentile(_new_histogram(), 0.5) is None
+
+
+def test_long_run_is_ingested_when_it_finishes(collector, api):
+    long_run = _run(1, 5, status="in_progress")
+    api.runs += [long_run, _run(2, 3), _run(3, 2)]
+
+    assert collector.ingest_repository("repo") == 2
+    # A marca d'água não passa da execução ainda em andamento
+    assert collector.state["repos"]["repo"]["cursor"] == long_run["created_at"]
+
+    long_run.update(status="completed", conclusion="success", updated_at=_iso(0.5))
+    assert collector.ingest_repository("repo") == 1
+    assert collector.ingest_repository("repo") == 0
+    assert collector.state["repos"]["repo"]["workflows"]["ci"]["runs"] == 3
+
+
+def test_rerun_attempt_is_ingested_as_success_after_retry(collector, api):
+    run = _run(7, 1, conclusion="failure")
+    api.runs.append(run)
+    collector.ingest_repository("repo")
+
+    run.update(run_attempt=2, conclusion="success", updated_at=_iso(0.1))
+    assert collector.ingest_repository("repo") == 1
+
+    workflow = collector.state["repos"]["repo"]["workflows"]["ci"]
+    assert workflow["recent_outcomes"] == [0, 2]
+    assert workflow["failures"] == 1
+
+
+def test_cursor_does_not_advance_after_incomplete_fetch(collector, api):
+    api.runs.append(_run(1, 3))
+    collector.ingest_repository("repo")
+    cursor = collector.state["repos"]["repo"]["cursor"]
+
+    api.runs.append(_run(2, 0.5))
+    api.fail = True
+    assert collector.ingest_repository("repo") == 0
+    assert collector.state["repos"]["repo"]["cursor"] == cursor
+
+    api.fail = False
+    assert collector.ingest_repository("repo") == 1
+    assert collector.state["repos"]["repo"]["cursor"] > cursor
+
+
+def test_page_cap_defers_ingestion_until_complete_fetch(tmp_path, api):
+    collector = WorkflowAnalyticsCollector("org", {}, state_path=str(tmp_path / "s.json"), max_pages=1)
+    api.runs += [_run(i, 10 - i * 0.01) for i in range(150)]
+
+    assert collector.ingest_repository("repo") == 0
+    assert collector.state["repos"]["repo"]["cursor"] is None
+
+    collector.max_pages = 2
+    assert collector.ingest_repository("repo") == 150
+    assert collector.ingest_repository("repo") == 0
+
+
+def test_state_round_trip(collector, api, tmp_path):
+    api.runs.append(_run(1, 2))
+    collector.ingest_repository("repo")
+    collector.save_state()
+
+    reloaded = WorkflowAnalyticsCollector("org", {}, state_path=str(tmp_path / "state.json"))
+    assert reloaded.repo_summary("repo")["success_rate"] == 100.0